@@ -6,8 +6,11 @@ and decoding DNA sequences back to original files. It includes error correction,
 biological constraints enforcement, and file type detection.
 """
 
+import os
 import shutil
+import tempfile
 import urllib.parse
+import zipfile
 from pathlib import Path
 from typing import Optional
 import uuid
@@ -18,17 +21,23 @@ from fastapi.responses import FileResponse
 from pydantic import BaseModel
 
 # Import DNA encoding/decoding modules
-from dnaio.file_reader import convert_file_to_binary, read_fasta_with_metadata
-from encoder.base_mapping import binary_to_base4, base4_to_dna
+from dnaio.file_reader import read_fasta_with_metadata, read_input
+from encoder.base_mapping import bytes_to_base4_array, map_to_dna
 from encoder.error_correction import add_reed_solomon
+from encoder.compression import COMPRESSION_BLOCK, compress_blocks, resolve_compression
+from encoder.header import ArchiveHeader
 from encoder.constraints import (
-    enforce_constraints, 
-    check_gc_content, 
-    has_long_homopolymers, 
-    contains_unstable_motifs
+    analyze_sequence,
+    ConstraintSpec,
+    DEFAULT_SPEC
 )
 from dnaio.file_writer import write_fasta
-from decoder import decode_dna_sequence
+from dnaio.streaming import decode_file_streaming
+from dnaio.container import write_container
+from dnaio.header import read_archive_header
+from decoder.random_access import decode_range
+from dnaio.archive import archive_header as build_archive_header, extract_archive, extract_member, pack_archive
+from encoder.ecc import DecodeReport
 
 app = FastAPI(
     title="DNA Storage API",
@@ -48,22 +57,47 @@ app.add_middleware(
 # Create temporary directories for file processing
 TEMP_DIR = Path("temp")
 TEMP_DIR.mkdir(exist_ok=True)
+# Leading bytes of decoded output used to detect the file type
+FILE_TYPE_SNIFF_SIZE = 1 << 20
+# Range length used when only range_start is given: everything to the end
+MAX_RANGE_LENGTH = 1 << 62
 
 class EncodeResponse(BaseModel):
     dna_sequence: str
-    metadata: list[int]  # Changed from dict to list[int]
+    metadata: list[int]  # Changed from dict to list[int]; empty for the 'patch' and 'rotating' codecs
+    codec: str
+    patch_count: int
     original_filename: str
     file_size: int
     gc_content: float
-    has_homopolymers: bool
+    has_homopolymers: bool  # A run longer than max_homopolymer (the request's limit, not a fixed 3)
+    max_homopolymer: int = DEFAULT_SPEC.max_homopolymer  # Limit has_homopolymers was checked against
     has_unstable_motifs: bool
     output_file: str
+    constraint_report: dict
+    compression: str = 'none'
+    encoded_size: int = 0  # Bytes after pre-compression, before error correction
 
 class DecodeResponse(BaseModel):
     original_filename: str
     file_size: int
     detected_file_type: str
     output_file: str
+    verified: bool = False  # Output matched the SHA-256 in the archive header
+    codewords: int = 0
+    corrected_codewords: dict = {}  # Codeword index -> corrected symbols, for damaged codewords only
+
+class ArchiveMemberInfo(BaseModel):
+    name: str
+    size: int
+    sha256: str
+
+class EncodeArchiveResponse(BaseModel):
+    members: list[ArchiveMemberInfo]
+    codec: str
+    file_size: int  # Payload bytes: members plus directory
+    gc_content: float
+    output_file: str
 
 @app.get("/")
 async def root():
@@ -74,7 +108,13 @@ async def root():
 async def encode_file(
     file: UploadFile = File(...),
     nsym: int = Form(10),
-    motifs: Optional[str] = Form("ATATAT,CGCGCG")
+    motifs: Optional[str] = Form(",".join(DEFAULT_SPEC.motifs)),
+    max_homopolymer: int = Form(DEFAULT_SPEC.max_homopolymer),
+    gc_min: float = Form(DEFAULT_SPEC.gc_min),
+    gc_max: float = Form(DEFAULT_SPEC.gc_max),
+    codec: str = Form('mapped'),
+    output_format: str = Form('fasta'),
+    compression: str = Form('none')
 ):
     """
     Encode a file to DNA sequence.
@@ -82,75 +122,155 @@ async def encode_file(
     Args:
         file: The file to encode
         nsym: Number of Reed-Solomon error correction symbols
-        motifs: Comma-separated list of unstable motifs to check for
+        motifs: Comma-separated list of unstable motifs to avoid and check for
+        max_homopolymer: Longest allowed homopolymer run; ``has_homopolymers``
+            in the response reports runs longer than this
+        gc_min: Minimum GC content percentage
+        gc_max: Maximum GC content percentage
+        codec: 'mapped' (metadata record), 'patch' (direct mapping plus repair patches) or 'rotating' (no metadata)
+        output_format: 'fasta' or 'dnab' (2-bit packed binary container)
+        compression: 'none', 'auto' (chosen from a sample; skipped for already
+            compressed files), 'zlib', 'bz2' or 'lzma', applied before error correction
     
     Returns:
         DNA sequence and metadata
     """
     try:
-        # Create unique temporary file
+        # Create unique output file
         temp_id = str(uuid.uuid4())
-        temp_input = TEMP_DIR / f"input_{temp_id}_{file.filename}"
-        temp_output = TEMP_DIR / f"output_{temp_id}.fasta"
+        if output_format not in ('fasta', 'dnab'):
+            raise ValueError(f"Unsupported output format: {output_format}. Choose from fasta, dnab")
+        temp_output = TEMP_DIR / f"output_{temp_id}.{output_format}"
         
-        # Save uploaded file
-        with open(temp_input, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Parse motifs
+        # Parse motifs and build the constraint specification
         motif_list = [m.strip() for m in motifs.split(",")]
+        spec = ConstraintSpec(
+            max_homopolymer=max_homopolymer,
+            gc_min=gc_min,
+            gc_max=gc_max,
+            motifs=tuple(motif_list)
+        )
         
-        # 1. Read file and convert to binary
-        binary_data = convert_file_to_binary(str(temp_input))
+        # 1. Map the upload (rolled over to its temporary file on disk) instead of reading a copy
+        binary_data = read_input(file.file)
+        method = resolve_compression(compression, binary_data)
+        payload, sizes = compress_blocks(binary_data, method, COMPRESSION_BLOCK) if method else (binary_data, None)
         
         # 2. Add Reed-Solomon error correction
-        corrected_data = add_reed_solomon(binary_data, nsym=nsym)
+        corrected_data = add_reed_solomon(payload, nsym=nsym)
         
         # 3. Convert to base-4
-        base4_digits = binary_to_base4(corrected_data)
-        
-        # 4. Map to DNA (constraint-aware, returns both sequence and metadata)
-        dna_sequence, metadata = base4_to_dna(base4_digits)
+        base4_digits = bytes_to_base4_array(corrected_data)
         
-        # 5. Check constraints
-        gc_content = check_gc_content(dna_sequence)
-        has_homopolymers = has_long_homopolymers(dna_sequence)
-        has_motifs = contains_unstable_motifs(dna_sequence, motif_list)
+        # 4. Map to DNA (constraint-aware, returns the sequence and what is needed to decode it)
+        mapped = map_to_dna(base4_digits, spec, codec)
+        dna_sequence = mapped.dna_sequence
         
-        # 6. Write output
-        write_fasta(str(temp_output), dna_sequence, metadata=metadata, original_filename=file.filename)
+        # 5. Check constraints (single pass over the sequence)
+        report = analyze_sequence(dna_sequence, spec)
         
-        # Clean up input file
-        temp_input.unlink()
+        # 6. Write output, with the header a decoder needs to decode it unaided
+        archive_header = ArchiveHeader.for_payload(payload, mapped.codec, nsym, file.filename)
+        archive_header.compression = method
+        if method:
+            archive_header.compression_block, archive_header.compressed_sizes = COMPRESSION_BLOCK, sizes
+        if output_format == 'dnab':
+            write_container(str(temp_output), dna_sequence, metadata=mapped.metadata, original_filename=file.filename, patches=mapped.patches, codec=mapped.codec, nsym=nsym, payload_length=len(payload), archive_header=archive_header)
+        else:
+            write_fasta(str(temp_output), dna_sequence, metadata=mapped.metadata, original_filename=file.filename, patches=mapped.patches, codec=mapped.codec, archive_header=archive_header)
         
         return EncodeResponse(
             dna_sequence=dna_sequence,
-            metadata=metadata,
+            metadata=mapped.metadata or [],
+            codec=mapped.codec,
+            patch_count=len(mapped.patches or []),
             original_filename=file.filename,
             file_size=len(binary_data),
-            gc_content=gc_content,
-            has_homopolymers=has_homopolymers,
-            has_unstable_motifs=has_motifs,
+            compression=method or 'none',
+            encoded_size=len(payload),
+            gc_content=report.gc_content,
+            has_homopolymers=report.has_long_homopolymers(),
+            max_homopolymer=spec.max_homopolymer,
+            has_unstable_motifs=report.has_unstable_motifs,
+            output_file=str(temp_output),
+            constraint_report=report.as_dict()
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Encoding failed: {str(e)}")
+
+@app.post("/api/encode-archive", response_model=EncodeArchiveResponse)
+async def encode_archive(
+    files: list[UploadFile] = File(...),
+    nsym: int = Form(10),
+    codec: str = Form('mapped'),
+    output_format: str = Form('fasta')
+):
+    """
+    Encode several files into one multi-file archive.
+    
+    Each member can later be extracted on its own with the ``member`` field
+    of /api/decode.
+    
+    Args:
+        files: The files to archive; member names are their filenames
+        nsym: Number of Reed-Solomon error correction symbols
+        codec: 'mapped', 'patch' or 'rotating'
+        output_format: 'fasta' or 'dnab'
+    
+    Returns:
+        The archive directory and output file
+    """
+    try:
+        temp_id = str(uuid.uuid4())
+        if output_format not in ('fasta', 'dnab'):
+            raise ValueError(f"Unsupported output format: {output_format}. Choose from fasta, dnab")
+        temp_output = TEMP_DIR / f"output_{temp_id}.{output_format}"
+        
+        # Members are read straight from the uploads
+        entries = [(os.path.basename(upload.filename), upload.file) for upload in files]
+        if len({name for name, _ in entries}) != len(entries):
+            raise ValueError("Archived files must have distinct names")
+        
+        payload, members = pack_archive(entries)
+        mapped = map_to_dna(bytes_to_base4_array(add_reed_solomon(payload, nsym=nsym)), DEFAULT_SPEC, codec)
+        header = build_archive_header(payload, members, mapped.codec, nsym)
+        if output_format == 'dnab':
+            write_container(str(temp_output), mapped.dna_sequence, metadata=mapped.metadata, patches=mapped.patches, codec=mapped.codec, nsym=nsym, payload_length=len(payload), archive_header=header)
+        else:
+            write_fasta(str(temp_output), mapped.dna_sequence, metadata=mapped.metadata, patches=mapped.patches, codec=mapped.codec, archive_header=header)
+        
+        return EncodeArchiveResponse(
+            members=[ArchiveMemberInfo(name=member.name, size=member.length, sha256=member.sha256) for member in members],
+            codec=mapped.codec,
+            file_size=len(payload),
+            gc_content=analyze_sequence(mapped.dna_sequence, DEFAULT_SPEC).gc_content,
             output_file=str(temp_output)
         )
         
     except Exception as e:
-        # Clean up on error
-        if 'temp_input' in locals() and temp_input.exists():
-            temp_input.unlink()
         raise HTTPException(status_code=500, detail=f"Encoding failed: {str(e)}")
 
 @app.post("/api/decode", response_model=DecodeResponse)
 async def decode_file(
     file: UploadFile = File(...),
-    nsym: int = Form(10)
+    nsym: Optional[int] = Form(None),
+    range_start: Optional[int] = Form(None),
+    range_length: Optional[int] = Form(None),
+    member: Optional[str] = Form(None)
 ):
     """
     Decode a DNA file back to the original data.
     
     Args:
-        file: The FASTA file containing DNA sequence
-        nsym: Number of Reed-Solomon error correction symbols
+        file: The FASTA file or .dnab container containing the DNA sequence
+        nsym: Number of Reed-Solomon error correction symbols (default: from the archive header, else 10)
+        range_start: First payload byte to decode; with range_length, only the
+            codewords covering that range are decoded
+        range_length: Number of payload bytes to decode from range_start (default: to the end)
+        member: Name of one member of a multi-file archive to extract; only
+            its codewords (and the directory's) are decoded. Without it, all
+            members of a multi-file archive are returned as one .zip file
     
     Returns:
         Decoded file information
@@ -164,46 +284,68 @@ async def decode_file(
         # Save uploaded file
         with open(temp_input, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
+        archive_header = read_archive_header(str(temp_input))
         
-        # Read DNA sequence, metadata, and original filename
-        dna_sequence, metadata, original_filename = read_fasta_with_metadata(str(temp_input))
-        
-        # Decode the data
-        decoded_data = decode_dna_sequence(dna_sequence, metadata, nsym=nsym)
+        if member is not None:
+            report = DecodeReport()
+            data = extract_member(str(temp_input), member, report=report)
+            temp_output.write_bytes(data)
+            info = {'filename': member.rsplit('/', 1)[-1], 'size': len(data), 'verified': True, 'report': report}
+        elif range_start is not None or range_length is not None:
+            # Random access: demap and correct only the codewords covering the range
+            report = DecodeReport()
+            start = range_start or 0
+            try:
+                data = decode_range(str(temp_input), start, range_length if range_length is not None else MAX_RANGE_LENGTH, nsym=nsym, report=report)
+            except ValueError as error:
+                # An invalid range or an archive without a range index
+                raise HTTPException(status_code=400, detail=f"Range decoding failed: {error}")
+            temp_output.write_bytes(data)
+            info = {'filename': archive_header.filename if archive_header else None, 'size': len(data), 'verified': False, 'report': report}
+        elif archive_header is not None and archive_header.directory_length:
+            # A multi-file archive has no single output file: bundle its members
+            report = DecodeReport()
+            with tempfile.TemporaryDirectory(dir=TEMP_DIR) as members_dir:
+                written = extract_archive(str(temp_input), members_dir, report=report)
+                with zipfile.ZipFile(temp_output, 'w', zipfile.ZIP_DEFLATED) as bundle:
+                    for path in written:
+                        bundle.write(path, Path(path).relative_to(members_dir).as_posix())
+            info = {'filename': f"{Path(file.filename).stem}.zip", 'size': temp_output.stat().st_size, 'verified': True, 'report': report}
+        else:
+            # Decode chunk by chunk, writing the output as each codeword is corrected
+            info = decode_file_streaming(str(temp_input), str(temp_output), nsym=nsym)
+        original_filename = info['filename']
         
         # Use original filename if available, otherwise detect file type
-        if original_filename:
-            # Extract extension from original filename
-            import os
-            _, detected_extension = os.path.splitext(original_filename)
-            if not detected_extension:
-                # Fallback to detection if no extension in original filename
-                detected_extension = detect_file_type_from_binary(decoded_data)
-        else:
-            # Fallback to detection if no original filename stored
-            detected_extension = detect_file_type_from_binary(decoded_data)
+        detected_extension = os.path.splitext(original_filename)[1] if original_filename else ''
+        if not detected_extension:
+            with open(temp_output, "rb") as f:
+                detected_extension = detect_file_type_from_binary(f.read(FILE_TYPE_SNIFF_SIZE))
         
         # Add extension to output file
-        temp_output = temp_output.with_suffix(detected_extension)
-        
-        # Write the decoded data
-        with open(temp_output, "wb") as f:
-            f.write(decoded_data)
+        temp_output = temp_output.rename(temp_output.with_suffix(detected_extension))
         
         # Clean up input file
         temp_input.unlink()
         
         return DecodeResponse(
             original_filename=original_filename or file.filename,  # Use original filename if available
-            file_size=len(decoded_data),
+            file_size=info['size'],
             detected_file_type=detected_extension,
-            output_file=str(temp_output)
+            output_file=str(temp_output),
+            verified=info['verified'],
+            codewords=info['report'].codewords,
+            corrected_codewords=info['report'].errors
         )
         
     except Exception as e:
         # Clean up on error
         if 'temp_input' in locals() and temp_input.exists():
             temp_input.unlink()
+        if 'temp_output' in locals() and temp_output.exists():
+            temp_output.unlink()
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=f"Decoding failed: {str(e)}")
 
 @app.get("/api/download/{file_path:path}")
@@ -0,0 +1,62 @@
+"""
+Benchmark for the Reed-Solomon stage.
+
+Encodes random payloads with every ECC backend, checks that the outputs are
+identical, and times syndrome computation, full decoding and the
+syndrome-checked fast path on the intact result.
+
+Usage:
+    python benchmarks/bench_ecc.py [--max-size BYTES] [--nsym N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from encoder.ecc import ECC_BACKENDS, RS_BLOCK_SIZE, RSCodec, rs_decode, rs_decode_blocks, rs_encode, rs_syndromes
+
+SIZES = [1 << 10, 10 << 10, 100 << 10, 1 << 20, 4 << 20]
+
+
+def timed(function, *args, **kwargs):
+    """Return (result, elapsed seconds) of one call."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reed-Solomon backend benchmark")
+    parser.add_argument('--max-size', type=int, default=SIZES[-1], help='Largest payload size in bytes (default: 4 MB)')
+    parser.add_argument('--nsym', type=int, default=10, help='Error correction symbols per codeword (default: 10)')
+    args = parser.parse_args()
+
+    print(f"reedsolo codec: {RSCodec.__module__}")
+    header = ''.join(f"{backend + ' enc':>14}" for backend in ECC_BACKENDS)
+    print(f"{'payload':>10}{header}{'syndromes':>14}{'full decode':>14}{'fast decode':>14}")
+    for size in SIZES:
+        if size > args.max_size:
+            break
+        data = os.urandom(size)
+        outputs, row = set(), ''
+        for backend in ECC_BACKENDS:
+            encoded, elapsed = timed(rs_encode, data, args.nsym, backend=backend)
+            outputs.add(encoded)
+            row += f"{elapsed:>14.4f}"
+        if len(outputs) != 1:
+            raise SystemExit(f"Backends disagree at {size} bytes")
+        full = len(encoded) - len(encoded) % RS_BLOCK_SIZE
+        codewords = np.frombuffer(encoded, dtype=np.uint8, count=full).reshape(-1, RS_BLOCK_SIZE)
+        _, syndrome_time = timed(rs_syndromes, codewords, args.nsym)
+        _, decode_time = timed(rs_decode, encoded, args.nsym)
+        _, fast_time = timed(rs_decode_blocks, encoded, args.nsym)
+        print(f"{size:>10}{row}{syndrome_time:>14.4f}{decode_time:>14.4f}{fast_time:>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark for the constraint-aware base-4 to DNA mapper.
+
+Maps random payloads of increasing size and prints the time per input byte,
+which should stay roughly constant if mapping scales linearly.
+
+Usage:
+    python benchmarks/bench_mapper.py [--max-size BYTES]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from encoder.mapper import ConstraintMapper
+
+SIZES = [1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20, 100 << 20]
+# Keep the low two bits of every random byte to get uniformly random digits
+DIGIT_TABLE = bytes(i & 3 for i in range(256))
+
+
+def bench(size: int) -> float:
+    """Map `size` random payload bytes (4 digits each) and return elapsed seconds."""
+    digits = os.urandom(size * 4).translate(DIGIT_TABLE)
+    start = time.perf_counter()
+    ConstraintMapper().map(digits)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mapper scaling benchmark")
+    parser.add_argument('--max-size', type=int, default=SIZES[-1], help='Largest payload size in bytes (default: 100 MB)')
+    args = parser.parse_args()
+
+    # Populate the shared transition table so the small sizes are not dominated by warm-up
+    bench(1 << 20)
+
+    print(f"{'payload':>12} {'seconds':>10} {'ns/byte':>10}")
+    for size in SIZES:
+        if size > args.max_size:
+            break
+        elapsed = bench(size)
+        print(f"{size:>12} {elapsed:>10.3f} {elapsed / size * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Strand dropout simulator for oligo pools with an outer erasure code.
+
+For every outer-code setting a random payload is encoded once, then strands
+are dropped independently at each dropout rate and the pool is decoded. The
+table shows the fraction of successful decodes per rate, the highest rate
+at which every trial succeeded, and the analytic rate at which the outer
+code alone still recovers the whole pool with the target probability (every
+group loses at most its parity strands). With Poisson sampling, a dropout
+rate ``r`` corresponds to a mean sequencing coverage of ``-ln(r)``, the
+last column.
+
+Usage:
+    python benchmarks/sim_dropout.py [--size BYTES] [--parity N ...] [--trials N]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from decoder.oligo import decode_oligos
+from encoder.oligo import OligoLayout, encode_oligos
+
+RATES = [0.001, 0.0025, 0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15]
+
+
+def group_sizes(layout: OligoLayout, data_strands: int) -> list:
+    """Strands (data and parity) in every outer-code group."""
+    return [min(layout.group_data, data_strands - first) + layout.parity_strands for first in range(0, data_strands, layout.group_data)]
+
+
+def recovery_probability(layout: OligoLayout, data_strands: int, dropout: float) -> float:
+    """Probability that the outer code rebuilds every lost strand of the pool."""
+    if not layout.parity_strands:
+        return (1 - dropout) ** data_strands
+    probability = 1.0
+    for size in group_sizes(layout, data_strands):
+        probability *= sum(math.comb(size, lost) * dropout ** lost * (1 - dropout) ** (size - lost) for lost in range(layout.parity_strands + 1))
+    return probability
+
+
+def tolerated_dropout(layout: OligoLayout, data_strands: int, target: float) -> float:
+    """Highest dropout rate at which ``recovery_probability`` reaches ``target`` (bisection)."""
+    low, high = 0.0, 1.0
+    for _ in range(40):
+        middle = (low + high) / 2
+        if recovery_probability(layout, data_strands, middle) >= target:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def trial(strands: list, layout: OligoLayout, data: bytes, dropout: float, rng: random.Random) -> bool:
+    """Drop strands at random and report whether the pool still decodes."""
+    kept = [strand for strand in strands if rng.random() >= dropout]
+    try:
+        return decode_oligos(kept, layout)[0] == data
+    except ValueError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Oligo pool dropout simulator")
+    parser.add_argument('--size', type=int, default=50 << 10, help='Payload size in bytes (default: 50 KB)')
+    parser.add_argument('--oligo-length', type=int, default=150, help='Strand length in nt (default: 150)')
+    parser.add_argument('--nsym', type=int, default=10, help='Inner Reed-Solomon symbols per codeword (default: 10)')
+    parser.add_argument('--parity', type=int, nargs='+', default=[0, 5, 10, 20, 40], help='Outer-code parity strands per group to compare')
+    parser.add_argument('--group', type=int, default=None, help='Data strands per outer-code group (default: 255 minus the parity strands)')
+    parser.add_argument('--trials', type=int, default=20, help='Trials per dropout rate (default: 20)')
+    parser.add_argument('--target', type=float, default=0.99, help='Recovery probability for the analytic column (default: 0.99)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    data = rng.randbytes(args.size)
+    print(f"payload {args.size} bytes, {args.trials} trials per rate, success fraction per dropout rate")
+    rates = ''.join(f"{rate:>8.2%}" for rate in RATES)
+    print(f"{'parity':>7}{'strands':>9}{'overhead':>10}{rates}{'all ok':>9}{'outer@' + format(args.target, '.0%'):>11}{'coverage':>10}")
+    for parity in args.parity:
+        layout = OligoLayout(args.oligo_length, parity_strands=parity, group_strands=args.group if parity else None)
+        pool = encode_oligos(data, args.nsym, layout)
+        row, tolerated, failed = '', 0.0, False
+        for rate in RATES:
+            successes = sum(trial(pool.strands, layout, data, rate, rng) for _ in range(args.trials))
+            row += f"{successes / args.trials:>8.2f}"
+            failed = failed or successes < args.trials
+            if not failed:
+                tolerated = rate
+        analytic = tolerated_dropout(layout, pool.data_strands, args.target)
+        coverage = f"{-math.log(analytic):.2f}x" if analytic > 0 else '-'
+        overhead = len(pool.strands) / pool.data_strands - 1
+        print(f"{parity:>7}{len(pool.strands):>9}{overhead:>10.1%}{row}{tolerated:>9.2%}{analytic:>11.2%}{coverage:>10}")
+
+
+if __name__ == "__main__":
+    main()
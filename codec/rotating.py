@@ -0,0 +1,119 @@
+"""Shared definitions of the rotating ternary code.
+
+The group geometry, the conversion between base-4 digits and trits and the
+base code table are needed to encode (``encoder.rotating``) as well as to
+decode (``decoder``, ``decoder.oligo``, ``decoder.random_access``), so they
+live here rather than in either side. See ``encoder.rotating`` for the code
+itself.
+"""
+
+import numpy as np
+
+GROUP_DIGITS = 32
+GROUP_TRITS = 41
+# Base code (0-3) -> ASCII base, applied with bytes.translate
+CODE_TABLE = bytes(b'ACGT'[i % 4] for i in range(256))
+
+
+def tail_trits(digit_count: int) -> int:
+    """Number of trits used for a trailing group of digit_count base-4 digits."""
+    trits = 0
+    while 3 ** trits < 4 ** digit_count:
+        trits += 1
+    return trits
+
+
+def base4_to_trits(base4_digits) -> np.ndarray:
+    """Regroup base-4 digits into trits, 32 digits -> 41 trits per full group.
+
+    Args:
+        base4_digits: Sequence or uint8 array of base-4 digits (0-3).
+
+    Returns:
+        np.ndarray: uint8 array of trits (0-2).
+    """
+    digits = np.asarray(base4_digits, dtype=np.uint8)
+    full = len(digits) // GROUP_DIGITS
+    groups = digits[:full * GROUP_DIGITS].reshape(full, GROUP_DIGITS).astype(np.uint64)
+    values = np.zeros(full, dtype=np.uint64)
+    for column in range(GROUP_DIGITS):
+        values = (values << np.uint64(2)) | groups[:, column]
+    trits = np.empty((full, GROUP_TRITS), dtype=np.uint8)
+    for column in range(GROUP_TRITS - 1, -1, -1):
+        trits[:, column] = values % np.uint64(3)
+        values //= np.uint64(3)
+
+    # Trailing partial group, converted with Python integers
+    tail = digits[full * GROUP_DIGITS:].tolist()
+    value = 0
+    for digit in tail:
+        value = (value << 2) | digit
+    tail_out = []
+    for _ in range(tail_trits(len(tail))):
+        value, trit = divmod(value, 3)
+        tail_out.append(trit)
+    return np.concatenate((trits.ravel(), np.array(tail_out[::-1], dtype=np.uint8)))
+
+
+def rotating_length(digit_count: int) -> int:
+    """Number of bases the rotating code uses for digit_count base-4 digits."""
+    full, remainder = divmod(digit_count, GROUP_DIGITS)
+    return full * GROUP_TRITS + tail_trits(remainder)
+
+
+def _pack_rows(rows: np.ndarray, radix: int) -> np.ndarray:
+    values = np.zeros(len(rows), dtype=np.uint64)
+    for column in rows.T:
+        values = values * np.uint64(radix) + column
+    return values
+
+
+def _unpack_rows(values: np.ndarray, radix: int, count: int) -> np.ndarray:
+    rows = np.empty((len(values), count), dtype=np.uint8)
+    values = values.copy()
+    for column in range(count - 1, -1, -1):
+        rows[:, column] = values % np.uint64(radix)
+        values //= np.uint64(radix)
+    return rows
+
+
+def base4_rows_to_trits(digits: np.ndarray) -> np.ndarray:
+    """Convert equally long rows of base-4 digits to trits, one row at a time in bulk.
+
+    Each row is converted exactly like ``base4_to_trits`` converts a whole
+    sequence, so every row can be decoded on its own.
+
+    Args:
+        digits (np.ndarray): uint8 array of shape (rows, digits per row).
+
+    Returns:
+        np.ndarray: uint8 array of shape (rows, ``rotating_length(digits per row)``).
+    """
+    rows, count = digits.shape
+    full, remainder = divmod(count, GROUP_DIGITS)
+    groups = digits[:, :full * GROUP_DIGITS].reshape(rows * full, GROUP_DIGITS).astype(np.uint64)
+    parts = [_unpack_rows(_pack_rows(groups, 4), 3, GROUP_TRITS).reshape(rows, full * GROUP_TRITS)]
+    if remainder:
+        tail = digits[:, full * GROUP_DIGITS:].astype(np.uint64)
+        parts.append(_unpack_rows(_pack_rows(tail, 4), 3, tail_trits(remainder)))
+    return np.concatenate(parts, axis=1)
+
+
+def trits_rows_to_base4(trits: np.ndarray, digit_count: int) -> np.ndarray:
+    """Inverse of ``base4_rows_to_trits``.
+
+    Args:
+        trits (np.ndarray): uint8 array of shape (rows, ``rotating_length(digit_count)``).
+        digit_count (int): Digits per row.
+
+    Returns:
+        np.ndarray: uint8 array of shape (rows, digit_count).
+    """
+    rows = len(trits)
+    full, remainder = divmod(digit_count, GROUP_DIGITS)
+    groups = trits[:, :full * GROUP_TRITS].reshape(rows * full, GROUP_TRITS).astype(np.uint64)
+    parts = [_unpack_rows(_pack_rows(groups, 3), 4, GROUP_DIGITS).reshape(rows, full * GROUP_DIGITS)]
+    if remainder:
+        tail = trits[:, full * GROUP_TRITS:].astype(np.uint64)
+        parts.append(_unpack_rows(_pack_rows(tail, 3), 4, remainder))
+    return np.concatenate(parts, axis=1)
@@ -1,5 +1,65 @@
 from typing import List
-from reedsolo import RSCodec
+
+import numpy as np
+
+from codec.rotating import GROUP_DIGITS, GROUP_TRITS, tail_trits
+from decoder.parallel import remove_reed_solomon_parallel
+from encoder.ecc import DecodeReport, rs_decode_blocks
+
+
+# 256-entry ASCII -> base index table; anything but A/C/G/T maps to INVALID_BASE
+INVALID_BASE = 255
+BASE_INDEX = np.full(256, INVALID_BASE, dtype=np.uint8)
+BASE_INDEX[np.frombuffer(b'ACGT', dtype=np.uint8)] = np.arange(4, dtype=np.uint8)
+
+
+class InvalidBaseError(ValueError):
+    """Raised when a DNA sequence contains characters other than A, C, G and T.
+
+    Attributes:
+        positions (np.ndarray): Indices of every invalid character in the sequence.
+    """
+
+    def __init__(self, positions: np.ndarray, dna_sequence=None):
+        self.positions = positions
+        first = positions[0]
+        found = f" {dna_sequence[first:first + 1]!r}" if dna_sequence is not None else ""
+        super().__init__(
+            f"Invalid DNA base{found} found at position {first} "
+            f"({len(positions)} invalid position(s) in total)"
+        )
+
+
+def dna_to_base4_array(dna_sequence, metadata=None) -> np.ndarray:
+    """Convert a DNA sequence to base-4 digits, optionally removing metadata offsets.
+
+    Bases are translated with a 256-entry lookup table over the ASCII bytes and
+    offsets are subtracted modulo 4 as one array operation. As with the list
+    based decoder, the result is truncated to the shorter of sequence and
+    metadata when offsets are given.
+
+    Args:
+        dna_sequence: DNA sequence as str or any ASCII bytes-like object.
+        metadata: Optional offsets (list or array) used for each digit during mapping.
+
+    Returns:
+        np.ndarray: uint8 array of base-4 digits (0-3).
+
+    Raises:
+        InvalidBaseError: If the sequence contains invalid bases; all positions are reported.
+    """
+    raw = dna_sequence.encode('ascii', errors='replace') if isinstance(dna_sequence, str) else dna_sequence
+    digits = BASE_INDEX[np.frombuffer(raw, dtype=np.uint8)]
+    invalid = np.flatnonzero(digits == INVALID_BASE)
+    if invalid.size:
+        raise InvalidBaseError(invalid, dna_sequence)
+    if metadata is not None:
+        offsets = np.asarray(metadata, dtype=np.uint8)
+        length = min(len(digits), len(offsets))
+        digits = digits[:length]
+        digits -= offsets[:length]
+        digits &= 3
+    return digits
 
 
 def dna_to_base4(dna_sequence: str) -> List[int]:
@@ -14,11 +74,33 @@ def dna_to_base4(dna_sequence: str) -> List[int]:
     Raises:
         ValueError: If the DNA sequence contains invalid bases.
     """
-    mapping = {'A': 0, 'C': 1, 'G': 2, 'T': 3}
-    try:
-        return [mapping[base] for base in dna_sequence]
-    except KeyError as e:
-        raise ValueError(f"Invalid DNA base found: {e}")
+    return dna_to_base4_array(dna_sequence).tolist()
+
+
+def base4_array_to_bytes(base4_digits) -> np.ndarray:
+    """Convert base-4 digits to bytes using vectorized NumPy shifts.
+
+    Every four digits form one byte, most significant pair first; a trailing
+    partial byte is dropped.
+
+    Args:
+        base4_digits: Sequence or array of base-4 digits (0-3); uint8 arrays are used without copying.
+
+    Returns:
+        np.ndarray: uint8 array of decoded bytes.
+
+    Raises:
+        ValueError: If the digits contain values outside 0-3.
+    """
+    digits = np.asarray(base4_digits)
+    invalid = np.flatnonzero((digits < 0) | (digits > 3)) if digits.dtype.kind == 'i' else np.flatnonzero(digits > 3)
+    if invalid.size:
+        raise ValueError(f"Invalid base4 digit: {digits[invalid[0]]}. Must be 0-3.")
+    digits = digits[:len(digits) - len(digits) % 4].astype(np.uint8, copy=False)
+    packed = digits[0::4] << 6
+    for lane, shift in ((1, 4), (2, 2), (3, 0)):
+        packed |= digits[lane::4] << shift
+    return packed
 
 
 def base4_to_binary(base4_digits: List[int]) -> bytes:
@@ -33,33 +115,30 @@ def base4_to_binary(base4_digits: List[int]) -> bytes:
     Raises:
         ValueError: If the base4_digits contain invalid digits.
     """
-    # Validate input
-    for digit in base4_digits:
-        if not 0 <= digit <= 3:
-            raise ValueError(f"Invalid base4 digit: {digit}. Must be 0-3.")
-    
-    # Convert base-4 digits to a bit string
-    bit_str = ''.join(f'{d:02b}' for d in base4_digits)
-    # Pad to a multiple of 8 bits
-    if len(bit_str) % 8 != 0:
-        bit_str = bit_str[:-(len(bit_str) % 8)]
-    # Convert to bytes
-    return bytes(int(bit_str[i:i+8], 2) for i in range(0, len(bit_str), 8))
-
-
-def remove_reed_solomon(data: bytes, nsym: int = 10) -> bytes:
+    return base4_array_to_bytes(base4_digits).tobytes()
+
+
+def remove_reed_solomon(data: bytes, nsym: int = 10, report: DecodeReport = None, workers: int = 1) -> bytes:
     """Remove Reed-Solomon error correction symbols from the input data.
 
+    Codewords are checked for errors in bulk first; only damaged ones are
+    run through the full decoder.
+
     Args:
         data (bytes): Encoded data with ECC.
         nsym (int): Number of Reed-Solomon symbols used during encoding.
+        report (DecodeReport, optional): Filled with the per-codeword error counts.
+        workers (int, optional): Worker processes for large inputs (None: CPU count; 1: serial).
 
     Returns:
         bytes: Decoded data with ECC removed.
+
+    Raises:
+        UncorrectableCodewordError: If a codeword has too many errors.
     """
-    rsc = RSCodec(nsym)
-    decoded, _, _ = rsc.decode(data)
-    return decoded
+    if workers != 1:
+        return remove_reed_solomon_parallel(data, nsym=nsym, workers=workers, report=report)
+    return rs_decode_blocks(data, nsym=nsym, report=report)
 
 
 def dna_and_metadata_to_base4(dna_sequence: str, metadata: list[int]) -> list[int]:
@@ -72,27 +151,144 @@ def dna_and_metadata_to_base4(dna_sequence: str, metadata: list[int]) -> list[in
     Returns:
         list[int]: Original base-4 digits.
     """
-    BASES = ['A', 'C', 'G', 'T']
-    base4_digits = []
-    for i, (base, offset) in enumerate(zip(dna_sequence, metadata)):
-        base_index = BASES.index(base)
-        digit = (base_index - offset) % 4
-        base4_digits.append(digit)
-    return base4_digits
+    return dna_to_base4_array(dna_sequence, metadata).tolist()
+
+
+def decode_patches(data: bytes) -> list[tuple[int, str]]:
+    """Decode a varint patch list (see ``encoder.patches.encode_patches``).
+
+    Args:
+        data (bytes): Serialized patch list.
+
+    Returns:
+        list[tuple[int, str]]: Patches in ascending position order.
+
+    Raises:
+        ValueError: If the patch list is truncated.
+    """
+    patches = []
+    position = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte & 0x80:
+            continue
+        position += value >> 2
+        patches.append((position, 'ACGT'[value & 3]))
+        value = shift = 0
+    if shift:
+        raise ValueError("Truncated patch record")
+    return patches
+
 
+def dna_to_patches(patch_dna: str) -> list[tuple[int, str]]:
+    """Decode a directly mapped patch record into (position, original base) pairs.
 
-def decode_dna_sequence(dna_sequence: str, metadata: list[int], nsym: int = 10) -> bytes:
+    Args:
+        patch_dna (str): DNA written for the patch list (2 bits/nt).
+
+    Returns:
+        list[tuple[int, str]]: Patches in ascending position order.
+
+    Raises:
+        ValueError: If the patch record is truncated.
+    """
+    return decode_patches(base4_array_to_bytes(dna_to_base4_array(patch_dna)).tobytes())
+
+
+def apply_patches(dna_sequence: str, patches: list[tuple[int, str]]) -> str:
+    """Restore the original bases recorded in a patch list.
+
+    Args:
+        dna_sequence (str): Repaired DNA sequence.
+        patches (list[tuple[int, str]]): (position, original base) substitutions.
+
+    Returns:
+        str: DNA sequence as it was before repair.
+
+    Raises:
+        ValueError: If a patch position lies outside the sequence.
+    """
+    if not patches:
+        return dna_sequence
+    restored = bytearray(dna_sequence, 'ascii')
+    for position, base in patches:
+        if not 0 <= position < len(restored):
+            raise ValueError(f"Patch position {position} outside sequence of length {len(restored)}")
+        restored[position] = ord(base)
+    return restored.decode('ascii')
+
+
+def rotating_dna_to_base4_array(dna_sequence, previous: int = 0) -> np.ndarray:
+    """Decode a rotating-code DNA sequence back to base-4 digits.
+
+    Each base encodes the trit ``(base - previous - 1) % 4``; the first base
+    is read relative to an implicit leading 'A'. Trits are regrouped into
+    digits (41 trits -> 32 digits per full group).
+
+    Args:
+        dna_sequence: DNA sequence as str or ASCII bytes.
+        previous (int): Code (0-3) of the base preceding the sequence, for
+            decoding a chunk of whole 41-base groups taken from a longer sequence.
+
+    Returns:
+        np.ndarray: uint8 array of base-4 digits (0-3).
+
+    Raises:
+        InvalidBaseError: If the sequence contains invalid bases.
+        ValueError: If a base repeats its predecessor or the length is not a valid trit count.
+    """
+    codes = dna_to_base4_array(dna_sequence).astype(np.int16)
+    trits = (codes - np.concatenate(([previous], codes[:-1])) - 1) % 4
+    repeated = np.flatnonzero(trits == 3)
+    if repeated.size:
+        raise ValueError(
+            f"Invalid rotating code: base repeats its predecessor at position {repeated[0]} "
+            f"({len(repeated)} position(s) in total)"
+        )
+    full, remainder = divmod(len(trits), GROUP_TRITS)
+    tail_digits = next((q for q in range(GROUP_DIGITS) if tail_trits(q) == remainder), None)
+    if tail_digits is None:
+        raise ValueError(f"Invalid rotating code length: {len(trits)} bases")
+
+    groups = trits[:full * GROUP_TRITS].reshape(full, GROUP_TRITS).astype(np.uint64)
+    values = np.zeros(full, dtype=np.uint64)
+    for column in range(GROUP_TRITS):
+        values = values * np.uint64(3) + groups[:, column]
+    digits = np.empty((full, GROUP_DIGITS), dtype=np.uint8)
+    for column in range(GROUP_DIGITS - 1, -1, -1):
+        digits[:, column] = values & np.uint64(3)
+        values >>= np.uint64(2)
+
+    # Trailing partial group, converted with Python integers
+    value = 0
+    for trit in trits[full * GROUP_TRITS:].tolist():
+        value = value * 3 + trit
+    tail = [(value >> (2 * shift)) & 3 for shift in range(tail_digits - 1, -1, -1)]
+    return np.concatenate((digits.ravel(), np.array(tail, dtype=np.uint8)))
+
+
+def decode_dna_sequence(dna_sequence: str, metadata: list[int], nsym: int = 10, patches: list[tuple[int, str]] = None, codec: str = 'mapped', report: DecodeReport = None, workers: int = 1) -> bytes:
     """Decode a DNA sequence (with metadata) back to the original binary data, reversing the encoding pipeline.
 
     Args:
         dna_sequence (str): DNA sequence string (A, C, G, T).
-        metadata (list[int]): Metadata bitstream (offsets used for each digit).
+        metadata (list[int]): Metadata bitstream (offsets used for each digit); empty or None for directly mapped sequences.
         nsym (int): Number of Reed-Solomon error correction symbols used during encoding.
+        patches (list[tuple[int, str]], optional): Patch list of a sequence encoded with the 'patch' codec.
+        codec (str): Codec recorded in the file; 'rotating' sequences are decoded without metadata.
+        report (DecodeReport, optional): Filled with the Reed-Solomon error counts.
+        workers (int, optional): Worker processes for Reed-Solomon decoding (None: CPU count; 1: serial).
 
     Returns:
         bytes: The original binary data (payload only, ECC removed).
     """
-    base4_digits = dna_and_metadata_to_base4(dna_sequence, metadata)
-    encoded_bytes = base4_to_binary(base4_digits)
-    decoded_bytes = remove_reed_solomon(encoded_bytes, nsym=nsym)
-    return decoded_bytes 
\ No newline at end of file
+    if codec == 'rotating':
+        base4_digits = rotating_dna_to_base4_array(dna_sequence)
+    else:
+        if patches:
+            dna_sequence = apply_patches(dna_sequence, patches)
+        base4_digits = dna_to_base4_array(dna_sequence, metadata or None)
+    encoded_bytes = base4_array_to_bytes(base4_digits)
+    decoded_bytes = remove_reed_solomon(encoded_bytes, nsym=nsym, report=report, workers=workers)
+    return decoded_bytes
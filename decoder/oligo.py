@@ -0,0 +1,276 @@
+"""Decoding of addressed oligo pools (see ``encoder.oligo``).
+
+Strands may arrive in any order and any multiplicity. Each strand is
+decoded on its own: primers are stripped, the rotating code is reversed,
+the slice is unscrambled and its CRC checked. Strands that fail any step
+are rejected, the first valid copy of every address is kept, and the
+slices are put back in address order. With an outer code, missing strands
+are rebuilt from the rest of their group as erasures; whatever is still
+missing is zero-filled and left to the inner Reed-Solomon code.
+"""
+
+import struct
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from codec.rotating import rotating_length, trits_rows_to_base4
+from decoder import BASE_INDEX, INVALID_BASE
+from encoder.compression import decompress
+from encoder.ecc import DecodeReport, rs_correct_erasures, rs_decode_blocks, rs_syndromes
+from encoder.header import ArchiveHeader
+from encoder.oligo import (
+    CHECK_DIGITS,
+    HEADER_NSYM,
+    VARIANT_DIGITS,
+    OligoLayout,
+    address_keystream,
+    keystream,
+    strand_checks,
+)
+
+# Strands decoded per array operation
+DECODE_BATCH = 65536
+
+
+@dataclass
+class PoolReport:
+    """Statistics of an oligo pool decode.
+
+    Attributes:
+        strands (int): Strands read.
+        valid (int): Strands that decoded and passed their CRC.
+        duplicates (int): Valid strands whose address had been seen already.
+        rejected (int): Strands with a wrong length, invalid bases or a failed CRC.
+        missing (list[int]): Addresses with no valid strand.
+        recovered (list[int]): Missing addresses rebuilt by the outer code.
+        ecc (DecodeReport): Reed-Solomon statistics of the payload.
+    """
+    strands: int = 0
+    valid: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    missing: list = field(default_factory=list)
+    recovered: list = field(default_factory=list)
+    ecc: DecodeReport = field(default_factory=DecodeReport)
+
+
+def _digits_int(digits: np.ndarray) -> np.ndarray:
+    values = np.zeros(len(digits), dtype=np.uint64)
+    for column in digits.T:
+        values = (values << np.uint64(2)) | column.astype(np.uint64)
+    return values
+
+
+def _decode_batch(strands: list, layout: OligoLayout) -> tuple:
+    """Return (addresses, slices) of the valid strands of a batch, plus the rejected count."""
+    width = layout.strand_length
+    usable = [strand for strand in strands if len(strand) == width]
+    rejected = len(strands) - len(usable)
+    if not usable:
+        return np.empty(0, dtype=np.uint64), np.empty((0, layout.slice_size), dtype=np.uint8), rejected
+    joined = ''.join(usable).encode('ascii', 'replace') if isinstance(usable[0], str) else b''.join(usable)
+    codes = BASE_INDEX[np.frombuffer(joined, dtype=np.uint8)].reshape(len(usable), width)
+    start = len(layout.forward_primer)
+    body = codes[:, start:start + rotating_length(layout.body_digits)].astype(np.int16)
+    previous = np.concatenate([np.full((len(body), 1), layout.start_code, dtype=np.int16), body[:, :-1]], axis=1)
+    trits = (body - previous - 1) % 4
+    ok = ~((codes == INVALID_BASE).any(axis=1) | (trits == 3).any(axis=1))
+
+    digits = trits_rows_to_base4(np.where(ok[:, None], trits, 0).astype(np.uint8), layout.body_digits)
+    variants = _digits_int(digits[:, :VARIANT_DIGITS])
+    address_end = VARIANT_DIGITS + layout.address_digits
+    addresses = _digits_int((digits[:, VARIANT_DIGITS:address_end] - address_keystream(layout, variants)) & 3)
+    scrambled = digits[:, address_end:]
+    plain = (scrambled - keystream(addresses, variants, scrambled.shape[1])) & 3
+    data = plain[:, :-CHECK_DIGITS].reshape(len(plain), -1, 4)
+    slices = ((data[:, :, 0] << 6) | (data[:, :, 1] << 4) | (data[:, :, 2] << 2) | data[:, :, 3]).astype(np.uint8)
+    checks = _digits_int(plain[:, -CHECK_DIGITS:])
+    ok &= strand_checks(addresses, variants, slices) == checks
+    return addresses[ok], slices[ok], rejected + int(np.count_nonzero(~ok))
+
+
+def collect_slices(strands, layout: OligoLayout, report: PoolReport = None) -> dict:
+    """Decode strands into a mapping of address -> slice bytes.
+
+    Args:
+        strands: Iterable of strands (str or ASCII bytes), in any order.
+        layout (OligoLayout): Layout used when encoding.
+        report (PoolReport, optional): Updated with strand statistics.
+
+    Returns:
+        dict[int, bytes]: The first valid slice seen for every address.
+    """
+    report = report if report is not None else PoolReport()
+    slices = {}
+    batch = []
+
+    def flush():
+        addresses, rows, rejected = _decode_batch(batch, layout)
+        report.rejected += rejected
+        report.valid += len(addresses)
+        for address, row in zip(addresses.tolist(), rows):
+            if address in slices:
+                report.duplicates += 1
+            else:
+                slices[address] = row.tobytes()
+        batch.clear()
+
+    for strand in strands:
+        report.strands += 1
+        batch.append(strand.strip())
+        if len(batch) == DECODE_BATCH:
+            flush()
+    if batch:
+        flush()
+    return slices
+
+
+def _repair_group(slices: dict, layout: OligoLayout, first: int, count: int):
+    """Rebuild the missing strands of the group of data slices ``first`` to ``first + count``.
+
+    Returns the rebuilt addresses, or None if the group has too many missing
+    strands or the received strands are inconsistent with ``count``.
+    """
+    parity = layout.parity_strands
+    base = first // layout.group_data * layout.group_span
+    # Codeword order: data strands reversed, then parity (see encoder.oligo)
+    addresses = list(range(base + parity + count - 1, base + parity - 1, -1)) + list(range(base, base + parity))
+    erased = [position for position, address in enumerate(addresses) if address not in slices]
+    if not erased:
+        return []
+    if len(erased) > parity:
+        return None
+    codewords = np.zeros((layout.slice_size, len(addresses)), dtype=np.uint8)
+    for position, address in enumerate(addresses):
+        if address in slices:
+            codewords[:, position] = np.frombuffer(slices[address], dtype=np.uint8)
+    filled = rs_correct_erasures(codewords, erased, parity)
+    # Spare parity (fewer erasures than parity strands) must check out
+    if len(erased) < parity and rs_syndromes(filled, parity).any():
+        return None
+    for position in erased:
+        slices[addresses[position]] = filled[:, position].tobytes()
+    return [addresses[position] for position in erased]
+
+
+def recover_strands(slices: dict, layout: OligoLayout, data_strands: int) -> list:
+    """Rebuild missing strands from the outer erasure code, in place.
+
+    Every group with at most ``layout.parity_strands`` missing strands is
+    repaired; groups with more are left alone.
+
+    Args:
+        slices (dict[int, bytes]): Slices by address, as from ``collect_slices``.
+        layout (OligoLayout): Layout used when encoding.
+        data_strands (int): Number of data strands in the pool.
+
+    Returns:
+        list[int]: The rebuilt addresses.
+    """
+    recovered = []
+    if not layout.parity_strands:
+        return recovered
+    for first in range(0, data_strands, layout.group_data):
+        recovered.extend(_repair_group(slices, layout, first, min(layout.group_data, data_strands - first)) or [])
+    return sorted(recovered)
+
+
+def _recover_first_group(slices: dict, layout: OligoLayout) -> dict:
+    """Repair a copy of the first group before the pool size is known.
+
+    The first group is full unless it is the only one, in which case it ends
+    somewhere after its last received strand; every such length is tried.
+    """
+    span = layout.group_span
+    seen = [address - layout.parity_strands for address in slices if layout.parity_strands <= address < span]
+    if any(address >= span for address in slices):
+        counts = [layout.group_data]
+    else:
+        counts = range(max(seen, default=-1) + 1, layout.group_data + 1)
+    for count in counts:
+        repaired = dict(slices)
+        if count and _repair_group(repaired, layout, 0, count) is not None:
+            return repaired
+    return slices
+
+
+def infer_layout(strands: list, address_digits: int = None, forward_primer: str = '', reverse_primer: str = '', parity_strands: int = 0, group_strands: int = None) -> OligoLayout:
+    """Build the layout of a pool from its most common strand length."""
+    from encoder.oligo import DEFAULT_ADDRESS_DIGITS
+    length = Counter(len(strand) for strand in strands).most_common(1)[0][0] if strands else 0
+    address_digits = DEFAULT_ADDRESS_DIGITS if address_digits is None else address_digits
+    return OligoLayout(length, address_digits, forward_primer, reverse_primer, parity_strands, group_strands)
+
+
+def decode_oligos(strands, layout: OligoLayout = None, report: PoolReport = None, forward_primer: str = '', reverse_primer: str = '') -> tuple:
+    """Reassemble and decode an oligo pool.
+
+    Args:
+        strands: Iterable of strands (str or ASCII bytes), in any order, duplicates allowed.
+        layout (OligoLayout, optional): Layout used when encoding, including its
+            outer code; inferred from the most common strand length and the
+            given primers (without an outer code) when omitted.
+        report (PoolReport, optional): Filled with strand and Reed-Solomon statistics.
+        forward_primer (str): Forward primer, used when the layout is inferred.
+        reverse_primer (str): Reverse primer, used when the layout is inferred.
+
+    Returns:
+        tuple[bytes, ArchiveHeader]: The payload (decompressed if the header
+        records a pre-compression) and the archive header.
+
+    Raises:
+        ValueError: If the header strands are missing or the payload cannot be
+            corrected (the message lists the missing strands).
+    """
+    report = report if report is not None else PoolReport()
+    if layout is None:
+        strands = list(strands)
+        layout = infer_layout(strands, None, forward_primer, reverse_primer)
+    slices = collect_slices(strands, layout, report)
+    received = set(slices)
+    size = layout.slice_size
+
+    def read(source: dict, start: int, length: int) -> bytes:
+        first, last = start // size, -(-(start + length) // size)
+        data = b''.join(source.get(layout.data_address(index), bytes(size)) for index in range(first, last))
+        return data[start - first * size:start - first * size + length]
+
+    # The pool size is only known from the header, which may itself need the outer code
+    header_slices = slices
+
+    def require(end: int) -> None:
+        nonlocal header_slices
+        needed = [layout.data_address(index) for index in range(-(-end // size))]
+        if layout.parity_strands and header_slices is slices and any(address not in slices for address in needed):
+            header_slices = _recover_first_group(slices, layout)
+        if any(address not in header_slices for address in needed):
+            raise ValueError("Oligo pool is missing the header strand(s)")
+
+    require(2)
+    coded_length = struct.unpack('<H', read(header_slices, 0, 2))[0]
+    header_end = 2 + coded_length
+    require(header_end)
+    header = ArchiveHeader.from_bytes(rs_decode_blocks(read(header_slices, 2, coded_length), HEADER_NSYM))
+
+    message_size = header.rs_block_size - header.nsym
+    payload_length = header.payload_length or 0
+    coded = payload_length + header.nsym * -(-payload_length // message_size)
+    data_strands = -(-(header_end + coded) // size)
+    total = layout.address_count(data_strands)
+    recover_strands(slices, layout, data_strands)
+    report.missing = [address for address in range(total) if address not in received]
+    report.recovered = [address for address in report.missing if address in slices]
+    try:
+        payload = rs_decode_blocks(read(slices, header_end, coded), header.nsym, header.rs_block_size, report=report.ecc)
+    except ValueError as error:
+        lost = [address for address in report.missing if address not in slices]
+        if lost:
+            raise ValueError(f"{error} ({len(lost)} of {total} strands missing and not recoverable, first at address {lost[0]})") from error
+        raise
+    header.verify(payload)
+    if header.compression:
+        payload = decompress(payload, header.compression)
+    return payload, header
+
@@ -0,0 +1,106 @@
+"""Parallel Reed-Solomon decoding across CPU cores.
+
+Codewords are independent once the DNA has been turned back into bytes, so
+the encoded stream is cut into shards of whole codewords and each shard is
+decoded by a worker process. The encoded bytes and the decoded payload live
+in two shared-memory buffers: workers read their codeword range from the
+first and write their payload straight into its final position in the
+second, so no codeword data is pickled between processes. Small inputs are
+decoded serially, where starting a pool would cost more than it saves.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from encoder.ecc import (
+    RS_BLOCK_SIZE,
+    DecodeReport,
+    ReedSolomonError,
+    ShardReport,
+    UncorrectableCodewordError,
+    rs_decode_blocks,
+)
+
+# Encoded inputs smaller than this are decoded serially
+PARALLEL_DECODE_THRESHOLD = 1 << 22
+# Codewords per shard (about 1 MB of encoded data for 255-byte codewords)
+SHARD_CODEWORDS = 4096
+
+
+def _decode_shard(job: tuple) -> tuple:
+    """Decode one codeword range between shared buffers (runs in a worker process)."""
+    source_name, target_name, shard, first, last, length, nsym, nsize = job
+    source = shared_memory.SharedMemory(name=source_name)
+    target = shared_memory.SharedMemory(name=target_name)
+    try:
+        message_size = nsize - nsym
+        report = DecodeReport()
+        error = None
+        try:
+            decoded = rs_decode_blocks(bytes(source.buf[first * nsize:min(last * nsize, length)]), nsym, nsize, first_index=first, report=report)
+        except UncorrectableCodewordError as failure:
+            decoded, error = failure.decoded, (failure.index, str(failure.__cause__))
+        offset = first * message_size
+        target.buf[offset:offset + len(decoded)] = decoded
+        return ShardReport(shard, first, last - first, report.errors, error), len(decoded)
+    finally:
+        source.close()
+        target.close()
+
+
+def remove_reed_solomon_parallel(data: bytes, nsym: int = 10, nsize: int = RS_BLOCK_SIZE, workers: int = None, report: DecodeReport = None, shard_codewords: int = SHARD_CODEWORDS) -> bytes:
+    """Remove Reed-Solomon error correction symbols using a process pool.
+
+    Args:
+        data (bytes): Encoded data with ECC.
+        nsym (int): Number of Reed-Solomon symbols used during encoding.
+        nsize (int): Codeword length in bytes.
+        workers (int, optional): Number of worker processes (default: CPU count).
+        report (DecodeReport, optional): Filled with the per-codeword error counts
+            and, for parallel decodes, one ``ShardReport`` per shard.
+        shard_codewords (int): Codewords per shard.
+
+    Returns:
+        bytes: Decoded data with ECC removed.
+
+    Raises:
+        UncorrectableCodewordError: For the first codeword with too many errors;
+            every failing shard is listed in ``report.shards``.
+    """
+    workers = workers or os.cpu_count() or 1
+    count = -(-len(data) // nsize)
+    if workers == 1 or len(data) < PARALLEL_DECODE_THRESHOLD or count <= shard_codewords:
+        return rs_decode_blocks(data, nsym, nsize, report=report)
+
+    message_size = nsize - nsym
+    tail = len(data) - (count - 1) * nsize
+    payload_length = (count - 1) * message_size + tail - nsym
+    source = shared_memory.SharedMemory(create=True, size=len(data))
+    target = shared_memory.SharedMemory(create=True, size=max(1, payload_length))
+    try:
+        source.buf[:len(data)] = data
+        jobs = [
+            (source.name, target.name, shard, first, min(first + shard_codewords, count), len(data), nsym, nsize)
+            for shard, first in enumerate(range(0, count, shard_codewords))
+        ]
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_decode_shard, jobs))
+
+        if report is not None:
+            for shard_report, _ in results:
+                report.codewords += shard_report.codewords
+                report.errors.update(shard_report.errors)
+                report.shards.append(shard_report)
+        failed = next(((shard_report, written) for shard_report, written in results if shard_report.error), None)
+        if failed is not None:
+            shard_report, written = failed
+            index, message = shard_report.error
+            decoded = bytes(target.buf[:shard_report.first_codeword * message_size + written])
+            raise UncorrectableCodewordError(index, nsize, decoded, ReedSolomonError(message))
+        return bytes(target.buf[:payload_length])
+    finally:
+        source.close()
+        source.unlink()
+        target.close()
+        target.unlink()
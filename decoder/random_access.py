@@ -0,0 +1,173 @@
+"""Random-access decoding of a byte range of an encoded archive.
+
+Every stage of the pipeline has a fixed rate, so the archive header alone
+is a complete block index: payload byte ``p`` lies in Reed-Solomon codeword
+``p // (rs_block_size - nsym)``, each encoded byte becomes four base-4
+digits, and each digit one base (one offset in the metadata record), or
+for the rotating codec every 32 digits become 41 bases. ``plan_range``
+turns a plaintext range into the codewords, bases and metadata offsets
+covering it; ``decode_range`` reads just those from a container (whose
+block table locates the bases) or a FASTA file (whose line layout does),
+and only demaps and corrects the covering codewords. For a pre-compressed
+archive the header's compressed block sizes first map the range of the
+original file to the compressed blocks holding it.
+"""
+
+from contextlib import ExitStack
+from dataclasses import dataclass
+
+from codec.rotating import GROUP_DIGITS, GROUP_TRITS, rotating_length
+from decoder import InvalidBaseError, base4_array_to_bytes, dna_to_base4_array, rotating_dna_to_base4_array
+from encoder.compression import decompress
+from encoder.ecc import RS_BLOCK_SIZE, DecodeReport, rs_decode_blocks
+from dnaio.streaming import open_encoded_source
+
+
+@dataclass(frozen=True)
+class RangePlan:
+    """Where the blocks covering a plaintext byte range are.
+
+    Attributes:
+        start (int): First payload byte, clamped to the payload.
+        length (int): Payload bytes in the range, clamped to the payload.
+        first_codeword (int): First Reed-Solomon codeword covering the range.
+        last_codeword (int): End of the covering codewords (exclusive).
+        encoded_start (int): Offset of the first codeword in the encoded stream.
+        encoded_stop (int): End of the covering codewords in the encoded stream.
+        base_start (int): First base (and metadata offset) to read.
+        base_stop (int): End of the bases to read (exclusive).
+        digit_skip (int): Leading digits decoded from the bases that precede
+            ``encoded_start`` (rotating codec, whose groups span codewords).
+        skip (int): Leading decoded bytes that precede ``start``.
+    """
+    start: int
+    length: int
+    first_codeword: int = 0
+    last_codeword: int = 0
+    encoded_start: int = 0
+    encoded_stop: int = 0
+    base_start: int = 0
+    base_stop: int = 0
+    digit_skip: int = 0
+    skip: int = 0
+
+
+def plan_range(start: int, length: int, payload_length: int, nsym: int, codec: str = 'mapped', rs_block_size: int = RS_BLOCK_SIZE) -> RangePlan:
+    """Map a plaintext byte range to codewords, encoded bytes and bases.
+
+    Args:
+        start (int): First payload byte.
+        length (int): Number of bytes; the range is clamped to the payload.
+        payload_length (int): Size of the whole payload.
+        nsym (int): Reed-Solomon symbols per codeword.
+        codec (str): Mapping codec of the archive.
+        rs_block_size (int): Codeword length in bytes.
+
+    Returns:
+        RangePlan: The covering blocks; empty if the range holds no payload byte.
+
+    Raises:
+        ValueError: If ``start`` or ``length`` is negative.
+    """
+    if start < 0 or length < 0:
+        raise ValueError(f"Invalid byte range: start={start}, length={length}")
+    stop = min(start + length, payload_length)
+    if start >= stop:
+        return RangePlan(min(start, payload_length), 0)
+    message_size = rs_block_size - nsym
+    encoded_length = payload_length + nsym * -(-payload_length // message_size)
+    first, last = start // message_size, -(-stop // message_size)
+    encoded_start, encoded_stop = first * rs_block_size, min(last * rs_block_size, encoded_length)
+
+    digit_start, digit_stop = 4 * encoded_start, 4 * encoded_stop
+    digit_skip = 0
+    if codec == 'rotating':
+        # Whole groups only: a group's 41 bases encode its 32 digits together
+        group = digit_start // GROUP_DIGITS
+        digit_skip = digit_start - group * GROUP_DIGITS
+        base_start = group * GROUP_TRITS
+        if encoded_stop == encoded_length:
+            base_stop = rotating_length(4 * encoded_length)
+        else:
+            base_stop = -(-digit_stop // GROUP_DIGITS) * GROUP_TRITS
+    else:
+        base_start, base_stop = digit_start, digit_stop
+    return RangePlan(start, stop - start, first, last, encoded_start, encoded_stop, base_start, base_stop, digit_skip, start - first * message_size)
+
+
+def decode_range(path: str, start: int, length: int, nsym: int = None, report: DecodeReport = None) -> bytes:
+    """Decode ``length`` bytes of the original file from ``start`` without decoding the rest of the archive.
+
+    A pre-compressed archive is read through its compressed block sizes:
+    only the blocks holding the range are decoded and decompressed.
+
+    Args:
+        path (str): Encoded FASTA file or .dnab container written with an archive header.
+        start (int): First byte of the original file.
+        length (int): Number of bytes; ranges past the end of the file are clamped.
+        nsym (int, optional): Reed-Solomon symbols (default: from the archive header).
+        report (DecodeReport, optional): Filled with the error counts of the decoded codewords.
+
+    Returns:
+        bytes: The requested bytes.
+
+    Raises:
+        InvalidBaseError: If the covering bases contain invalid bases (positions are file-global).
+        UncorrectableCodewordError: If a covering codeword cannot be corrected.
+        ValueError: If the archive does not record its payload length, was
+            pre-compressed as a single stream (without block sizes) or the
+            range is invalid.
+    """
+    if start < 0 or length < 0:
+        raise ValueError(f"Invalid byte range: start={start}, length={length}")
+    with ExitStack() as stack:
+        source = open_encoded_source(path, stack)
+        header = source['header']
+        if header is None or header.payload_length is None:
+            raise ValueError("Range decoding needs the payload length recorded in the archive header")
+        nsym = nsym if nsym is not None else header.nsym
+        if not header.compression:
+            return _decode_payload_range(source, header, nsym, start, length, report)
+        if header.compressed_sizes is None:
+            raise ValueError(f"Range decoding needs the block sizes of a compressed payload; this archive was compressed with {header.compression} as one stream")
+
+        block, sizes = header.compression_block, header.compressed_sizes
+        first = start // block
+        if not length or first >= len(sizes):
+            return b''
+        last = min((start + length - 1) // block, len(sizes) - 1)
+        payload_start = sum(sizes[:first])
+        payload_length = sum(sizes[first:last + 1])
+        packed = _decode_payload_range(source, header, nsym, payload_start, payload_length, report)
+    skip = start - first * block
+    return decompress(packed, header.compression)[skip:skip + length]
+
+
+def _decode_payload_range(source: dict, header, nsym: int, start: int, length: int, report: DecodeReport = None) -> bytes:
+    """Decode ``length`` stored payload bytes from ``start`` of an open encoded source."""
+    codec = source['codec']
+    plan = plan_range(start, length, header.payload_length, nsym, codec, header.rs_block_size)
+    if not plan.length:
+        return b''
+
+    sequence = source['read_sequence'](plan.base_start, plan.base_stop)
+    try:
+        if codec == 'rotating':
+            previous = dna_to_base4_array(source['read_sequence'](plan.base_start - 1, plan.base_start))[0] if plan.base_start else 0
+            digits = rotating_dna_to_base4_array(sequence, int(previous))
+            digits = digits[plan.digit_skip:plan.digit_skip + 4 * (plan.encoded_stop - plan.encoded_start)]
+        else:
+            patches = [(position, base) for position, base in source['patches'] if plan.base_start <= position < plan.base_stop]
+            if patches:
+                sequence = bytearray(sequence)
+                for position, base in patches:
+                    sequence[position - plan.base_start] = ord(base)
+                sequence = bytes(sequence)
+            metadata = source['read_metadata'](plan.base_start, plan.base_stop) if source['read_metadata'] is not None else None
+            digits = dna_to_base4_array(sequence, metadata)
+    except InvalidBaseError as error:
+        raise InvalidBaseError(error.positions + plan.base_start) from None
+
+    data = base4_array_to_bytes(digits).tobytes()
+    decoded = rs_decode_blocks(data, nsym, header.rs_block_size, first_index=plan.first_codeword, report=report)
+    return decoded[plan.skip:plan.skip + plan.length]
@@ -0,0 +1,262 @@
+"""Multi-file archives: many input files packed into one encoded payload.
+
+The payload holds the members' bytes back to back, followed by a
+directory::
+
+    version (1 byte) | zlib( per member: name length (u16), length (u64),
+                             SHA-256 (32 bytes), UTF-8 name )
+
+Member offsets follow from the lengths, so they are not stored. The archive
+header records ``directory_length``, which puts the directory at the end of
+the payload; since every stage of the pipeline is fixed-rate, a reader
+fetches the directory and then any single member with ``decode_range``
+without decoding the other members.
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from decoder.random_access import decode_range
+from encoder.header import ArchiveHeader
+from dnaio.file_reader import read_input
+from dnaio.header import read_archive_header
+
+DIRECTORY_VERSION = 1
+_ENTRY = struct.Struct('<HQ32s')  # name length, member length, SHA-256
+
+
+@dataclass
+class ArchiveMember:
+    """One file of a multi-file archive.
+
+    Attributes:
+        name (str): Relative path of the file, '/'-separated.
+        offset (int): Offset of its bytes in the payload.
+        length (int): Size in bytes.
+        sha256 (str): Hex SHA-256 of its bytes.
+    """
+    name: str
+    offset: int
+    length: int
+    sha256: str
+
+
+def pack_directory(members: list) -> bytes:
+    """Serialize a directory (see the module docstring)."""
+    body = bytearray()
+    for member in members:
+        name = member.name.encode('utf-8')
+        body += _ENTRY.pack(len(name), member.length, bytes.fromhex(member.sha256)) + name
+    return bytes([DIRECTORY_VERSION]) + zlib.compress(bytes(body), 9)
+
+
+def unpack_directory(data: bytes) -> list:
+    """Parse a directory written by ``pack_directory``.
+
+    Raises:
+        ValueError: If the directory is malformed or of an unknown version.
+    """
+    if not data or data[0] != DIRECTORY_VERSION:
+        raise ValueError("Unsupported archive directory format")
+    try:
+        body = zlib.decompress(data[1:])
+    except zlib.error as error:
+        raise ValueError(f"Malformed archive directory: {error}") from None
+    members = []
+    position = offset = 0
+    while position < len(body):
+        if position + _ENTRY.size > len(body):
+            raise ValueError("Truncated archive directory")
+        name_length, length, digest = _ENTRY.unpack_from(body, position)
+        position += _ENTRY.size
+        name = body[position:position + name_length].decode('utf-8')
+        position += name_length
+        members.append(ArchiveMember(name, offset, length, digest.hex()))
+        offset += length
+    return members
+
+
+def collect_inputs(paths: list) -> list:
+    """List the files to archive as (member name, path) pairs.
+
+    Files are named by their basename; directories are walked in sorted
+    order and their files named by their path below the directory's parent.
+
+    Raises:
+        ValueError: If an input does not exist or two members share a name.
+    """
+    entries = []
+    for path in paths:
+        if os.path.isdir(path):
+            root = os.path.dirname(os.path.abspath(path))
+            for directory, subdirectories, files in os.walk(path):
+                subdirectories.sort()
+                for filename in sorted(files):
+                    full_path = os.path.join(directory, filename)
+                    entries.append((os.path.relpath(os.path.abspath(full_path), root).replace(os.sep, '/'), full_path))
+        elif os.path.isfile(path):
+            entries.append((os.path.basename(path), path))
+        else:
+            raise ValueError(f"Input not found: {path}")
+    names = [name for name, _ in entries]
+    if len(set(names)) != len(names):
+        duplicate = next(name for name in names if names.count(name) > 1)
+        raise ValueError(f"Duplicate archive member name: {duplicate}")
+    return entries
+
+
+def _read_member(source) -> tuple[memoryview, str]:
+    data = read_input(source)
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def pack_archive(entries: list, workers: int = None) -> tuple[bytes, list]:
+    """Read the members and build the archive payload.
+
+    Members are memory-mapped and hashed by a thread pool (hashing releases
+    the GIL).
+
+    Args:
+        entries (list[tuple]): (member name, path) pairs, as from
+            ``collect_inputs``; open binary file objects may stand in for paths.
+        workers (int, optional): Reader threads (default: CPU count).
+
+    Returns:
+        tuple[bytes, list[ArchiveMember]]: The payload (members then directory) and the members.
+    """
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        contents = list(pool.map(_read_member, [path for _, path in entries]))
+    members = []
+    offset = 0
+    for (name, _), (data, digest) in zip(entries, contents):
+        members.append(ArchiveMember(name, offset, len(data), digest))
+        offset += len(data)
+    return b''.join(data for data, _ in contents) + pack_directory(members), members
+
+
+def archive_header(payload: bytes, members: list, codec: str, nsym: int) -> ArchiveHeader:
+    """Build the archive header of a payload from ``pack_archive``."""
+    header = ArchiveHeader.for_payload(payload, codec, nsym)
+    header.directory_length = len(payload) - sum(member.length for member in members)
+    return header
+
+
+def read_directory(path: str, header: ArchiveHeader = None) -> list:
+    """Decode only the directory of an encoded multi-file archive.
+
+    Raises:
+        ValueError: If the file is not a multi-file archive.
+    """
+    header = header or read_archive_header(path)
+    if header is None or not header.directory_length:
+        raise ValueError(f"{path} is not a multi-file archive")
+    return unpack_directory(decode_range(path, header.payload_length - header.directory_length, header.directory_length))
+
+
+def verify_member(member: ArchiveMember, data: bytes) -> None:
+    """Check extracted member bytes against the directory entry.
+
+    Raises:
+        ValueError: On a length or hash mismatch.
+    """
+    if len(data) != member.length or hashlib.sha256(data).hexdigest() != member.sha256:
+        raise ValueError(f"Archive member {member.name} does not match its directory entry")
+
+
+def extract_member(path: str, name: str, members: list = None, report=None) -> bytes:
+    """Decode one member of an encoded multi-file archive, and nothing else.
+
+    Args:
+        path (str): Encoded FASTA file or container.
+        name (str): Member name.
+        members (list[ArchiveMember], optional): The directory, if already read.
+        report (DecodeReport, optional): Filled with the error counts of the decoded codewords.
+
+    Returns:
+        bytes: The member's bytes, verified against its SHA-256.
+
+    Raises:
+        ValueError: If there is no such member or it fails verification.
+    """
+    members = members if members is not None else read_directory(path)
+    member = next((member for member in members if member.name == name), None)
+    if member is None:
+        raise ValueError(f"No member {name!r} in {path}")
+    data = decode_range(path, member.offset, member.length, report=report)
+    verify_member(member, data)
+    return data
+
+
+def member_path(output_dir: str, name: str) -> str:
+    """Resolve where a member is extracted, refusing names that escape ``output_dir``.
+
+    Raises:
+        ValueError: If the name is absolute or climbs out of the output directory.
+    """
+    parts = name.split('/')
+    if name.startswith('/') or any(part in ('', '.', '..') for part in parts) or os.path.isabs(name):
+        raise ValueError(f"Unsafe archive member name: {name!r}")
+    return os.path.join(output_dir, *parts)
+
+
+def write_members(output_dir: str, members: list, read) -> list:
+    """Write members below ``output_dir``.
+
+    Args:
+        output_dir (str): Destination directory.
+        members (list[ArchiveMember]): Members to write.
+        read: Callable returning the bytes of a member.
+
+    Returns:
+        list[str]: The written paths.
+    """
+    written = []
+    for member in members:
+        target = member_path(output_dir, member.name)
+        data = read(member)
+        verify_member(member, data)
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        written.append(target)
+    return written
+
+
+def extract_archive(path: str, output_dir: str, names: list = None, report=None) -> list:
+    """Extract members of an encoded multi-file archive into a directory.
+
+    With ``names`` only those members are decoded, each through
+    ``decode_range``; otherwise the whole payload is decoded once, checked
+    against the archive header and split.
+
+    Args:
+        path (str): Encoded FASTA file or container.
+        output_dir (str): Destination directory; member paths are recreated below it.
+        names (list[str], optional): Members to extract (default: all).
+        report (DecodeReport, optional): Filled with the Reed-Solomon error counts.
+
+    Returns:
+        list[str]: The written paths.
+
+    Raises:
+        ValueError: If the file is not an archive, a member is missing or fails verification.
+    """
+    header = read_archive_header(path)
+    if names is not None:
+        members = read_directory(path, header)
+        by_name = {member.name: member for member in members}
+        missing = [name for name in names if name not in by_name]
+        if missing:
+            raise ValueError(f"No member {missing[0]!r} in {path}")
+        return write_members(output_dir, [by_name[name] for name in names], lambda member: decode_range(path, member.offset, member.length, report=report))
+
+    if header is None or not header.directory_length:
+        raise ValueError(f"{path} is not a multi-file archive")
+    payload = decode_range(path, 0, header.payload_length, report=report)
+    header.verify(payload)
+    members = unpack_directory(payload[len(payload) - header.directory_length:])
+    return write_members(output_dir, members, lambda member: payload[member.offset:member.offset + member.length])
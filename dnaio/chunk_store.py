@@ -0,0 +1,268 @@
+"""Deduplicating chunk store for versioned files.
+
+Files are cut into content-defined chunks (``encoder.chunking``). Each chunk
+is Reed-Solomon coded, mapped and written as its own container, named by
+the SHA-256 of its bytes::
+
+    <store>/<first two hex digits>/<sha256>.dnab
+
+A manifest (compact JSON, like the archive header) lists a file's chunks in
+order. Storing a file only encodes chunks the store does not hold yet, so
+re-archiving an edited file encodes just the chunks around the edit, and
+chunks shared between files or versions are encoded and synthesized once.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
+from typing import Optional
+
+from decoder import decode_dna_sequence
+from encoder.base_mapping import bytes_to_base4_array, map_to_dna
+from encoder.chunking import AVG_CHUNK, MAX_CHUNK, MIN_CHUNK, chunk_boundaries
+from encoder.constraints import DEFAULT_SPEC, ConstraintSpec
+from encoder.ecc import DecodeReport
+from encoder.error_correction import add_reed_solomon
+from encoder.header import ArchiveHeader
+from dnaio.container import CONTAINER_EXTENSION, read_container_records, write_container
+from dnaio.file_reader import input_name, read_input
+
+MANIFEST_FORMAT_VERSION = 1
+
+
+@dataclass
+class Manifest:
+    """Chunk list of a file in a chunk store.
+
+    Attributes:
+        filename (str): Original filename.
+        length (int): File size in bytes.
+        sha256 (str): Hex SHA-256 of the file.
+        codec (str): Mapping codec of the chunks encoded for this file.
+        nsym (int): Reed-Solomon symbols per codeword of those chunks.
+        chunks (list[list]): (SHA-256, length) of every chunk, in file order.
+        store (str, optional): Chunk store directory, relative to the manifest.
+        format_version (int): Manifest format version.
+    """
+
+    filename: str
+    length: int
+    sha256: str
+    codec: str
+    nsym: int
+    chunks: list = field(default_factory=list)
+    store: Optional[str] = None
+    format_version: int = MANIFEST_FORMAT_VERSION
+
+    def to_bytes(self) -> bytes:
+        """Serialize as compact JSON."""
+        return json.dumps(asdict(self), separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Manifest':
+        """Parse a serialized manifest.
+
+        Raises:
+            ValueError: If the manifest is malformed or from an unsupported format version.
+        """
+        try:
+            values = json.loads(data.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            raise ValueError(f"Malformed chunk manifest: {error}") from None
+        if not isinstance(values, dict) or 'chunks' not in values:
+            raise ValueError("Malformed chunk manifest: no chunk list")
+        if values.get('format_version', MANIFEST_FORMAT_VERSION) > MANIFEST_FORMAT_VERSION:
+            raise ValueError(f"Unsupported manifest format version: {values['format_version']}")
+        known = {field.name for field in fields(cls)}
+        return cls(**{k: v for k, v in values.items() if k in known})
+
+
+@dataclass
+class StoreReport:
+    """What storing a file added to a chunk store.
+
+    Attributes:
+        chunks (int): Chunks in the file.
+        new_chunks (int): Chunks encoded by this call.
+        new_bytes (int): Bytes in the newly encoded chunks.
+        reused_bytes (int): Bytes of chunks the store already held (or that repeat within the file).
+    """
+    chunks: int = 0
+    new_chunks: int = 0
+    new_bytes: int = 0
+    reused_bytes: int = 0
+
+
+def is_manifest(filepath: str) -> bool:
+    """Check whether a file is a chunk manifest."""
+    with open(filepath, 'rb') as f:
+        if f.read(1) != b'{':
+            return False
+    try:
+        read_manifest(filepath)
+    except ValueError:
+        return False
+    return True
+
+
+def read_manifest(filepath: str) -> Manifest:
+    """Read a manifest written by ``store_file``."""
+    with open(filepath, 'rb') as f:
+        return Manifest.from_bytes(f.read())
+
+
+def write_manifest(filepath: str, manifest: Manifest) -> None:
+    """Write a manifest."""
+    with open(filepath, 'wb') as f:
+        f.write(manifest.to_bytes())
+
+
+class ChunkStore:
+    """Directory of encoded chunks addressed by their SHA-256."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        """Container path of a chunk."""
+        return os.path.join(self.root, digest[:2], digest + CONTAINER_EXTENSION)
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+
+def _encode_chunk(path: str, data: bytes, nsym: int, spec: ConstraintSpec, codec: str) -> None:
+    """Encode one chunk to a container; written under a temporary name so a crash never leaves a partial chunk."""
+    mapped = map_to_dna(bytes_to_base4_array(add_reed_solomon(data, nsym=nsym)), spec, codec)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.{os.getpid()}.partial"
+    header = ArchiveHeader.for_payload(data, mapped.codec, nsym)
+    write_container(partial, mapped.dna_sequence, metadata=mapped.metadata, patches=mapped.patches, codec=mapped.codec, nsym=nsym, payload_length=len(data), archive_header=header)
+    os.replace(partial, path)
+
+
+def _decode_chunk(path: str, digest: str) -> tuple[bytes, DecodeReport]:
+    """Decode one chunk container and check it against its name."""
+    records = read_container_records(path)
+    header = records['header']
+    report = DecodeReport()
+    data = decode_dna_sequence(records['sequence'], records['metadata'], nsym=header.nsym, patches=records['patches'], codec=records['codec'], report=report)
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Chunk {digest} does not match its content hash")
+    return data, report
+
+
+def _pool_map(function, workers: int, *iterables):
+    """Lazy ``map`` over ``workers`` processes.
+
+    Arguments are drawn from the iterables only as calls are submitted, with
+    at most two calls per worker in flight, so generators are consumed a few
+    items at a time.
+    """
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = deque()
+            for args in zip(*iterables):
+                running.append(pool.submit(function, *args))
+                if len(running) >= 2 * workers:
+                    yield running.popleft().result()
+            while running:
+                yield running.popleft().result()
+    else:
+        yield from map(function, *iterables)
+
+
+def store_file(input_file: str, manifest_file: str, store_dir: str, nsym: int = 10, spec: ConstraintSpec = None, codec: str = 'mapped', workers: int = 1, chunk_sizes: tuple = (MIN_CHUNK, AVG_CHUNK, MAX_CHUNK)) -> StoreReport:
+    """Add a file to a chunk store and write its manifest.
+
+    Only chunks missing from the store are encoded, ``workers`` at a time.
+
+    Args:
+        input_file: File to store (any type), ``STDIN`` ('-') or an open binary file object.
+        manifest_file (str): Manifest to write.
+        store_dir (str): Chunk store directory (created if needed).
+        nsym (int): Reed-Solomon symbols per codeword of new chunks.
+        spec (ConstraintSpec, optional): Constraints for new chunks.
+        codec (str): Mapping codec of new chunks.
+        workers (int): Worker processes encoding new chunks.
+        chunk_sizes (tuple): Minimum, average and maximum chunk size.
+
+    Returns:
+        StoreReport: How much was encoded and how much reused.
+    """
+    spec = spec or DEFAULT_SPEC
+    store = ChunkStore(store_dir)
+    data = view = read_input(input_file)
+    chunks = []
+    start = 0
+    for end in chunk_boundaries(data, *chunk_sizes):
+        chunks.append((hashlib.sha256(view[start:end]).hexdigest(), start, end))
+        start = end
+
+    report = StoreReport(chunks=len(chunks))
+    pending = {}
+    for digest, start, end in chunks:
+        if digest in pending or digest in store:
+            report.reused_bytes += end - start
+        else:
+            pending[digest] = (start, end)
+            report.new_chunks += 1
+            report.new_bytes += end - start
+    # Chunks are sliced from the input only as they are handed to the encoder
+    for _ in _pool_map(_encode_chunk, workers, map(store.path, pending), (bytes(view[start:end]) for start, end in pending.values()),
+                       itertools.repeat(nsym), itertools.repeat(spec), itertools.repeat(codec)):
+        pass
+
+    manifest = Manifest(
+        filename=input_name(input_file), length=len(data), sha256=hashlib.sha256(data).hexdigest(),
+        codec=codec, nsym=nsym, chunks=[[digest, end - start] for digest, start, end in chunks],
+        store=os.path.relpath(os.path.abspath(store_dir), os.path.dirname(os.path.abspath(manifest_file))).replace(os.sep, '/'),
+    )
+    write_manifest(manifest_file, manifest)
+    return report
+
+
+def restore_file(manifest_file: str, output_file: str, store_dir: str = None, workers: int = 1, report: DecodeReport = None) -> Manifest:
+    """Rebuild a file from its manifest and chunk store.
+
+    Args:
+        manifest_file (str): Manifest written by ``store_file``.
+        output_file (str): Where to write the file.
+        store_dir (str, optional): Chunk store (default: the one recorded in the manifest).
+        workers (int): Worker processes decoding chunks.
+        report (DecodeReport, optional): Filled with the Reed-Solomon error
+            counts; codeword indices run on across chunks.
+
+    Returns:
+        Manifest: The manifest.
+
+    Raises:
+        ValueError: If a chunk is missing or the rebuilt file does not match the manifest.
+    """
+    manifest = read_manifest(manifest_file)
+    if store_dir is None:
+        store_dir = os.path.join(os.path.dirname(os.path.abspath(manifest_file)), manifest.store or '.')
+    store = ChunkStore(store_dir)
+    missing = [digest for digest, _ in manifest.chunks if digest not in store]
+    if missing:
+        raise ValueError(f"{len(missing)} chunks missing from {store_dir} (first: {missing[0]})")
+
+    digest = hashlib.sha256()
+    length = 0
+    digests = [chunk_digest for chunk_digest, _ in manifest.chunks]
+    with open(output_file, 'wb') as out:
+        for data, chunk_report in _pool_map(_decode_chunk, workers, [store.path(chunk_digest) for chunk_digest in digests], digests):
+            if report is not None:
+                report.errors.update({report.codewords + index: count for index, count in chunk_report.errors.items()})
+                report.codewords += chunk_report.codewords
+            out.write(data)
+            digest.update(data)
+            length += len(data)
+    if length != manifest.length or digest.hexdigest() != manifest.sha256:
+        raise ValueError("Rebuilt file does not match the SHA-256 recorded in the manifest")
+    return manifest
@@ -0,0 +1,391 @@
+"""2-bit packed binary container for encoded DNA archives (.dnab).
+
+Layout (little-endian)::
+
+    fixed header   magic 'DNAB', format version, codec, nsym, flags,
+                   payload length, index offset/length, index CRC-32,
+                   filename length, header CRC-32
+    filename       UTF-8
+    data blocks    in any order
+    block index    per record: name, encoding, item count, block size and one
+                   (offset, length, CRC-32) entry per block
+
+Records:
+
+- ``sequence``: bases packed 4 per byte (A=0, C=1, G=2, T=3), fixed-size blocks.
+- ``metadata``: mapping offsets, one ``pack_metadata`` stream per block, so any
+  block can be expanded on its own.
+- ``patches``: the varint patch list of the 'patch' codec, a single block.
+- ``header``: the serialized ``ArchiveHeader``, a single block.
+
+The index sits at the end so the container can be written in one streaming
+pass; its location is patched into the header on close. A reader maps the
+file and materializes only the blocks a slice touches.
+"""
+
+import mmap
+import struct
+import zlib
+from dataclasses import replace
+
+import numpy as np
+
+from codec.rotating import CODE_TABLE
+from decoder import InvalidBaseError, base4_array_to_bytes, decode_patches, dna_to_base4_array
+from encoder.base_mapping import CODECS, bytes_to_base4_array
+from encoder.header import ArchiveHeader
+from dnaio.file_writer import pack_metadata, unpack_metadata
+
+CONTAINER_MAGIC = b'DNAB'
+CONTAINER_VERSION = 1
+CONTAINER_EXTENSION = '.dnab'
+DEFAULT_CONTAINER_BLOCK = 1 << 16  # bases (or offsets) per block
+
+# magic, version, codec, nsym, flags, payload length, index offset, index length, index crc, filename length, header crc
+_HEADER = struct.Struct('<4sBBBBQQQIHI')
+_RECORD = struct.Struct('<BQIIB')  # encoding, item count, block size, block count, name length
+_BLOCK = np.dtype([('offset', '<u8'), ('length', '<u4'), ('crc', '<u4')])
+
+SEQUENCE_2BIT, METADATA_SPARSE, RAW_BYTES = 0, 1, 2
+_ENCODINGS = {'sequence': SEQUENCE_2BIT, 'metadata': METADATA_SPARSE, 'patches': RAW_BYTES, 'header': RAW_BYTES}
+
+
+def is_container(filepath: str) -> bool:
+    """Return True if the file starts with the container magic."""
+    with open(filepath, 'rb') as f:
+        return f.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+
+
+class ContainerWriter:
+    """Write a container in one pass; sequence and metadata may arrive in chunks.
+
+    Args:
+        filepath (str): Output path.
+        codec (str): Mapping codec of the sequence.
+        nsym (int): Reed-Solomon symbols used for the payload.
+        original_filename (str, optional): Filename stored in the header.
+        block_size (int): Bases (and offsets) per block; a multiple of 4.
+    """
+
+    def __init__(self, filepath: str, codec: str = 'mapped', nsym: int = 10, original_filename: str = None, block_size: int = DEFAULT_CONTAINER_BLOCK):
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported codec: {codec}. Choose from {', '.join(CODECS)}")
+        if block_size <= 0 or block_size % 4:
+            raise ValueError("Block size must be a positive multiple of 4")
+        self.codec = codec
+        self.nsym = nsym
+        self.block_size = block_size
+        self.payload_length = 0
+        self._filename = (original_filename or '').encode('utf-8')
+        self._handle = open(filepath, 'wb')
+        self._handle.write(b'\0' * (_HEADER.size + len(self._filename)))
+        self._records = {}
+        self._pending = {'sequence': b'', 'metadata': np.empty(0, dtype=np.uint8)}
+
+    def _record(self, name: str) -> dict:
+        return self._records.setdefault(name, {'count': 0, 'blocks': []})
+
+    def _write_block(self, name: str, data: bytes, count: int) -> None:
+        record = self._record(name)
+        record['blocks'].append((self._handle.tell(), len(data), zlib.crc32(data)))
+        record['count'] += count
+        self._handle.write(data)
+
+    def write_sequence(self, sequence) -> None:
+        """Append bases (str or ASCII bytes) to the sequence record.
+
+        Raises:
+            InvalidBaseError: If the sequence contains bases other than A, C, G and T.
+        """
+        if isinstance(sequence, str):
+            sequence = sequence.encode('ascii')
+        data = self._pending['sequence'] + bytes(sequence)
+        full = len(data) - len(data) % self.block_size
+        for start in range(0, full, self.block_size):
+            self._write_sequence_block(data[start:start + self.block_size])
+        self._pending['sequence'] = data[full:]
+        self._record('sequence')
+
+    def _write_sequence_block(self, block: bytes) -> None:
+        try:
+            digits = dna_to_base4_array(block)
+        except InvalidBaseError as error:
+            raise InvalidBaseError(error.positions + self._record('sequence')['count']) from None
+        if len(digits) % 4:
+            digits = np.concatenate((digits, np.zeros(4 - len(digits) % 4, dtype=np.uint8)))
+        self._write_block('sequence', base4_array_to_bytes(digits).tobytes(), len(block))
+
+    def write_metadata(self, offsets) -> None:
+        """Append mapping offsets (0-3) to the metadata record."""
+        data = np.concatenate((self._pending['metadata'], np.asarray(offsets, dtype=np.uint8)))
+        full = len(data) - len(data) % self.block_size
+        for start in range(0, full, self.block_size):
+            self._write_block('metadata', pack_metadata(data[start:start + self.block_size]), self.block_size)
+        self._pending['metadata'] = data[full:]
+        self._record('metadata')
+
+    def write_patches(self, patches) -> None:
+        """Store the patch list of the 'patch' codec."""
+        from encoder.patches import encode_patches
+        data = encode_patches(patches)
+        self._write_block('patches', data, len(data))
+
+    def write_header(self, archive_header: ArchiveHeader) -> None:
+        """Store the self-describing archive header."""
+        data = archive_header.to_bytes()
+        self._write_block('header', data, len(data))
+
+    def close(self) -> None:
+        """Flush partial blocks, write the block index and finalize the header."""
+        if self._handle.closed:
+            return
+        if self._pending['sequence']:
+            self._write_sequence_block(self._pending['sequence'])
+        if len(self._pending['metadata']):
+            self._write_block('metadata', pack_metadata(self._pending['metadata']), len(self._pending['metadata']))
+        self._pending = {'sequence': b'', 'metadata': np.empty(0, dtype=np.uint8)}
+
+        index = bytearray()
+        for name, record in self._records.items():
+            encoded_name = name.encode('ascii')
+            block_size = self.block_size if name in ('sequence', 'metadata') else record['count']
+            index += _RECORD.pack(_ENCODINGS[name], record['count'], block_size, len(record['blocks']), len(encoded_name))
+            index += encoded_name
+            index += np.array(record['blocks'], dtype=_BLOCK).tobytes()
+        index_offset = self._handle.tell()
+        self._handle.write(index)
+
+        header = _HEADER.pack(
+            CONTAINER_MAGIC, CONTAINER_VERSION, CODECS.index(self.codec), self.nsym, 0,
+            self.payload_length, index_offset, len(index), zlib.crc32(index), len(self._filename), 0,
+        )
+        header = header[:-4] + struct.pack('<I', zlib.crc32(header[:-4] + self._filename))
+        self._handle.seek(0)
+        self._handle.write(header + self._filename)
+        self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DNAContainer:
+    """Memory-mapped reader for a container.
+
+    Slices of the sequence and metadata are materialized block by block;
+    every block read is checked against its CRC-32.
+
+    Args:
+        filepath (str): Path to the container.
+
+    Raises:
+        ValueError: If the file is not a valid container.
+    """
+
+    def __init__(self, filepath: str):
+        self._file = open(filepath, 'rb')
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a DNA container: {filepath}") from None
+        data = self._data
+        if len(data) < _HEADER.size or data[:4] != CONTAINER_MAGIC:
+            self.close()
+            raise ValueError(f"Not a DNA container: {filepath}")
+        (_, version, codec, self.nsym, _, self.payload_length, index_offset, index_length,
+         index_crc, filename_length, header_crc) = _HEADER.unpack_from(data)
+        if version != CONTAINER_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported container version: {version}")
+        filename = data[_HEADER.size:_HEADER.size + filename_length]
+        if zlib.crc32(data[:_HEADER.size - 4] + filename) != header_crc:
+            self.close()
+            raise ValueError("Container header is corrupt")
+        index = data[index_offset:index_offset + index_length]
+        if zlib.crc32(index) != index_crc:
+            self.close()
+            raise ValueError("Container block index is corrupt")
+        self.codec = CODECS[codec]
+        self.filename = filename.decode('utf-8') or None
+
+        self.records = {}
+        position = 0
+        while position < len(index):
+            encoding, count, block_size, block_count, name_length = _RECORD.unpack_from(index, position)
+            position += _RECORD.size
+            name = index[position:position + name_length].decode('ascii')
+            position += name_length
+            blocks = np.frombuffer(index, dtype=_BLOCK, count=block_count, offset=position)
+            position += blocks.nbytes
+            self.records[name] = {'encoding': encoding, 'count': count, 'block_size': block_size, 'blocks': blocks}
+
+    def __len__(self) -> int:
+        """Number of bases in the sequence record."""
+        return self.records['sequence']['count'] if 'sequence' in self.records else 0
+
+    @property
+    def has_metadata(self) -> bool:
+        return 'metadata' in self.records
+
+    def _block(self, name: str, index: int) -> bytes:
+        entry = self.records[name]['blocks'][index]
+        offset, length = int(entry['offset']), int(entry['length'])
+        data = self._data[offset:offset + length]
+        if zlib.crc32(data) != int(entry['crc']):
+            raise ValueError(f"Container {name} block {index} is corrupt")
+        return data
+
+    def _sequence_block(self, index: int) -> bytes:
+        record = self.records['sequence']
+        length = min(record['block_size'], record['count'] - index * record['block_size'])
+        codes = bytes_to_base4_array(self._block('sequence', index))[:length]
+        return codes.tobytes().translate(CODE_TABLE)
+
+    def _metadata_block(self, index: int) -> np.ndarray:
+        return unpack_metadata(self._block('metadata', index))
+
+    def _slice(self, name: str, read_block, start: int, stop, empty):
+        record = self.records.get(name)
+        if record is None:
+            return empty
+        start, stop, _ = slice(start, stop).indices(record['count'])
+        if start >= stop:
+            return empty
+        size = record['block_size']
+        parts = [read_block(index) for index in range(start // size, (stop - 1) // size + 1)]
+        joined = parts[0] if len(parts) == 1 else (np.concatenate(parts) if isinstance(empty, np.ndarray) else b''.join(parts))
+        offset = start // size * size
+        return joined[start - offset:stop - offset]
+
+    def read_sequence(self, start: int = 0, stop: int = None) -> bytes:
+        """Return bases ``start:stop`` of the sequence as ASCII bytes."""
+        return self._slice('sequence', self._sequence_block, start, stop, b'')
+
+    def read_metadata(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """Return offsets ``start:stop`` of the metadata record as a uint8 array."""
+        return self._slice('metadata', self._metadata_block, start, stop, np.empty(0, dtype=np.uint8))
+
+    def iter_sequence(self):
+        """Yield the sequence block by block as ASCII bytes."""
+        for index in range(len(self.records.get('sequence', {'blocks': ()})['blocks'])):
+            yield self._sequence_block(index)
+
+    def iter_metadata(self):
+        """Yield the metadata offsets block by block."""
+        for index in range(len(self.records.get('metadata', {'blocks': ()})['blocks'])):
+            yield self._metadata_block(index)
+
+    @property
+    def header(self) -> ArchiveHeader:
+        """The archive header; containers without a header record get one built from the fixed header."""
+        if 'header' in self.records:
+            return ArchiveHeader.from_bytes(b''.join(self._block('header', index) for index in range(len(self.records['header']['blocks']))))
+        return ArchiveHeader(codec=self.codec, nsym=self.nsym, payload_length=self.payload_length or None, filename=self.filename)
+
+    def read_patches(self):
+        """Return the patch list, or None if the container has none."""
+        if 'patches' not in self.records:
+            return None
+        return decode_patches(b''.join(self._block('patches', index) for index in range(len(self.records['patches']['blocks']))))
+
+    def close(self) -> None:
+        if getattr(self, '_data', None) is not None:
+            self._data.close()
+            self._data = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_container(filepath: str, dna_sequence: str, metadata=None, original_filename: str = None, patches=None, codec: str = 'mapped', nsym: int = 10, payload_length: int = 0, block_size: int = DEFAULT_CONTAINER_BLOCK, archive_header: ArchiveHeader = None) -> None:
+    """Write an encoded sequence and its auxiliary data to a container.
+
+    Args:
+        filepath (str): Output path.
+        dna_sequence (str): DNA sequence string.
+        metadata (optional): Mapping offsets ('mapped' codec).
+        original_filename (str, optional): Original filename to preserve for decoding.
+        patches (list[tuple[int, str]], optional): Patch list ('patch' codec).
+        codec (str): Mapping codec.
+        nsym (int): Reed-Solomon symbols used for the payload.
+        payload_length (int): Length of the original payload in bytes (0 if unknown).
+        block_size (int): Bases (and offsets) per block.
+        archive_header (ArchiveHeader, optional): Self-describing header to store.
+    """
+    with ContainerWriter(filepath, codec, nsym, original_filename, block_size) as writer:
+        writer.payload_length = payload_length
+        writer.write_sequence(dna_sequence)
+        if metadata is not None:
+            writer.write_metadata(metadata)
+        if patches is not None:
+            writer.write_patches(patches)
+        if archive_header is not None:
+            writer.write_header(archive_header)
+
+
+def read_container_records(filepath: str) -> dict:
+    """Read a container completely, in the form returned by ``read_fasta_records``.
+
+    Returns:
+        dict: ``sequence``, ``metadata`` (list), ``filename``, ``patches``,
+        ``codec``, ``header`` and additionally ``nsym``.
+    """
+    with DNAContainer(filepath) as container:
+        return {
+            'sequence': container.read_sequence().decode('ascii'),
+            'metadata': container.read_metadata().tolist(),
+            'filename': container.filename,
+            'patches': container.read_patches(),
+            'codec': container.codec,
+            'header': container.header if 'header' in container.records else None,
+            'nsym': container.nsym,
+        }
+
+
+def fasta_to_container(fasta_path: str, container_path: str, nsym: int = 10, block_size: int = DEFAULT_CONTAINER_BLOCK) -> None:
+    """Convert an encoded FASTA file to a container (lossless).
+
+    Args:
+        fasta_path (str): Input FASTA file.
+        container_path (str): Output container.
+        nsym (int): Reed-Solomon symbols recorded in the container header when the FASTA file has no header record.
+        block_size (int): Bases (and offsets) per block.
+    """
+    from dnaio.file_reader import read_fasta_records
+    records = read_fasta_records(fasta_path)
+    header = records['header']
+    if header is not None:
+        # The container indexes its metadata blocks itself
+        header = replace(header, metadata_block=None, metadata_index=None)
+    has_metadata = any(record_id.endswith('_metadata') for record_id in _fasta_ids(fasta_path))
+    write_container(
+        container_path, records['sequence'], metadata=records['metadata'] if has_metadata else None,
+        original_filename=records['filename'], patches=records['patches'], codec=records['codec'],
+        nsym=header.nsym if header else nsym, block_size=block_size,
+        payload_length=(header.payload_length or 0) if header else 0,
+        archive_header=header,
+    )
+
+
+def _fasta_ids(fasta_path: str) -> list[str]:
+    from dnaio.file_reader import index_fasta_records
+    return [record['id'] for record in index_fasta_records(fasta_path)]
+
+
+def container_to_fasta(container_path: str, fasta_path: str) -> None:
+    """Convert a container back to an encoded FASTA file (lossless)."""
+    from dnaio.file_writer import write_fasta
+    with DNAContainer(container_path) as container:
+        write_fasta(
+            fasta_path, container.read_sequence().decode('ascii'),
+            metadata=container.read_metadata() if container.has_metadata else None,
+            original_filename=container.filename, patches=container.read_patches(), codec=container.codec,
+            archive_header=container.header if 'header' in container.records else None,
+        )
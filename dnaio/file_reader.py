@@ -1,9 +1,20 @@
+import io
+import mmap
 import os
+import stat
+import sys
+import tempfile
 from typing import Optional
 
+from encoder.header import ArchiveHeader
+
+FASTA_READ_SIZE = 1 << 22
+FASTA_WHITESPACE = b' \t\r\n'
+FASTA_ENGINES = ('native', 'biopython')
+
 
 def read_txt_file(filepath: str) -> bytes:
-    """Read a text file and return its contents as bytes.
+    """Read a text file and return its contents as bytes (same as ``convert_file_to_binary``).
 
     Args:
         filepath (str): Path to the .txt file.
@@ -11,35 +22,214 @@ def read_txt_file(filepath: str) -> bytes:
     Returns:
         bytes: File contents as bytes.
     """
-    with open(filepath, 'rb') as f:
-        return f.read()
+    return convert_file_to_binary(filepath)
+
+
+def parse_fasta(filepath: str, engine: str = 'native') -> list[tuple[str, str, str]]:
+    """Read every record of a FASTA file.
+
+    The native engine locates records with ``index_fasta_records`` and takes
+    each sequence as one slice of a memory map, stripping line breaks with
+    ``bytes.translate``; Biopython is only imported for the 'biopython' engine.
+
+    Args:
+        filepath (str): Path to the FASTA file.
+        engine (str): 'native' or 'biopython'.
+
+    Returns:
+        list[tuple[str, str, str]]: (id, description, sequence) per record.
+
+    Raises:
+        ValueError: If the engine is unknown.
+    """
+    if engine == 'biopython':
+        from Bio import SeqIO
+        return [(record.id, record.description, str(record.seq)) for record in SeqIO.parse(filepath, "fasta")]
+    if engine != 'native':
+        raise ValueError(f"Unknown FASTA engine: {engine}. Choose from {', '.join(FASTA_ENGINES)}")
+
+    records = index_fasta_records(filepath)
+    if not records:
+        return []
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return [
+            (record['id'], record['description'], data[record['start']:record['end']].translate(None, FASTA_WHITESPACE).decode('ascii'))
+            for record in records
+        ]
+
+
+def read_fasta_records(filepath: str, engine: str = 'native') -> dict:
+    """Read an encoded FASTA file: main DNA sequence plus its auxiliary records.
+
+    Auxiliary records are recognized by the suffix of their id
+    (``_metadata``, ``_filename``, ``_patches``, ``_header``). The codec comes from the
+    ``codec=<name>`` field of the main header line; files written before it
+    was recorded are 'patch' if they carry a patch record, else 'mapped'.
+
+    Args:
+        filepath (str): Path to the FASTA file.
+        engine (str): FASTA parser, 'native' or 'biopython' (see ``parse_fasta``).
 
+    Returns:
+        dict: ``sequence`` (str), ``metadata`` (list[int], empty if absent),
+        ``filename`` (str or None), ``patches`` (list of (position, base) or None)
+        ``codec`` (str) and ``header`` (ArchiveHeader or None for files written without one).
+    """
+    from dnaio.file_writer import decode_metadata_blocks, decode_metadata_constraint_aware, decode_metadata_sparse, decode_filename_from_dna
+    from decoder import dna_to_patches
+
+    records = parse_fasta(filepath, engine)
+
+    if len(records) < 1:
+        raise ValueError("FASTA file must contain at least one DNA sequence")
+
+    # First record is the main DNA sequence
+    _, description, sequence = records[0]
+    result = {'sequence': sequence, 'metadata': [], 'filename': None, 'patches': None, 'header': None}
+    fields = dict(item.split('=', 1) for item in description.split()[1:] if '=' in item)
+
+    metadata = None
+    for record_id, description, sequence in records[1:]:
+        if record_id.endswith('_metadata'):
+            metadata = (description.split(), sequence)
+        elif record_id.endswith('_filename'):
+            result['filename'] = decode_filename_from_dna(sequence)
+        elif record_id.endswith('_patches'):
+            result['patches'] = dna_to_patches(sequence)
+        elif record_id.endswith('_header'):
+            result['header'] = ArchiveHeader.from_record(sequence)
+
+    if metadata is not None:
+        encoding, sequence = metadata
+        if 'encoding=sparse-blocks' in encoding:
+            # The block index is in the archive header, which follows the metadata record
+            if result['header'] is None or result['header'].metadata_index is None:
+                raise ValueError("Block-packed metadata record without a metadata index in the archive header")
+            result['metadata'] = decode_metadata_blocks(sequence, result['header'].metadata_index)
+        elif 'encoding=sparse' in encoding:
+            result['metadata'] = decode_metadata_sparse(sequence)
+        else:
+            # Files written before the sparse metadata codec
+            result['metadata'] = decode_metadata_constraint_aware(sequence)
 
-def read_docx_file(filepath: str) -> bytes:
-    """Read a .docx file and return its contents as bytes.
+    result['codec'] = fields.get('codec', 'patch' if result['patches'] is not None else 'mapped')
+    if result['header'] is not None:
+        result['codec'] = result['header'].codec
+        result['filename'] = result['filename'] or result['header'].filename
+    return result
+
+
+def index_fasta_records(filepath: str) -> list[dict]:
+    """Locate the records of a FASTA file without loading their sequences.
 
     Args:
-        filepath (str): Path to the .docx file.
+        filepath (str): Path to the FASTA file.
 
     Returns:
-        bytes: File contents as bytes (preserves original DOCX structure).
+        list[dict]: One entry per record with ``id``, ``description`` (the full
+        title line, as in Biopython) and the byte range ``start``/``end`` of
+        its sequence lines.
     """
-    # Read the DOCX file as binary to preserve its structure for file type detection
+    records = []
+    starts = []
     with open(filepath, 'rb') as f:
-        return f.read()
+        offset = 0
+        previous = b'\n'
+        while block := f.read(FASTA_READ_SIZE):
+            # A record starts at every '>' that follows a line break
+            position = -1
+            if previous == b'\n' and block[:1] == b'>':
+                starts.append(offset)
+                position = 0
+            while (position := block.find(b'\n>', position + 1)) != -1:
+                starts.append(offset + position + 1)
+            previous = block[-1:]
+            offset += len(block)
+        for index, start in enumerate(starts):
+            f.seek(start)
+            title_line = f.readline()
+            title = title_line[1:].decode('utf-8').strip()
+            end = starts[index + 1] if index + 1 < len(starts) else offset
+            records.append({'id': title.split(None, 1)[0] if title else '', 'description': title, 'start': min(start + len(title_line), end), 'end': end})
+    return records
 
 
-def read_mp3_file(filepath: str) -> bytes:
-    """Read an .mp3 file and return its contents as bytes.
+def iter_record_sequence(filepath: str, record: dict, chunk_size: int):
+    """Read the sequence of an indexed FASTA record in fixed-size chunks.
+
+    Line breaks and other whitespace are removed, so every chunk except the
+    last holds exactly ``chunk_size`` characters.
 
     Args:
-        filepath (str): Path to the .mp3 file.
+        filepath (str): Path to the FASTA file.
+        record (dict): Entry returned by ``index_fasta_records``.
+        chunk_size (int): Number of sequence characters per chunk.
+
+    Yields:
+        bytes: Consecutive sequence chunks.
+    """
+    buffer = bytearray()
+    with open(filepath, 'rb') as f:
+        f.seek(record['start'])
+        remaining = record['end'] - record['start']
+        while remaining > 0:
+            block = f.read(min(FASTA_READ_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            buffer += block.translate(None, b' \t\r\n')
+            # Hand out whole chunks by offset and drop them from the buffer once per read
+            position = 0
+            while len(buffer) - position >= chunk_size:
+                yield bytes(buffer[position:position + chunk_size])
+                position += chunk_size
+            del buffer[:position]
+    if buffer:
+        yield bytes(buffer)
+
+
+def read_record_range(filepath: str, record: dict, start: int, stop: int) -> bytes:
+    """Read sequence characters ``start:stop`` of an indexed FASTA record.
+
+    Like a samtools ``.fai`` lookup, the line layout is taken from the first
+    line and the read seeks straight to the line holding ``start``, so this
+    assumes lines of equal width (as written by ``FastaStreamWriter``). Records
+    that do not follow that layout are read sequentially instead.
+
+    Args:
+        filepath (str): Path to the FASTA file.
+        record (dict): Entry returned by ``index_fasta_records``.
+        start (int): First sequence character.
+        stop (int): End of the range (exclusive); clamped to the record.
 
     Returns:
-        bytes: File contents as bytes.
+        bytes: The sequence characters, without line breaks.
     """
+    if stop <= start:
+        return b''
     with open(filepath, 'rb') as f:
-        return f.read()
+        f.seek(record['start'])
+        first_line = f.readline(max(0, record['end'] - record['start']))
+        width = len(first_line.rstrip(FASTA_WHITESPACE))
+        if width:
+            line = len(first_line)
+            offset = record['start'] + start // width * line + start % width
+            span = (stop - 1) // width * line + (stop - 1) % width + 1 - (start // width * line + start % width)
+            f.seek(offset)
+            data = f.read(max(0, min(span, record['end'] - offset)))
+            sequence = data.translate(None, FASTA_WHITESPACE)
+            # Lines not followed by a full line break mean the layout is not uniform
+            if b'>' not in data and (len(sequence) == stop - start or offset + len(data) >= record['end']):
+                return sequence
+    skipped = 0
+    parts = []
+    for chunk in iter_record_sequence(filepath, record, FASTA_READ_SIZE):
+        if skipped + len(chunk) > start:
+            parts.append(chunk[max(0, start - skipped):stop - skipped])
+        skipped += len(chunk)
+        if skipped >= stop:
+            break
+    return b''.join(parts)
 
 
 def read_fasta_with_metadata(filepath: str) -> tuple[str, list[int], str]:
@@ -51,55 +241,112 @@ def read_fasta_with_metadata(filepath: str) -> tuple[str, list[int], str]:
     Returns:
         tuple[str, list[int], str]: Main DNA sequence, metadata list, and original filename.
     """
-    from Bio import SeqIO
-    from dnaio.file_writer import decode_metadata_constraint_aware, decode_filename_from_dna
-    
-    records = list(SeqIO.parse(filepath, "fasta"))
-    
-    if len(records) < 1:
-        raise ValueError("FASTA file must contain at least one DNA sequence")
-    
-    # First record is the main DNA sequence
-    main_dna = str(records[0].seq)
-    
-    # Second record (if present) - check if it's metadata or filename
-    metadata = []
-    original_filename = None
-    
-    if len(records) >= 2:
-        second_record_id = records[1].id
-        if second_record_id.endswith('_metadata'):
-            # Second record is metadata
-            metadata_dna = str(records[1].seq)
-            metadata = decode_metadata_constraint_aware(metadata_dna)
-            
-            # Third record (if present) is the original filename
-            if len(records) >= 3:
-                filename_dna = str(records[2].seq)
-                original_filename = decode_filename_from_dna(filename_dna)
-        elif second_record_id.endswith('_filename'):
-            # Second record is filename (no metadata)
-            filename_dna = str(records[1].seq)
-            original_filename = decode_filename_from_dna(filename_dna)
-    
-    return main_dna, metadata, original_filename
+    records = read_fasta_records(filepath)
+    return records['sequence'], records['metadata'], records['filename']
+
+
+# Input name standing for standard input; every file type is read raw
+STDIN = '-'
+
+
+def map_file(filepath: str) -> memoryview:
+    """Memory-map a file read-only and return a zero-copy view of it."""
+    with open(filepath, 'rb') as f:
+        return _map_open_file(f)
+
+
+def _map_open_file(f) -> memoryview:
+    """Map an open regular file from its current position; the file is consumed like ``read()``."""
+    position = f.tell()
+    size = os.fstat(f.fileno()).st_size
+    f.seek(max(size, position))
+    if size <= position:
+        return memoryview(b'')
+    # The view keeps the map alive; the map stays valid after the file is closed
+    return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))[position:]
+
+
+def _is_regular_file(f) -> bool:
+    """Whether an open file object is backed by a regular file that can be mapped."""
+    if not isinstance(f, (io.FileIO, io.BufferedReader, io.BufferedRandom)):
+        return False
+    try:
+        return stat.S_ISREG(os.fstat(f.fileno()).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
+def input_name(source) -> Optional[str]:
+    """Filename of an input (a path, ``STDIN`` or a file object), or None if it has none."""
+    if isinstance(source, (str, os.PathLike)):
+        return None if source == STDIN else os.path.basename(source)
+    name = getattr(source, 'name', None)
+    return os.path.basename(name) if isinstance(name, str) and not name.startswith('<') else None
+
+
+def read_input(source) -> memoryview:
+    """Read an input to encode, without copying it where possible.
+
+    Args:
+        source: A path (any file type), ``STDIN`` ('-'), or an open binary file
+            object such as ``UploadFile.file``, read from its current position.
+
+    Returns:
+        memoryview: The input bytes. Regular files are memory-mapped, in-memory
+        buffers (``io.BytesIO``) are exposed directly (the buffer cannot be
+        resized or closed until the view is released), and pipes and other
+        streams are read into memory once, never into a temporary file. A
+        ``tempfile.SpooledTemporaryFile`` (what ``UploadFile.file`` is) is
+        rolled over to disk, which copies at most its small in-memory spool,
+        and mapped like a regular file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if source == STDIN:
+            return read_input(sys.stdin.buffer)
+        return map_file(source)
+    if isinstance(source, tempfile.SpooledTemporaryFile):
+        # fileno() rolls the spool over to disk; the map then outlives the upload being closed
+        source.fileno()
+        return _map_open_file(source)
+    if isinstance(source, io.BytesIO):
+        view = source.getbuffer()[source.tell():]
+        source.seek(0, io.SEEK_END)
+        return view
+    if _is_regular_file(source):
+        return _map_open_file(source)
+    return memoryview(source.read())
+
+
+def iter_file_chunks(source, chunk_size: int):
+    """Read an input in fixed-size chunks.
+
+    Args:
+        source: A path (any file type), ``STDIN`` ('-') or an open binary file object.
+        chunk_size (int): Number of bytes per chunk (the last one may be shorter).
+
+    Yields:
+        bytes: Consecutive chunks of the input.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if source == STDIN:
+            yield from iter_file_chunks(sys.stdin.buffer, chunk_size)
+            return
+        with open(source, 'rb') as f:
+            yield from iter_file_chunks(f, chunk_size)
+        return
+    while chunk := source.read(chunk_size):
+        yield chunk
+
 
+def convert_file_to_binary(filepath) -> bytes:
+    """Read an input of any file type as bytes.
 
-def convert_file_to_binary(filepath: str) -> bytes:
-    """Detect file type and convert the file to a binary bitstream.
+    Use ``read_input`` to get a zero-copy view instead.
 
     Args:
-        filepath (str): Path to the input file.
+        filepath: Path to the input file, ``STDIN`` or an open binary file object.
 
     Returns:
         bytes: File contents as a binary bitstream.
     """
-    ext = os.path.splitext(filepath)[1].lower()
-    if ext == '.txt':
-        return read_txt_file(filepath)
-    elif ext == '.docx':
-        return read_docx_file(filepath)
-    elif ext == '.mp3':
-        return read_mp3_file(filepath)
-    else:
-        raise ValueError(f"Unsupported file type: {ext}") 
\ No newline at end of file
+    return bytes(read_input(filepath))
@@ -1,6 +1,8 @@
-from Bio.Seq import Seq
-from Bio.SeqRecord import SeqRecord
-from Bio import SeqIO
+import lzma
+import zlib
+from dataclasses import replace
+
+import numpy as np
 from encoder.base_mapping import base4_to_dna
 
 def write_txt(filepath: str, dna_sequence: str) -> None:
@@ -60,6 +62,311 @@ def decode_metadata_constraint_aware(metadata_dna: str) -> list[int]:
     return metadata
 
 
+METADATA_FORMAT_VERSION = 1
+METADATA_RAW, METADATA_ZLIB, METADATA_LZMA = 0, 1, 2
+LZMA_FILTERS = [{'id': lzma.FILTER_LZMA2}]
+FASTA_LINE_WIDTH = 60
+FASTA_WRITE_BUFFER = 1 << 22
+# Offsets per independently packed block of a FASTA metadata record
+METADATA_BLOCK = 1 << 20
+# Varint bytes decoded per step by iter_unpacked_metadata
+METADATA_DECOMPRESS_LIMIT = 1 << 18
+
+
+def _append_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _sparse_body(offsets, pending: int = 0) -> tuple[bytearray, int]:
+    """Varint-encode the non-zero offsets of a chunk.
+
+    Args:
+        offsets: Offsets (0-3) as a list or array.
+        pending (int): Zero offsets carried over from previous chunks.
+
+    Returns:
+        tuple[bytearray, int]: Varint body and the zero offsets left pending after the chunk.
+    """
+    offsets = np.asarray(offsets, dtype=np.uint8)
+    positions = np.flatnonzero(offsets)
+    if not len(positions):
+        return bytearray(), pending + len(offsets)
+    gaps = (np.diff(positions, prepend=-1) - 1).astype(np.uint64)
+    gaps[0] += np.uint64(pending)
+    values = (gaps << np.uint64(2)) | offsets[positions]
+    return bytearray(_varint_array(values)), len(offsets) - int(positions[-1]) - 1
+
+
+def _varint_array(values: np.ndarray) -> bytes:
+    """Vectorized ``_append_varint`` over a uint64 array."""
+    sizes = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 64, 7):
+        sizes += values >= np.uint64(1 << shift)
+    ends = np.cumsum(sizes)
+    starts = ends - sizes
+    out = np.empty(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    for k in range(int(sizes.max(initial=0))):
+        mask = sizes > k
+        chunk = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (sizes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[mask] + k] = (chunk | more).astype(np.uint8)
+    return out.tobytes()
+
+
+def pack_metadata(metadata) -> bytes:
+    """Losslessly compress a metadata offset stream.
+
+    Only non-zero offsets are stored: each as a varint of ``gap << 2 | offset``,
+    where gap counts the zero offsets before it, followed by a terminating
+    varint ``trailing_zeros << 2``. The varint body is then deflated with zlib
+    or lzma when that makes it smaller. The first two bytes hold the format
+    version and the compression method.
+
+    Args:
+        metadata: Offsets (0-3) as a list or array.
+
+    Returns:
+        bytes: Packed metadata.
+    """
+    body, trailing = _sparse_body(metadata)
+    _append_varint(body, trailing << 2)
+
+    candidates = [
+        (METADATA_RAW, bytes(body)),
+        (METADATA_ZLIB, zlib.compress(body, 9)),
+        (METADATA_LZMA, lzma.compress(body, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)),
+    ]
+    method, payload = min(candidates, key=lambda candidate: len(candidate[1]))
+    return bytes([METADATA_FORMAT_VERSION, method]) + payload
+
+
+def pack_metadata_blocks(metadata, block_size: int = METADATA_BLOCK) -> tuple[bytes, list[int]]:
+    """Pack metadata as independent ``pack_metadata`` streams of ``block_size`` offsets each.
+
+    Any block can then be unpacked on its own, as in the .dnab container.
+
+    Returns:
+        tuple[bytes, list[int]]: The concatenated streams and the length of each.
+    """
+    metadata = np.asarray(metadata, dtype=np.uint8)
+    blocks = [pack_metadata(metadata[start:start + block_size]) for start in range(0, max(len(metadata), 1), block_size)]
+    return b''.join(blocks), [len(block) for block in blocks]
+
+
+class MetadataBlockPacker:
+    """Incremental ``pack_metadata_blocks`` for offset streams that arrive in chunks.
+
+    Attributes:
+        lengths (list[int]): Length of every block packed so far.
+    """
+
+    def __init__(self, block_size: int = METADATA_BLOCK):
+        self.block_size = block_size
+        self.lengths = []
+        self._pending = np.empty(0, dtype=np.uint8)
+
+    def _pack(self, offsets) -> bytes:
+        packed = pack_metadata(offsets)
+        self.lengths.append(len(packed))
+        return packed
+
+    def feed(self, offsets) -> bytes:
+        """Add the next chunk of offsets and return the blocks completed by it."""
+        data = np.concatenate((self._pending, np.asarray(offsets, dtype=np.uint8)))
+        full = len(data) - len(data) % self.block_size
+        self._pending = data[full:]
+        return b''.join(self._pack(data[start:start + self.block_size]) for start in range(0, full, self.block_size))
+
+    def finish(self) -> bytes:
+        """Pack the last, partial block (the only block of an empty stream)."""
+        if len(self._pending) or not self.lengths:
+            return self._pack(self._pending)
+        return b''
+
+
+def unpack_metadata(data: bytes):
+    """Reverse ``pack_metadata``.
+
+    Args:
+        data (bytes): Packed metadata.
+
+    Returns:
+        np.ndarray: uint8 array of offsets.
+
+    Raises:
+        ValueError: If the data is truncated or uses an unknown version/method.
+    """
+    if len(data) < 2 or data[0] != METADATA_FORMAT_VERSION:
+        raise ValueError("Unsupported metadata format")
+    method, payload = data[1], data[2:]
+    if method == METADATA_ZLIB:
+        payload = zlib.decompress(payload)
+    elif method == METADATA_LZMA:
+        payload = lzma.decompress(payload, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)
+    elif method != METADATA_RAW:
+        raise ValueError(f"Unknown metadata compression method: {method}")
+
+    positions = []
+    values = []
+    position = value = shift = 0
+    for byte in payload:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte & 0x80:
+            continue
+        position += value >> 2
+        if value & 3 == 0:
+            break
+        positions.append(position)
+        values.append(value & 3)
+        position += 1
+        value = shift = 0
+    else:
+        raise ValueError("Truncated metadata stream")
+    offsets = np.zeros(position, dtype=np.uint8)
+    offsets[positions] = values
+    return offsets
+
+
+def _decompress_stream(method: int, chunks, limit: int):
+    """Decompress a packed metadata payload chunk by chunk, at most ``limit`` bytes at a time."""
+    if method == METADATA_RAW:
+        yield from chunks
+        return
+    if method == METADATA_ZLIB:
+        decompressor = zlib.decompressobj()
+        for chunk in chunks:
+            data = decompressor.decompress(chunk, limit)
+            yield data
+            while decompressor.unconsumed_tail:
+                yield decompressor.decompress(decompressor.unconsumed_tail, limit)
+        yield decompressor.flush()
+    elif method == METADATA_LZMA:
+        decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)
+        for chunk in chunks:
+            yield decompressor.decompress(chunk, limit)
+            while not decompressor.eof and not decompressor.needs_input:
+                yield decompressor.decompress(b'', limit)
+    else:
+        raise ValueError(f"Unknown metadata compression method: {method}")
+
+
+def iter_unpacked_metadata(packed_chunks, block_size: int = 1 << 20):
+    """Streaming ``unpack_metadata``.
+
+    Args:
+        packed_chunks: Iterable of bytes making up a packed metadata stream.
+        block_size (int): Maximum number of offsets per yielded array.
+
+    Yields:
+        np.ndarray: Consecutive uint8 arrays of offsets.
+
+    Raises:
+        ValueError: If the stream is truncated or uses an unknown version/method.
+    """
+    packed_chunks = iter(packed_chunks)
+    header = b''
+    for chunk in packed_chunks:
+        header += chunk
+        if len(header) >= 2:
+            break
+    if len(header) < 2 or header[0] != METADATA_FORMAT_VERSION:
+        raise ValueError("Unsupported metadata format")
+
+    def payload():
+        yield header[2:]
+        yield from packed_chunks
+
+    carry = np.empty(0, dtype=np.uint8)
+    pending = 0
+    for data in _decompress_stream(header[1], payload(), METADATA_DECOMPRESS_LIMIT):
+        data = np.concatenate((carry, np.frombuffer(data, dtype=np.uint8)))
+        ends = np.flatnonzero(data < 0x80)
+        if not len(ends):
+            carry = data
+            continue
+        carry = data[ends[-1] + 1:]
+        data = data[:ends[-1] + 1]
+        # Index of each byte within its varint, then sum the 7-bit groups
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        index = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+        groups = (data & 0x7F).astype(np.uint64) << (np.uint64(7) * index.astype(np.uint64))
+        values = np.add.reduceat(groups, starts)
+        terminator = np.flatnonzero(values & np.uint64(3) == 0)
+        if len(terminator):
+            values = values[:terminator[0] + 1]
+        gaps = (values >> np.uint64(2)).astype(np.int64)
+        gaps[0] += pending
+        offsets = (values & np.uint64(3)).astype(np.uint8)
+        # Position after each (gap, offset) pair; the terminator emits zeros only
+        ends = np.cumsum(gaps + (offsets > 0))
+        total = int(ends[-1])
+        positions = ends[offsets > 0] - 1
+        values_set = offsets[offsets > 0]
+        if len(terminator):
+            for start in range(0, total, block_size):
+                block = np.zeros(min(block_size, total - start), dtype=np.uint8)
+                low, high = np.searchsorted(positions, [start, start + len(block)])
+                block[positions[low:high] - start] = values_set[low:high]
+                yield block
+            return
+        # Hold back the zeros of a gap still in progress: everything after the last offset
+        last = int(positions[-1]) + 1 if len(positions) else 0
+        for start in range(0, last, block_size):
+            block = np.zeros(min(block_size, last - start), dtype=np.uint8)
+            low, high = np.searchsorted(positions, [start, start + len(block)])
+            block[positions[low:high] - start] = values_set[low:high]
+            yield block
+        pending = total - last
+    raise ValueError("Truncated metadata stream")
+
+
+def encode_metadata_sparse(metadata) -> str:
+    """Encode metadata as compressed, homopolymer-free DNA.
+
+    The offsets are packed with ``pack_metadata`` and the bytes are written
+    with the rotating code, so decoding is always exact.
+    """
+    from encoder.rotating import base4_to_rotating_dna
+    from encoder.base_mapping import bytes_to_base4_array
+    return base4_to_rotating_dna(bytes_to_base4_array(pack_metadata(metadata)))
+
+
+def decode_metadata_sparse(metadata_dna: str) -> list[int]:
+    """Decode metadata DNA written by ``encode_metadata_sparse``."""
+    from decoder import base4_array_to_bytes, rotating_dna_to_base4_array
+    return unpack_metadata(base4_array_to_bytes(rotating_dna_to_base4_array(metadata_dna)).tobytes()).tolist()
+
+
+def encode_metadata_blocks(metadata, block_size: int = METADATA_BLOCK) -> tuple[str, list[int]]:
+    """Encode metadata like ``encode_metadata_sparse``, packed in blocks by ``pack_metadata_blocks``.
+
+    Returns:
+        tuple[str, list[int]]: The metadata DNA and the packed length of every block.
+    """
+    from encoder.rotating import base4_to_rotating_dna
+    from encoder.base_mapping import bytes_to_base4_array
+    packed, lengths = pack_metadata_blocks(metadata, block_size)
+    return base4_to_rotating_dna(bytes_to_base4_array(packed)), lengths
+
+
+def decode_metadata_blocks(metadata_dna: str, lengths: list[int]) -> list[int]:
+    """Decode metadata DNA written by ``encode_metadata_blocks``."""
+    from decoder import base4_array_to_bytes, rotating_dna_to_base4_array
+    packed = base4_array_to_bytes(rotating_dna_to_base4_array(metadata_dna)).tobytes()
+    ends = np.cumsum(lengths)
+    return np.concatenate([unpack_metadata(packed[end - length:end]) for end, length in zip(ends, lengths)]).tolist()
+
+
+def encode_filename(original_filename: str) -> str:
+    """Encode a filename as base64 text for the ``_filename`` record."""
+    import base64
+    return base64.b64encode(original_filename.encode('utf-8')).decode('ascii')
+
+
 def decode_filename_from_dna(filename_dna: str) -> str:
     """Decode filename from base64 encoding."""
     # Decode from base64
@@ -71,8 +378,60 @@ def decode_filename_from_dna(filename_dna: str) -> str:
         return None
 
 
-def write_fasta(filepath: str, dna_sequence: str, header: str = "DNA_Sequence", metadata: list[int] = None, original_filename: str = None) -> None:
-    """Write a DNA sequence (and optional metadata) to a .fasta file using Biopython.
+class FastaStreamWriter:
+    """Write FASTA records whose sequences arrive in chunks.
+
+    Sequence lines are wrapped at ``width`` columns, like Biopython's writer,
+    so only a partial line is ever buffered; a width of 0 writes each
+    sequence on a single line.
+
+    Args:
+        handle: Binary file object to write to.
+        width (int): Line width for sequence data (0 for no wrapping).
+    """
+
+    def __init__(self, handle, width: int = FASTA_LINE_WIDTH):
+        self.handle = handle
+        self.width = width
+        self._line = b''
+        self._open = False
+        self._unterminated = False
+
+    def begin(self, record_id: str, description: str = '') -> None:
+        """Finish the current record, if any, and start a new one."""
+        self.end()
+        title = f"{record_id} {description}" if description else record_id
+        self.handle.write(f">{title}\n".encode('ascii'))
+        self._open = True
+
+    def write(self, sequence) -> None:
+        """Append sequence data (str or ASCII bytes) to the current record."""
+        if isinstance(sequence, str):
+            sequence = sequence.encode('ascii')
+        if not self.width:
+            self.handle.write(sequence)
+            self._unterminated = self._unterminated or bool(sequence)
+            return
+        data = self._line + sequence
+        full = len(data) - len(data) % self.width
+        # Append a line break to every full line in one array operation
+        lines = np.empty((full // self.width, self.width + 1), dtype=np.uint8)
+        lines[:, :self.width] = np.frombuffer(data, dtype=np.uint8, count=full).reshape(-1, self.width)
+        lines[:, self.width] = ord('\n')
+        self.handle.write(lines.tobytes())
+        self._line = data[full:]
+
+    def end(self) -> None:
+        """Flush the partial last line of the current record."""
+        if self._open and (self._line or self._unterminated):
+            self.handle.write(self._line + b'\n')
+        self._line = b''
+        self._open = False
+        self._unterminated = False
+
+
+def write_fasta(filepath: str, dna_sequence: str, header: str = "DNA_Sequence", metadata: list[int] = None, original_filename: str = None, patches: list[tuple[int, str]] = None, codec: str = None, line_width: int = FASTA_LINE_WIDTH, engine: str = 'native', archive_header=None) -> None:
+    """Write a DNA sequence (and optional metadata) to a .fasta file.
     
     Args:
         filepath (str): Path to the output FASTA file.
@@ -80,31 +439,57 @@ def write_fasta(filepath: str, dna_sequence: str, header: str = "DNA_Sequence",
         header (str): Header for the main DNA sequence.
         metadata (list[int], optional): Metadata bitstream to encode as DNA and include in the file.
         original_filename (str, optional): Original filename to preserve for decoding.
+        patches (list[tuple[int, str]], optional): Repair patch list ('patch' codec), written as its own record.
+        codec (str, optional): Mapping codec, recorded as ``codec=<name>`` in the main record's header line.
+        line_width (int): Sequence line width; 0 writes every sequence on one line (native engine only).
+        engine (str): 'native' (buffered in-house writer) or 'biopython'.
+        archive_header (ArchiveHeader, optional): Self-describing header, written as the last record.
+            With it, the metadata is packed in blocks indexed by the header's ``metadata_index``.
+
+    Raises:
+        ValueError: If the engine is unknown.
     """
-    from Bio.Seq import Seq
-    from Bio.SeqRecord import SeqRecord
-    from Bio import SeqIO
-    
     records = []
     
     # Add the main DNA sequence
-    main_record = SeqRecord(Seq(dna_sequence), id=header, description="")
-    records.append(main_record)
+    records.append((header, f"codec={codec}" if codec else "", dna_sequence))
     
     # Add metadata as DNA sequence if provided
-    if metadata is not None:
-        # Encode metadata using constraint-aware mapping
-        metadata_dna = encode_metadata_constraint_aware(metadata)
-        metadata_record = SeqRecord(Seq(metadata_dna), id=f"{header}_metadata", description="")
-        records.append(metadata_record)
+    if metadata is not None and archive_header is not None:
+        # Compressed in independent blocks, indexed by the archive header for random access
+        metadata_dna, lengths = encode_metadata_blocks(metadata)
+        archive_header = replace(archive_header, metadata_block=METADATA_BLOCK, metadata_index=lengths)
+        records.append((f"{header}_metadata", "encoding=sparse-blocks", metadata_dna))
+    elif metadata is not None:
+        # Encode metadata as a compressed sparse stream wrapped in the rotating code
+        records.append((f"{header}_metadata", "encoding=sparse", encode_metadata_sparse(metadata)))
+    
+    # Add the repair patch list (possibly empty) for sequences encoded with the 'patch' codec
+    if patches is not None:
+        from encoder.patches import patches_to_dna
+        records.append((f"{header}_patches", "", patches_to_dna(patches)))
     
     # Add original filename as a separate record if provided
     if original_filename is not None:
         # Encode filename as base64 to ensure ASCII compatibility
-        import base64
-        filename_bytes = original_filename.encode('utf-8')
-        filename_b64 = base64.b64encode(filename_bytes).decode('ascii')
-        filename_record = SeqRecord(Seq(filename_b64), id=f"{header}_filename", description="")
-        records.append(filename_record)
-    
-    SeqIO.write(records, filepath, "fasta") 
\ No newline at end of file
+        records.append((f"{header}_filename", "", encode_filename(original_filename)))
+
+    # Add the self-describing archive header last, where decoders look for it first
+    if archive_header is not None:
+        records.append((f"{header}_header", "encoding=base64", archive_header.to_record()))
+
+    if engine == 'biopython':
+        from Bio.Seq import Seq
+        from Bio.SeqRecord import SeqRecord
+        from Bio import SeqIO
+        SeqIO.write([SeqRecord(Seq(sequence), id=record_id, description=description) for record_id, description, sequence in records], filepath, "fasta")
+        return
+    if engine != 'native':
+        raise ValueError(f"Unknown FASTA engine: {engine}. Choose from native, biopython")
+
+    with open(filepath, 'wb', buffering=FASTA_WRITE_BUFFER) as handle:
+        writer = FastaStreamWriter(handle, line_width)
+        for record_id, description, sequence in records:
+            writer.begin(record_id, description)
+            writer.write(sequence)
+        writer.end()
@@ -0,0 +1,60 @@
+"""Locating the archive header in FASTA files and containers.
+
+The header (``encoder.header.ArchiveHeader``) is the ``<id>_header`` record
+of a FASTA file (base64 of compact JSON, written last so streaming encoders
+can fill in the length and hash); in containers it is the ``header`` record.
+``read_archive_header`` fetches it without touching the payload: for FASTA
+only the tail of the file is read.
+"""
+
+import os
+from typing import Optional
+
+from encoder.header import ArchiveHeader
+
+HEADER_SUFFIX = '_header'
+# Bytes read from the end of a FASTA file when looking for the header record
+HEADER_TAIL_SIZE = 1 << 16
+
+
+def _header_from_fasta_tail(filepath: str) -> Optional[ArchiveHeader]:
+    size = os.path.getsize(filepath)
+    with open(filepath, 'rb') as f:
+        f.seek(max(0, size - HEADER_TAIL_SIZE))
+        tail = f.read()
+    position = len(tail)
+    while (position := tail.rfind(b'>', 0, position)) != -1:
+        if position and tail[position - 1:position] != b'\n':
+            continue
+        line_end = tail.find(b'\n', position)
+        title = tail[position + 1:line_end if line_end != -1 else len(tail)].split()
+        if title and title[0].endswith(HEADER_SUFFIX.encode('ascii')):
+            body = tail[line_end + 1:] if line_end != -1 else b''
+            next_record = body.find(b'\n>')
+            if next_record != -1:
+                body = body[:next_record]
+            return ArchiveHeader.from_record(body.translate(None, b' \t\r\n').decode('ascii'))
+    return None
+
+
+def read_archive_header(filepath: str) -> Optional[ArchiveHeader]:
+    """Read the header of a FASTA file or container without reading the payload.
+
+    Args:
+        filepath (str): Path to the archive.
+
+    Returns:
+        ArchiveHeader or None: The header, or None for files written without one.
+    """
+    from dnaio.container import DNAContainer, is_container
+    if is_container(filepath):
+        with DNAContainer(filepath) as container:
+            return container.header
+    header = _header_from_fasta_tail(filepath)
+    if header is None and os.path.getsize(filepath) > HEADER_TAIL_SIZE:
+        # Header record not at the end (e.g. rewritten by another tool): scan the index
+        from dnaio.file_reader import index_fasta_records, iter_record_sequence
+        for record in index_fasta_records(filepath):
+            if record['id'].endswith(HEADER_SUFFIX):
+                return ArchiveHeader.from_record(b''.join(iter_record_sequence(filepath, record, HEADER_TAIL_SIZE)).decode('ascii'))
+    return header
@@ -0,0 +1,73 @@
+"""Oligo pool files: one record per strand, as multi-record FASTA or CSV.
+
+FASTA pools have one unwrapped record per strand, ``>oligo_<address>``; CSV
+pools have an ``id,sequence`` header row. Record ids are only labels: the
+decoder reads every strand's address from the strand itself, so pools can
+be reordered, merged or filtered by other tools.
+"""
+
+import csv
+import os
+
+from dnaio.file_writer import FastaStreamWriter
+
+POOL_EXTENSIONS = ('.fasta', '.csv')
+OLIGO_ID_PREFIX = 'oligo'
+
+
+def write_oligo_pool(filepath: str, strands, prefix: str = OLIGO_ID_PREFIX) -> None:
+    """Write strands to a FASTA or CSV pool file.
+
+    Args:
+        filepath (str): Output path ending in .fasta or .csv.
+        strands: Iterable of strands.
+        prefix (str): Record id prefix; ids are ``<prefix>_<index>``.
+
+    Raises:
+        ValueError: If the extension is not supported.
+    """
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension not in POOL_EXTENSIONS:
+        raise ValueError(f"Oligo pool must be written as {' or '.join(POOL_EXTENSIONS)}")
+    if extension == '.csv':
+        with open(filepath, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'sequence'])
+            writer.writerows((f"{prefix}_{index}", strand) for index, strand in enumerate(strands))
+        return
+    with open(filepath, 'wb') as f:
+        writer = FastaStreamWriter(f, width=0)
+        for index, strand in enumerate(strands):
+            writer.begin(f"{prefix}_{index}")
+            writer.write(strand)
+        writer.end()
+
+
+def iter_oligo_pool(filepath: str):
+    """Yield the strands of a FASTA or CSV pool file, in file order.
+
+    CSV files use the ``sequence`` column, or the last column if there is none.
+    """
+    if filepath.lower().endswith('.csv'):
+        with open(filepath, newline='') as f:
+            rows = csv.reader(f)
+            header = next(rows, [])
+            column = header.index('sequence') if 'sequence' in header else None
+            if column is None and header:
+                # No header row: the first row is a strand already
+                yield header[-1]
+            for row in rows:
+                if row:
+                    yield row[-1] if column is None else row[column]
+        return
+    from dnaio.file_reader import parse_fasta
+    for _, _, sequence in parse_fasta(filepath):
+        yield sequence
+
+
+def is_oligo_pool(filepath: str) -> bool:
+    """Check whether a file is an oligo pool (a CSV file or a FASTA file of ``oligo_`` records)."""
+    if filepath.lower().endswith('.csv'):
+        return True
+    with open(filepath, 'rb') as f:
+        return f.read(len(OLIGO_ID_PREFIX) + 2) == f">{OLIGO_ID_PREFIX}_".encode('ascii')
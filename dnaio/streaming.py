@@ -0,0 +1,489 @@
+"""Constant-memory streaming encode and decode paths for FASTA files and containers.
+
+The input file is read in chunks whose size is a whole number of
+Reed-Solomon codewords (and rotating-code groups). Each chunk is
+error-corrected, mapped with state carried over from the previous chunk and
+appended to the output file straight away. One chunk of lookahead tells the
+mapper when it reaches the last digit, which needs the global GC check. The
+metadata offsets are packed block by block into a temporary spill file and
+copied into the metadata record at the end.
+
+Decoding reads the main record and the metadata record in lockstep from two
+positions in the same file, demaps a chunk of whole Reed-Solomon codewords
+at a time, corrects its damaged codewords (clean ones are found by a bulk
+syndrome check and only have their parity stripped) and writes the
+plaintext to the output immediately. The archive header (payload length and SHA-256) is
+written after the payload, so the encoder hashes the input as it goes and
+the decoder verifies the output the same way. Pre-compression (see
+``encoder.compression``) runs incrementally on both sides: the encoder
+compresses the input in independent blocks as it reads it, recording their
+sizes in the header, and the decoder decompresses each corrected chunk
+before writing it.
+"""
+
+import bisect
+import hashlib
+import itertools
+import os
+import tempfile
+from contextlib import ExitStack
+
+import numpy as np
+
+from codec.rotating import GROUP_DIGITS, GROUP_TRITS
+from decoder import (
+    InvalidBaseError,
+    base4_array_to_bytes,
+    dna_to_base4_array,
+    dna_to_patches,
+    rotating_dna_to_base4_array,
+)
+from encoder.base_mapping import bytes_to_base4_array, check_codec
+from encoder.compression import COMPRESSION_BLOCK, BlockDecompressor, compress, resolve_compression, sample_file, sample_payload
+from encoder.constraints import DEFAULT_SPEC, ConstraintAnalyzer, ConstraintReport, ConstraintSpec
+from encoder.ecc import DecodeReport, UncorrectableCodewordError, rs_decode_blocks
+from encoder.error_correction import add_reed_solomon
+from encoder.header import ArchiveHeader
+from encoder.mapper import ConstraintMapper
+from encoder.parallel import CODEWORD_ALIGNMENT, DEFAULT_BLOCK_SIZE, RS_BLOCK_SIZE, block_size_for
+from encoder.rotating import RotatingEncoder
+from dnaio.container import CONTAINER_EXTENSION, ContainerWriter, DNAContainer, is_container
+from dnaio.file_reader import STDIN, index_fasta_records, input_name, iter_file_chunks, iter_record_sequence, read_record_range
+from dnaio.file_writer import (
+    FastaStreamWriter,
+    MetadataBlockPacker,
+    decode_filename_from_dna,
+    encode_filename,
+    iter_unpacked_metadata,
+    unpack_metadata,
+)
+
+STREAM_CODECS = ('mapped', 'rotating')
+SPILL_CHUNK_SIZE = 1 << 20
+FASTA_RECORD_CHUNK = 1 << 20
+
+
+def _with_lookahead(chunks):
+    """Yield (chunk, is_last) pairs."""
+    previous = None
+    for chunk in chunks:
+        if previous is not None:
+            yield previous, False
+        previous = chunk
+    if previous is not None:
+        yield previous, True
+
+
+def _compressed_chunks(chunks, method: str, sizes: list):
+    """Compress a stream of byte chunks in independent blocks, appending each block's size to ``sizes``."""
+    for block in _rechunk(chunks, COMPRESSION_BLOCK):
+        packed = compress(block, method)
+        sizes.append(len(packed))
+        yield packed
+
+
+def encode_file_streaming(input_file: str, output_file: str, nsym: int = 10, spec: ConstraintSpec = DEFAULT_SPEC, codec: str = 'mapped', chunk_size: int = DEFAULT_BLOCK_SIZE, header: str = "DNA_Sequence", compression: str = 'none') -> ConstraintReport:
+    """Encode a file to FASTA, a binary container or plain .txt with bounded memory.
+
+    Args:
+        input_file: Path to the input file (any type), ``STDIN`` ('-') or an open binary file object.
+        output_file (str): Path to the output .fasta, .dnab or .txt file.
+        nsym (int): Number of Reed-Solomon error correction symbols.
+        spec (ConstraintSpec): Constraints to respect.
+        codec (str): 'mapped' or 'rotating'.
+        chunk_size (int): Target number of input bytes per chunk; rounded with ``block_size_for``.
+        header (str): Id of the main FASTA record.
+        compression (str): One of ``COMPRESSION_CHOICES``; 'auto' decides
+            from a sample of the input file.
+
+    Returns:
+        ConstraintReport: Constraint analysis of the written sequence.
+
+    Raises:
+        ValueError: If the codec cannot be streamed or cannot respect ``spec``,
+            or the output type or the compression is unsupported.
+    """
+    if codec not in STREAM_CODECS:
+        # The 'patch' codec's GC repair pass needs the whole sequence
+        raise ValueError(f"Codec {codec!r} cannot be streamed. Choose from {', '.join(STREAM_CODECS)}")
+    check_codec(codec, spec)
+    if not output_file.endswith(('.fasta', '.txt', CONTAINER_EXTENSION)):
+        raise ValueError(f'Output file must be .txt, .fasta or {CONTAINER_EXTENSION}')
+    fasta = output_file.endswith('.fasta')
+    chunk_size = block_size_for(nsym, chunk_size)
+    filename = input_name(input_file)
+    chunks = iter_file_chunks(input_file, chunk_size)
+    sample = None
+    if compression == 'auto':
+        if isinstance(input_file, (str, os.PathLike)) and input_file != STDIN:
+            sample = sample_file(input_file)
+        else:
+            # Streams cannot seek: judge by the first chunk
+            first = next(chunks, b'')
+            sample = sample_payload(first)
+            chunks = itertools.chain([first], chunks)
+    method = resolve_compression(compression, sample, sample)
+    compressed_sizes = []
+    if method is not None:
+        chunks = _rechunk(_compressed_chunks(chunks, method, compressed_sizes), chunk_size)
+
+    analyzer = ConstraintAnalyzer(spec)
+    mapper = ConstraintMapper(spec)
+    rotating = RotatingEncoder()
+    packer = MetadataBlockPacker()
+    digest = hashlib.sha256()
+    payload_length = 0
+    with ExitStack() as stack:
+        if output_file.endswith(CONTAINER_EXTENSION):
+            container = stack.enter_context(ContainerWriter(output_file, codec, nsym, filename))
+            handle = writer = None
+        else:
+            container = None
+            handle = stack.enter_context(open(output_file, 'wb'))
+            writer = FastaStreamWriter(handle)
+        spill = stack.enter_context(tempfile.TemporaryFile())
+        if fasta:
+            writer.begin(header, f"codec={codec}")
+        for chunk, last in _with_lookahead(chunks):
+            digest.update(chunk)
+            payload_length += len(chunk)
+            digits = bytes_to_base4_array(add_reed_solomon(chunk, nsym=nsym))
+            if codec == 'mapped':
+                sequence, offsets = mapper.map(digits, final=last)
+                if container is not None:
+                    container.write_metadata(offsets)
+                else:
+                    spill.write(packer.feed(offsets))
+            else:
+                sequence = rotating.encode(digits)
+            analyzer.feed(bytes(sequence))
+            if container is not None:
+                container.write_sequence(bytes(sequence))
+                container.payload_length += len(chunk)
+            elif fasta:
+                writer.write(bytes(sequence))
+            else:
+                handle.write(sequence)
+
+        if fasta:
+            if codec == 'mapped':
+                spill.write(packer.finish())
+                spill.seek(0)
+                writer.begin(f"{header}_metadata", "encoding=sparse-blocks")
+                metadata = RotatingEncoder()
+                while block := spill.read(SPILL_CHUNK_SIZE):
+                    writer.write(metadata.encode(bytes_to_base4_array(block)))
+            if filename:
+                writer.begin(f"{header}_filename")
+                writer.write(encode_filename(filename))
+
+        archive_header = ArchiveHeader(
+            codec=codec, nsym=nsym, rs_block_size=RS_BLOCK_SIZE, payload_length=payload_length,
+            sha256=digest.hexdigest(), filename=filename, compression=method,
+        )
+        if method is not None:
+            archive_header.compression_block, archive_header.compressed_sizes = COMPRESSION_BLOCK, compressed_sizes
+        if fasta and codec == 'mapped':
+            archive_header.metadata_block, archive_header.metadata_index = packer.block_size, packer.lengths
+        if container is not None:
+            container.write_header(archive_header)
+        elif fasta:
+            writer.begin(f"{header}_header", "encoding=base64")
+            writer.write(archive_header.to_record())
+            writer.end()
+    return analyzer.report()
+
+
+class _OffsetReader:
+    """Hand out metadata offsets in the amounts the main record needs them."""
+
+    def __init__(self, arrays):
+        self._arrays = iter(arrays)
+        self._buffer = np.empty(0, dtype=np.uint8)
+
+    def read(self, count: int) -> np.ndarray:
+        parts = [self._buffer]
+        available = len(self._buffer)
+        while available < count:
+            array = next(self._arrays, None)
+            if array is None:
+                break
+            parts.append(array)
+            available += len(array)
+        data = np.concatenate(parts)
+        self._buffer = data[count:]
+        return data[:count]
+
+
+def _iter_metadata_offsets(filepath: str, record: dict, block_size: int, header: ArchiveHeader = None):
+    """Yield the offsets of a metadata record chunk by chunk.
+
+    Block-packed records need the ``metadata_index`` of the archive header.
+    """
+    encoding = record['description'].split()
+    if 'encoding=sparse' not in encoding and 'encoding=sparse-blocks' not in encoding:
+        # Files written before the sparse metadata codec: one base per offset
+        position = 0
+        for chunk in iter_record_sequence(filepath, record, block_size):
+            codes = dna_to_base4_array(chunk)
+            odd = (np.arange(position, position + len(codes)) & 1).astype(bool)
+            codes[odd] = (3 - codes[odd]) & 3
+            position += len(codes)
+            yield codes
+        return
+
+    def packed():
+        previous = 0
+        for chunk in iter_record_sequence(filepath, record, GROUP_TRITS * (block_size // GROUP_DIGITS or 1)):
+            yield base4_array_to_bytes(rotating_dna_to_base4_array(chunk, previous)).tobytes()
+            previous = int(dna_to_base4_array(chunk[-1:])[0])
+
+    if 'encoding=sparse-blocks' in encoding:
+        for block in _split_blocks(packed(), _metadata_index(header)):
+            yield from iter_unpacked_metadata([block], block_size)
+    else:
+        yield from iter_unpacked_metadata(packed(), block_size)
+
+
+def _metadata_index(header: ArchiveHeader) -> list:
+    """Packed block lengths of a block-packed metadata record."""
+    if header is None or header.metadata_index is None:
+        raise ValueError("Block-packed metadata record without a metadata index in the archive header")
+    return header.metadata_index
+
+
+def _split_blocks(chunks, lengths):
+    """Cut a stream of byte chunks into consecutive pieces of the given lengths."""
+    chunks = iter(chunks)
+    buffer = bytearray()
+    for length in lengths:
+        while len(buffer) < length:
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ValueError("Truncated metadata record")
+            buffer += chunk
+        yield bytes(buffer[:length])
+        del buffer[:length]
+
+
+def _read_packed_range(filepath: str, record: dict, begin: int, end: int) -> bytes:
+    """Return bytes ``begin:end`` of the packed stream held by a rotating-coded record.
+
+    Every 8 bytes are one 41-base group, so only the groups covering the range
+    are read, with the base before them to resume the rotation.
+    """
+    group_bytes = GROUP_DIGITS // 4
+    first = begin // group_bytes
+    base = first * GROUP_TRITS
+    chunk = read_record_range(filepath, record, max(base - 1, 0), -(-end // group_bytes) * GROUP_TRITS)
+    previous = 0
+    if base:
+        previous, chunk = int(dna_to_base4_array(chunk[:1])[0]), chunk[1:]
+    data = base4_array_to_bytes(rotating_dna_to_base4_array(chunk, previous)).tobytes()
+    return data[begin - first * group_bytes:end - first * group_bytes]
+
+
+def _read_record(filepath: str, record: dict) -> str:
+    """Read a small auxiliary record completely."""
+    return b''.join(iter_record_sequence(filepath, record, FASTA_RECORD_CHUNK)).decode('ascii')
+
+
+def _rechunk(chunks, size: int):
+    """Regroup byte chunks into pieces of exactly ``size`` bytes (the last may be shorter)."""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        # Hand out whole pieces by offset and drop them from the buffer once per chunk
+        position = 0
+        while len(buffer) - position >= size:
+            yield bytes(buffer[position:position + size])
+            position += size
+        del buffer[:position]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _read_offsets(filepath: str, record: dict, start: int, stop: int, header: ArchiveHeader = None) -> np.ndarray:
+    """Return offsets ``start:stop`` of a FASTA metadata record.
+
+    A block-packed record is read only in the blocks covering the range,
+    located through the header's ``metadata_index``. Older records are one
+    compressed stream, so everything before ``stop`` is unpacked; offsets
+    before ``start`` are dropped as they come.
+    """
+    if stop <= start:
+        return np.empty(0, dtype=np.uint8)
+    if 'encoding=sparse-blocks' in record['description'].split():
+        lengths = _metadata_index(header)
+        ends = list(itertools.accumulate(lengths))
+        first = start // header.metadata_block
+        last = min((stop - 1) // header.metadata_block, len(lengths) - 1)
+        if first > last:
+            return np.empty(0, dtype=np.uint8)
+        begin = ends[first] - lengths[first]
+        packed = _read_packed_range(filepath, record, begin, ends[last])
+        offsets = np.concatenate([unpack_metadata(packed[ends[index] - lengths[index] - begin:ends[index] - begin]) for index in range(first, last + 1)])
+        base = first * header.metadata_block
+        return offsets[start - base:stop - base]
+
+    parts = []
+    position = 0
+    for offsets in _iter_metadata_offsets(filepath, record, FASTA_RECORD_CHUNK):
+        if position + len(offsets) > start:
+            parts.append(offsets[max(0, start - position):stop - position])
+        position += len(offsets)
+        if position >= stop:
+            break
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.uint8)
+
+
+def open_encoded_source(input_file: str, stack: ExitStack) -> dict:
+    """Describe an encoded FASTA file or container for the streaming and range decoders.
+
+    Args:
+        input_file (str): Path to the FASTA file or container.
+        stack (ExitStack): Keeps the container mapped until it is closed.
+
+    Returns:
+        dict: ``codec``, ``filename``, ``nsym``, ``header``, ``patches``, chunk
+        iterators ``sequence(size)`` and ``metadata(size)`` (None without
+        metadata), and random-access readers ``read_sequence(start, stop)``
+        and ``read_metadata(start, stop)``.
+    """
+    if is_container(input_file):
+        container = stack.enter_context(DNAContainer(input_file))
+        return {
+            'codec': container.codec,
+            'filename': container.filename,
+            'nsym': container.nsym,
+            'header': container.header,
+            'patches': container.read_patches() or [],
+            'sequence': lambda size: _rechunk(container.iter_sequence(), size),
+            'metadata': (lambda size: container.iter_metadata()) if container.has_metadata else None,
+            'read_sequence': container.read_sequence,
+            'read_metadata': container.read_metadata if container.has_metadata else None,
+        }
+
+    records = index_fasta_records(input_file)
+    if not records:
+        raise ValueError("FASTA file must contain at least one DNA sequence")
+    main, roles = records[0], {}
+    for record in records[1:]:
+        for role in ('metadata', 'filename', 'patches', 'header'):
+            if record['id'].endswith(f"_{role}"):
+                roles[role] = record
+    fields = dict(item.split('=', 1) for item in main['description'].split()[1:] if '=' in item)
+    header = ArchiveHeader.from_record(_read_record(input_file, roles['header'])) if 'header' in roles else None
+    return {
+        'codec': header.codec if header else fields.get('codec', 'patch' if 'patches' in roles else 'mapped'),
+        'filename': decode_filename_from_dna(_read_record(input_file, roles['filename'])) if 'filename' in roles else None,
+        'nsym': header.nsym if header else None,
+        'header': header,
+        'patches': dna_to_patches(_read_record(input_file, roles['patches'])) if 'patches' in roles else [],
+        'sequence': lambda size: iter_record_sequence(input_file, main, size),
+        'metadata': (lambda size: _iter_metadata_offsets(input_file, roles['metadata'], size, header)) if 'metadata' in roles else None,
+        'read_sequence': lambda start, stop: read_record_range(input_file, main, start, stop),
+        'read_metadata': (lambda start, stop: _read_offsets(input_file, roles['metadata'], start, stop, header)) if 'metadata' in roles else None,
+    }
+
+
+def decode_file_streaming(input_file: str, output_file: str, nsym: int = None, chunk_size: int = DEFAULT_BLOCK_SIZE) -> dict:
+    """Decode an encoded FASTA file or container with bounded memory.
+
+    The plaintext is written as soon as each Reed-Solomon codeword has been
+    corrected. If a codeword cannot be corrected, decoding stops with an error
+    naming the codeword; the output then holds everything before it. Files with
+    an archive header supply their own Reed-Solomon parameters, and the output
+    is checked against the recorded length and SHA-256. A payload the header
+    marks as compressed is decompressed as it is written.
+
+    Args:
+        input_file (str): Path to the FASTA file or container.
+        output_file (str): Path of the decoded output file.
+        nsym (int, optional): Number of Reed-Solomon error correction symbols used
+            during encoding (default: from the archive header, else 10).
+        chunk_size (int): Approximate number of encoded bytes demapped per step.
+
+    Returns:
+        dict: ``filename`` (original filename or None), ``codec``, ``codewords``
+        (number decoded), ``size`` (bytes written), ``header`` (ArchiveHeader or
+        None), ``verified`` (whether a recorded SHA-256 was checked) and
+        ``report`` (DecodeReport with the corrected errors per codeword).
+
+    Raises:
+        InvalidBaseError: If the main record contains invalid bases (positions are file-global).
+        ValueError: If the file is malformed, a codeword cannot be corrected or
+            the output does not match the archive header.
+    """
+    with ExitStack() as stack:
+        source = open_encoded_source(input_file, stack)
+        codec, patches = source['codec'], source['patches']
+        header = source['header']
+        nsym = nsym if nsym is not None else (source['nsym'] if source['nsym'] is not None else 10)
+        rs_block_size = header.rs_block_size if header else RS_BLOCK_SIZE
+        patch_positions = [position for position, _ in patches]
+
+        codewords = max(CODEWORD_ALIGNMENT, chunk_size // rs_block_size // CODEWORD_ALIGNMENT * CODEWORD_ALIGNMENT)
+        digits_per_chunk = codewords * rs_block_size * 4
+        if codec == 'rotating':
+            bases_per_chunk = digits_per_chunk // GROUP_DIGITS * GROUP_TRITS
+        else:
+            bases_per_chunk = digits_per_chunk
+        offsets = _OffsetReader(source['metadata'](bases_per_chunk)) if source['metadata'] is not None and codec != 'rotating' else None
+
+        report = DecodeReport()
+        digest = hashlib.sha256()
+        inflater = BlockDecompressor(header.compression) if header is not None and header.compression else None
+        size = written = 0
+        position = 0
+        previous = 0
+        truncated = False
+        with open(output_file, 'wb') as out:
+            for chunk in source['sequence'](bases_per_chunk):
+                try:
+                    if codec == 'rotating':
+                        digits = rotating_dna_to_base4_array(chunk, previous)
+                        previous = int(dna_to_base4_array(chunk[-1:])[0])
+                    else:
+                        if patches:
+                            low = bisect.bisect_left(patch_positions, position)
+                            high = bisect.bisect_left(patch_positions, position + len(chunk))
+                            if low < high:
+                                chunk = bytearray(chunk)
+                                for patch_position, base in patches[low:high]:
+                                    chunk[patch_position - position] = ord(base)
+                        digits = dna_to_base4_array(bytes(chunk), offsets.read(len(chunk)) if offsets is not None else None)
+                        # Metadata that ends early truncates the sequence, as in the in-memory decoder
+                        truncated = len(digits) < len(chunk)
+                except InvalidBaseError as error:
+                    raise InvalidBaseError(error.positions + position) from None
+                position += len(chunk)
+
+                data = base4_array_to_bytes(digits).tobytes()
+                try:
+                    decoded = rs_decode_blocks(data, nsym, rs_block_size, first_index=report.codewords, report=report)
+                except UncorrectableCodewordError as error:
+                    # Keep everything before the failing codeword
+                    out.write(inflater.decompress(error.decoded) if inflater is not None else error.decoded)
+                    raise
+                digest.update(decoded)
+                size += len(decoded)
+                if inflater is not None:
+                    decoded = inflater.decompress(decoded)
+                out.write(decoded)
+                written += len(decoded)
+                if truncated:
+                    break
+
+    verified = False
+    if header is not None:
+        if header.payload_length is not None and size != header.payload_length:
+            raise ValueError(f"Decoded payload has {size} bytes, header records {header.payload_length}")
+        if header.sha256 is not None:
+            if digest.hexdigest() != header.sha256:
+                raise ValueError("Decoded payload does not match the SHA-256 recorded in the header")
+            verified = True
+    if inflater is not None and not inflater.eof:
+        raise ValueError(f"Truncated {header.compression} payload")
+    filename = source['filename'] or (header.filename if header else None)
+    return {'filename': filename, 'codec': codec, 'codewords': report.codewords, 'size': written, 'header': header, 'verified': verified, 'report': report}
@@ -1,4 +1,31 @@
-from typing import List
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from encoder.constraints import DEFAULT_SPEC, ConstraintSpec, repair_sequence
+from encoder.mapper import ConstraintMapper
+from encoder.rotating import base4_to_rotating_dna
+
+
+def bytes_to_base4_array(binary_data) -> np.ndarray:
+    """Convert binary data to an array of base-4 digits using vectorized NumPy shifts.
+
+    Each byte yields four digits, most significant bit pair first. The digits
+    are written straight into the output array, so no per-bit temporaries are
+    created.
+
+    Args:
+        binary_data: Any bytes-like object (bytes, bytearray, memoryview, mmap, uint8 array); read without copying.
+
+    Returns:
+        np.ndarray: uint8 array of base-4 digits (0-3), four per input byte.
+    """
+    data = np.frombuffer(binary_data, dtype=np.uint8)
+    digits = np.empty(4 * len(data), dtype=np.uint8)
+    for lane, shift in enumerate((6, 4, 2, 0)):
+        np.bitwise_and(data >> shift, 3, out=digits[lane::4])
+    return digits
 
 
 def binary_to_base4(binary_data: bytes) -> list[int]:
@@ -10,50 +37,106 @@ def binary_to_base4(binary_data: bytes) -> list[int]:
     Returns:
         list[int]: List of base-4 digits representing the input.
     """
-    bit_str = ''.join(f'{byte:08b}' for byte in binary_data)
-    # Pad bit_str to a multiple of 2 bits
-    if len(bit_str) % 2 != 0:
-        bit_str += '0'
-    base4_digits = [int(bit_str[i:i+2], 2) for i in range(0, len(bit_str), 2)]
-    return base4_digits
+    return bytes_to_base4_array(binary_data).tolist()
 
 
-def base4_to_dna(base4_digits: list[int]) -> tuple[str, list[int]]:
+def base4_to_dna(base4_digits: list[int], spec: ConstraintSpec = DEFAULT_SPEC) -> tuple[str, list[int]]:
     """Constraint-aware mapping: Map base-4 digits to a DNA sequence avoiding homopolymers >2, forbidden motifs, and keeping GC content 40-60%. Deterministic and reversible by returning metadata for each digit.
 
+    Runs in linear time using the table-driven ``ConstraintMapper``. The defaults
+    reproduce the limits above; pass a ``ConstraintSpec`` to avoid other motifs.
+
     Args:
-        base4_digits (list[int]): List of base-4 digits (0-3).
+        base4_digits (list[int]): List of base-4 digits (0-3); a uint8 array from ``bytes_to_base4_array`` also works.
+        spec (ConstraintSpec): Homopolymer, GC and motif constraints to respect.
 
     Returns:
         tuple[str, list[int]]: DNA sequence string and metadata bitstream (offsets used for each digit).
     """
-    BASES = ['A', 'C', 'G', 'T']
-    forbidden_motifs = ["ATATAT", "CGCGCG"]
-    max_homopolymer = 2
-    gc_min, gc_max = 40.0, 60.0
-    seq = []
-    metadata = []
-    for i, digit in enumerate(base4_digits):
-        for offset in range(4):
-            base = BASES[(digit + offset) % 4]
-            # Check homopolymer
-            if len(seq) >= max_homopolymer and all(seq[-j-1] == base for j in range(max_homopolymer)):
-                continue
-            # Check forbidden motifs
-            test_seq = ''.join(seq) + base
-            if any(motif in test_seq[-len(motif)-1:] for motif in forbidden_motifs):
-                continue
-            # Check GC content (only for last base)
-            if i == len(base4_digits) - 1:
-                gc_count = test_seq.count('G') + test_seq.count('C')
-                gc_content = (gc_count / len(test_seq)) * 100
-                if not (gc_min <= gc_content <= gc_max):
-                    continue
-            seq.append(base)
-            metadata.append(offset)
-            break
-        else:
-            # If no base is valid, fallback to original mapping (may violate constraints)
-            seq.append(BASES[digit])
-            metadata.append(0)
-    return ''.join(seq), metadata 
\ No newline at end of file
+    seq, metadata = ConstraintMapper(spec).map(base4_digits)
+    return seq.decode('ascii'), list(metadata)
+
+
+# Digit (0-3) -> ASCII base, applied with bytes.translate
+DIRECT_TABLE = bytes(b'ACGT'[i % 4] for i in range(256))
+CODECS = ('mapped', 'patch', 'rotating')
+
+
+def base4_to_dna_direct(base4_digits) -> str:
+    """Map base-4 digits straight to A, C, G, T without any constraint handling.
+
+    Args:
+        base4_digits: Sequence or uint8 array of base-4 digits (0-3).
+
+    Returns:
+        str: DNA sequence with one base per digit.
+    """
+    return bytes(np.asarray(base4_digits, dtype=np.uint8)).translate(DIRECT_TABLE).decode('ascii')
+
+
+def check_codec(codec: str, spec: ConstraintSpec = DEFAULT_SPEC) -> None:
+    """Refuse an unknown codec, or constraints the codec cannot enforce.
+
+    The 'rotating' code rules out homopolymers by construction but never
+    looks at motifs or GC content, so it only accepts the default motifs and
+    GC bounds rather than silently ignoring custom ones.
+
+    Raises:
+        ValueError: If the codec is unknown or cannot respect ``spec``.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported codec: {codec}. Choose from {', '.join(CODECS)}")
+    if codec == 'rotating' and (spec.motifs, spec.gc_min, spec.gc_max) != (DEFAULT_SPEC.motifs, DEFAULT_SPEC.gc_min, DEFAULT_SPEC.gc_max):
+        raise ValueError("The 'rotating' codec cannot avoid motifs or enforce GC bounds; use the 'mapped' or 'patch' codec for custom constraints")
+
+
+@dataclass
+class MappedSequence:
+    """DNA produced by one of the mapping codecs.
+
+    Attributes:
+        dna_sequence (str): Main DNA sequence.
+        codec (str): Codec that produced it (one of ``CODECS``).
+        metadata (list[int], optional): Per-digit offsets ('mapped' codec).
+        patches (list[tuple[int, str]], optional): (position, original base) substitutions ('patch' codec).
+        unresolved (list[int], optional): Positions of homopolymer/motif violations the
+            'patch' codec could not repair.
+    """
+    dna_sequence: str
+    codec: str
+    metadata: Optional[list] = None
+    patches: Optional[list] = None
+    unresolved: Optional[list] = None
+
+
+def map_to_dna(base4_digits, spec: ConstraintSpec = DEFAULT_SPEC, codec: str = 'mapped', seed: int = 0) -> MappedSequence:
+    """Map base-4 digits to DNA with the selected codec.
+
+    'mapped' uses the constraint-aware mapper and returns one metadata offset
+    per digit. 'patch' maps the digits directly at 2 bits/nt, repairs
+    constraint violations and records the repaired positions as a sparse
+    patch list, so no metadata stream is needed. 'rotating' uses a rotating
+    ternary code that cannot produce homopolymers and needs no side
+    information at all.
+
+    Args:
+        base4_digits: Sequence or uint8 array of base-4 digits (0-3).
+        spec (ConstraintSpec): Constraints to respect.
+        codec (str): One of ``CODECS``.
+        seed (int): Repair seed for the 'patch' codec.
+
+    Returns:
+        MappedSequence: DNA sequence plus the side information needed to decode it.
+
+    Raises:
+        ValueError: If the codec is unknown or cannot respect ``spec`` (see ``check_codec``).
+    """
+    check_codec(codec, spec)
+    if codec == 'mapped':
+        dna_sequence, metadata = base4_to_dna(base4_digits, spec)
+        return MappedSequence(dna_sequence, codec, metadata=metadata)
+    if codec == 'patch':
+        repair = repair_sequence(base4_to_dna_direct(base4_digits), spec, seed)
+        patches = [(position, original) for position, original, _ in repair.repairs]
+        return MappedSequence(repair.sequence, codec, patches=patches, unresolved=repair.unresolved)
+    return MappedSequence(base4_to_rotating_dna(base4_digits), codec)
@@ -0,0 +1,77 @@
+"""Content-defined chunking.
+
+A payload is cut where a rolling hash of the preceding bytes hits a fixed
+pattern, so boundaries follow the content rather than offsets: an edit
+changes only the chunks around it and identical data in different files is
+cut the same way. The hash is the Gear hash used by FastCDC,
+``h = (h << 1) + GEAR[byte]`` in 32 bits, whose top bits depend on the
+last 32 bytes only. That makes it a sum of 32 shifted copies of the gear
+values, which numpy computes for a whole block at once instead of byte by
+byte. A chunk ends after the first byte at least ``min_size`` into it whose
+hash falls below a threshold, or at ``max_size``. The threshold is set so
+that such a byte turns up every ``avg_size - min_size`` bytes on average,
+which makes chunks average ``avg_size``.
+"""
+
+import numpy as np
+
+WINDOW = 32
+# Fixed gear table: changing it moves every chunk boundary (stored data stays
+# decodable, but new chunks no longer deduplicate against old ones)
+GEAR = np.random.default_rng(0x6765617220636463).integers(0, 1 << 32, 256, dtype=np.uint32)
+MIN_CHUNK = 16 << 10
+AVG_CHUNK = 64 << 10
+MAX_CHUNK = 256 << 10
+# Bytes hashed per numpy pass, bounding the temporary arrays
+HASH_BLOCK = 8 << 20
+
+
+def gear_hashes(data: bytes) -> np.ndarray:
+    """Gear hash after every byte of ``data``, as uint32 (the first ``WINDOW`` - 1 see a partial window)."""
+    gear = GEAR[np.frombuffer(data, dtype=np.uint8)]
+    hashes = gear.copy()
+    for shift in range(1, WINDOW):
+        hashes[shift:] += gear[:len(gear) - shift] << np.uint32(shift)
+    return hashes
+
+
+def cut_candidates(data: bytes, threshold: int) -> np.ndarray:
+    """Offsets just after every byte whose hash is below ``threshold``."""
+    threshold = np.uint32(threshold)
+    candidates = []
+    view = memoryview(data)
+    for start in range(0, len(data), HASH_BLOCK):
+        # Hash the preceding window again so blocks join seamlessly
+        lead = min(start, WINDOW - 1)
+        hashes = gear_hashes(view[start - lead:start + HASH_BLOCK])[lead:]
+        candidates.append(np.flatnonzero(hashes < threshold) + start + 1)
+    return np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+
+
+def chunk_boundaries(data: bytes, min_size: int = MIN_CHUNK, avg_size: int = AVG_CHUNK, max_size: int = MAX_CHUNK) -> list:
+    """Split a payload into content-defined chunks.
+
+    Args:
+        data (bytes): The payload.
+        min_size (int): Smallest chunk (except the last).
+        avg_size (int): Target average chunk size.
+        max_size (int): Largest chunk.
+
+    Returns:
+        list[int]: End offset of every chunk; the last one is ``len(data)``.
+
+    Raises:
+        ValueError: If the sizes are not increasing.
+    """
+    if not 0 < min_size < avg_size <= max_size:
+        raise ValueError(f"Chunk sizes must satisfy 0 < min < avg <= max, got {min_size}, {avg_size}, {max_size}")
+    # One hash in avg - min falls below this, so a cut follows min_size by avg - min on average
+    candidates = cut_candidates(data, min((1 << 32) // (avg_size - min_size), (1 << 32) - 1))
+    boundaries = []
+    start = 0
+    while start < len(data):
+        index = np.searchsorted(candidates, start + min_size)
+        end = int(candidates[index]) if index < len(candidates) else len(data)
+        start = min(end, start + max_size, len(data))
+        boundaries.append(start)
+    return boundaries
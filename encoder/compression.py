@@ -0,0 +1,208 @@
+"""Optional lossless compression of the payload before error correction.
+
+Every payload byte costs four nucleotides plus its share of Reed-Solomon
+parity, so squeezing text or uncompressed formats first shortens the
+sequence, the mapping work and the synthesis order in proportion.
+``choose_compression`` decides per file: inputs that are already compressed
+(recognised by their signature) or whose sampled byte entropy is close to
+8 bits are stored as they are; otherwise a sample is compressed with every
+method and the smallest result wins. The file is compressed in independent
+blocks of ``COMPRESSION_BLOCK`` bytes (``compress_blocks``), so a byte range
+of the original file can still be decoded from the few blocks holding it.
+The method and the compressed size of every block are recorded in the
+archive header (``compression``, ``compression_block``, ``compressed_sizes``),
+whose length and SHA-256 then describe the compressed payload, and decoders
+reverse it with ``decompress`` or ``BlockDecompressor``.
+"""
+
+import bz2
+import lzma
+import zlib
+
+import numpy as np
+
+COMPRESSIONS = ('zlib', 'bz2', 'lzma')
+COMPRESSION_CHOICES = ('auto', 'none') + COMPRESSIONS
+# Leading bytes of formats that are compressed already (MP3, ZIP/DOCX/XLSX, gzip, ...)
+COMPRESSED_SIGNATURES = (
+    b'PK\x03\x04', b'PK\x05\x06', b'\x1f\x8b', b'BZh', b'\xfd7zXZ\x00', b'7z\xbc\xaf\x27\x1c',
+    b'ID3', b'\xff\xfb', b'\xff\xf3', b'\xff\xf2', b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n',
+    b'GIF87a', b'GIF89a', b'%PDF', b'fLaC', b'OggS', b'\x28\xb5\x2f\xfd',
+)
+# Bytes compressed per trial, taken from a few places spread across the input
+SAMPLE_SIZE = 1 << 16
+SAMPLE_SLICES = 4
+# Above this many bits per byte a sample is treated as incompressible
+ENTROPY_LIMIT = 7.5
+# A method must shrink the sample to at most this fraction to be used
+MIN_RATIO = 0.95
+# Original bytes per independently compressed block
+COMPRESSION_BLOCK = 1 << 20
+
+
+def is_precompressed(data: bytes) -> bool:
+    """Check whether data starts with the signature of a compressed format."""
+    return bytes(data[:8]).startswith(COMPRESSED_SIGNATURES)
+
+
+def byte_entropy(data: bytes) -> float:
+    """Shannon entropy of the byte distribution, in bits per byte."""
+    if not data:
+        return 0.0
+    counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+    probabilities = counts[counts > 0] / len(data)
+    return float(-(probabilities * np.log2(probabilities)).sum())
+
+
+def sample_payload(data: bytes, size: int = SAMPLE_SIZE, slices: int = SAMPLE_SLICES) -> bytes:
+    """Take ``size`` bytes from ``slices`` evenly spaced places of the payload."""
+    if len(data) <= size:
+        return bytes(data)
+    width = size // slices
+    step = (len(data) - width) // (slices - 1)
+    return b''.join(bytes(data[index * step:index * step + width]) for index in range(slices))
+
+
+def sample_file(filepath: str, size: int = SAMPLE_SIZE, slices: int = SAMPLE_SLICES) -> bytes:
+    """``sample_payload`` of a file, reading only the sampled bytes."""
+    with open(filepath, 'rb') as f:
+        length = f.seek(0, 2)
+        if length <= size:
+            f.seek(0)
+            return f.read()
+        width = size // slices
+        step = (length - width) // (slices - 1)
+        parts = []
+        for index in range(slices):
+            f.seek(index * step)
+            parts.append(f.read(width))
+    return b''.join(parts)
+
+
+def compress(data: bytes, method: str) -> bytes:
+    """Compress data with one of ``COMPRESSIONS``.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method == 'zlib':
+        return zlib.compress(data, 9)
+    if method == 'bz2':
+        return bz2.compress(data, 9)
+    if method == 'lzma':
+        return lzma.compress(data, preset=6)
+    raise ValueError(f"Unknown compression {method!r}. Choose from {', '.join(COMPRESSIONS)}")
+
+
+def compress_blocks(data: bytes, method: str, block_size: int = COMPRESSION_BLOCK) -> tuple[bytes, list[int]]:
+    """Compress data in independent blocks of ``block_size`` bytes.
+
+    Returns:
+        tuple[bytes, list[int]]: The concatenated compressed blocks and the size of each.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    blocks = [compress(bytes(data[start:start + block_size]), method) for start in range(0, len(data), block_size)]
+    return b''.join(blocks), [len(block) for block in blocks]
+
+
+def decompressor(method: str):
+    """Incremental decompressor for ``method``, with ``decompress`` and ``eof``.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method == 'zlib':
+        return zlib.decompressobj()
+    if method == 'bz2':
+        return bz2.BZ2Decompressor()
+    if method == 'lzma':
+        return lzma.LZMADecompressor()
+    raise ValueError(f"Unknown compression {method!r}. Choose from {', '.join(COMPRESSIONS)}")
+
+
+class BlockDecompressor:
+    """Incremental decompressor for the concatenated streams of ``compress_blocks``.
+
+    A single stream, as written by ``compress``, is read the same way.
+
+    Args:
+        method (str): One of ``COMPRESSIONS``.
+    """
+
+    def __init__(self, method: str):
+        decompressor(method)
+        self.method = method
+        self._engine = None
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress the next piece of data, crossing into the following stream where one ends."""
+        out = []
+        while data:
+            if self._engine is None:
+                self._engine = decompressor(self.method)
+            out.append(self._engine.decompress(data))
+            data = b''
+            if self._engine.eof:
+                data = self._engine.unused_data
+                self._engine = None
+        return b''.join(out)
+
+    @property
+    def eof(self) -> bool:
+        """Whether the data so far ends with a complete stream."""
+        return self._engine is None
+
+
+def decompress(data: bytes, method: str) -> bytes:
+    """Reverse ``compress`` and ``compress_blocks``.
+
+    Raises:
+        ValueError: If the method is unknown or the data does not end with a complete stream.
+    """
+    engine = BlockDecompressor(method)
+    try:
+        result = engine.decompress(data)
+    except (zlib.error, OSError, lzma.LZMAError) as error:
+        raise ValueError(f"Corrupt {method} payload: {error}") from None
+    if not engine.eof:
+        raise ValueError(f"Truncated {method} payload")
+    return result
+
+
+def choose_compression(data: bytes, sample: bytes = None) -> str:
+    """Pick the compression for a payload from a sample of it.
+
+    Args:
+        data (bytes): The payload, or just its leading bytes when ``sample`` is given.
+        sample (bytes, optional): Sample to judge by (default: ``sample_payload(data)``).
+
+    Returns:
+        str or None: One of ``COMPRESSIONS``, or None to store the payload as is.
+    """
+    if not data or is_precompressed(data):
+        return None
+    sample = sample_payload(data) if sample is None else sample
+    if byte_entropy(sample) > ENTROPY_LIMIT:
+        return None
+    sizes = {method: len(compress(sample, method)) for method in COMPRESSIONS}
+    best = min(COMPRESSIONS, key=sizes.get)
+    return best if sizes[best] <= len(sample) * MIN_RATIO else None
+
+
+def resolve_compression(choice: str, data: bytes, sample: bytes = None) -> str:
+    """Turn a ``COMPRESSION_CHOICES`` value into a method (None for no compression).
+
+    ``data`` and ``sample`` are passed to ``choose_compression`` for 'auto'.
+
+    Raises:
+        ValueError: If the choice is unknown.
+    """
+    if choice == 'auto':
+        return choose_compression(data, sample)
+    if choice in (None, 'none'):
+        return None
+    if choice not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {choice!r}. Choose from {', '.join(COMPRESSION_CHOICES)}")
+    return choice
@@ -1,5 +1,202 @@
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import List
 
+BASES = 'ACGT'
+DEFAULT_MOTIFS = ("ATATAT", "CGCGCG")
+# Translate ASCII bases to 0-3; every other byte becomes 4, which resets motif matching
+BASE_CODES = bytes(BASES.index(chr(i)) if chr(i) in BASES else 4 for i in range(256))
+
+
+@dataclass(frozen=True)
+class ConstraintSpec:
+    """Biological constraints used when mapping, checking and repairing DNA sequences.
+
+    Motifs are upper-cased and de-duplicated; empty entries are dropped.
+
+    Attributes:
+        max_homopolymer (int): Longest allowed run of a single base.
+        gc_min (float): Minimum GC content percentage.
+        gc_max (float): Maximum GC content percentage.
+        motifs (tuple[str, ...]): Forbidden motifs.
+    """
+    max_homopolymer: int = 2
+    gc_min: float = 40.0
+    gc_max: float = 60.0
+    motifs: tuple = DEFAULT_MOTIFS
+
+    def __post_init__(self):
+        motifs = tuple(dict.fromkeys(m.strip().upper() for m in self.motifs if m and m.strip()))
+        invalid = [m for m in motifs if set(m) - set(BASES)]
+        if invalid:
+            raise ValueError(f"Invalid motif(s): {', '.join(invalid)}. Motifs may only contain A, C, G, T.")
+        object.__setattr__(self, 'motifs', motifs)
+
+    def compile(self) -> 'ConstraintAutomaton':
+        """Return the cached automaton for this specification."""
+        return compile_constraints(self)
+
+
+DEFAULT_SPEC = ConstraintSpec()
+
+
+class ConstraintAutomaton:
+    """Aho-Corasick motif matcher combined with homopolymer run tracking.
+
+    Motif matching runs on a complete DFA over the trie nodes, so any number of
+    motifs is checked in a single linear scan. For mapping, a state is a small
+    integer encoding (trie node, last base, run length), which lets callers
+    build flat lookup tables indexed by state.
+
+    Attributes:
+        spec (ConstraintSpec): Specification the automaton was compiled from.
+        node_count (int): Number of trie nodes.
+        state_count (int): Number of combined mapping states.
+        initial (int): Combined state of an empty sequence.
+        context (int): Number of trailing bases that fully determine a combined state.
+    """
+
+    def __init__(self, spec: ConstraintSpec):
+        self.spec = spec
+        goto = [[-1] * 4]
+        hits = [[]]
+        for index, motif in enumerate(spec.motifs):
+            node = 0
+            for base in motif:
+                code = BASES.index(base)
+                if goto[node][code] == -1:
+                    goto.append([-1] * 4)
+                    hits.append([])
+                    goto[node][code] = len(goto) - 1
+                node = goto[node][code]
+            hits[node].append(index)
+
+        # Breadth-first pass: fill failure transitions and inherit suffix matches
+        fail = [0] * len(goto)
+        queue = deque()
+        for code in range(4):
+            child = goto[0][code]
+            if child == -1:
+                goto[0][code] = 0
+            else:
+                queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for code in range(4):
+                child = goto[node][code]
+                if child == -1:
+                    goto[node][code] = goto[fail[node]][code]
+                else:
+                    fail[child] = goto[fail[node]][code]
+                    hits[child] = hits[child] + hits[fail[child]]
+                    queue.append(child)
+
+        # Flat table with a fifth column that resets on non-ACGT characters
+        self._goto = [target for row in goto for target in row + [0]]
+        self._hits = [tuple(h) for h in hits]
+        self.node_count = len(goto)
+        self._run_cap = max(spec.max_homopolymer, 1)
+        self.state_count = self.node_count * 5 * (self._run_cap + 1)
+        self.initial = self._pack(0, 4, 0)
+        self.context = max(max((len(m) for m in spec.motifs), default=0), spec.max_homopolymer + 1)
+        self._transitions = None
+
+    def _pack(self, node: int, last: int, run: int) -> int:
+        return (node * 5 + last) * (self._run_cap + 1) + run
+
+    def _unpack(self, state: int) -> tuple[int, int, int]:
+        rest, run = divmod(state, self._run_cap + 1)
+        node, last = divmod(rest, 5)
+        return node, last, run
+
+    def violates(self, state: int, base: int) -> bool:
+        """Check whether appending a base (0-3) extends a homopolymer beyond the maximum run or completes a motif."""
+        node, last, run = self._unpack(state)
+        max_run = self.spec.max_homopolymer
+        if run >= max_run and (max_run == 0 or last == base):
+            return True
+        return bool(self._hits[self._goto[node * 5 + base]])
+
+    def allows(self, state: int, base: int) -> bool:
+        """Check whether appending a base (0-3) keeps the sequence within constraints.
+
+        A base is rejected if it extends a homopolymer beyond the maximum run,
+        completes a forbidden motif, or if the sequence already ends with one.
+        """
+        return not (self.violates(state, base) or self._hits[self._unpack(state)[0]])
+
+    @property
+    def transitions(self) -> tuple[list[int], bytearray]:
+        """Flat (next state, violation flag) tables indexed by state * 4 + base, built on first use."""
+        if self._transitions is None:
+            next_states = []
+            violations = bytearray()
+            for state in range(self.state_count):
+                for base in range(4):
+                    next_states.append(self.step(state, base))
+                    violations.append(self.violates(state, base))
+            self._transitions = (next_states, violations)
+        return self._transitions
+
+    def step(self, state: int, base: int) -> int:
+        """Return the combined state after appending a base (0-3)."""
+        node, last, run = self._unpack(state)
+        run = min(run + 1, self._run_cap) if last == base else 1
+        return self._pack(self._goto[node * 5 + base], base, run)
+
+    def feed(self, dna_sequence: str, state: int = None) -> int:
+        """Return the combined state after appending a whole ACGT sequence."""
+        state = self.initial if state is None else state
+        for code in dna_sequence.encode('ascii').translate(BASE_CODES):
+            state = self.step(state, code)
+        return state
+
+    def scan(self, dna_sequence, node: int = 0, position: int = 0, first_only: bool = False) -> tuple[int, list[tuple[int, str]]]:
+        """Run the motif matcher over a sequence, resuming from a previous scan.
+
+        Args:
+            dna_sequence: DNA sequence as str or ASCII bytes.
+            node (int): Trie node returned by the previous scan (0 for a fresh sequence).
+            position (int): Number of bases scanned before this chunk.
+            first_only (bool): Stop at the first occurrence.
+
+        Returns:
+            tuple[int, list[tuple[int, str]]]: Final trie node and (start position, motif) for every occurrence.
+        """
+        if isinstance(dna_sequence, str):
+            dna_sequence = dna_sequence.encode('ascii', errors='replace')
+        goto = self._goto
+        hits = self._hits
+        motifs = self.spec.motifs
+        found = []
+        for end, code in enumerate(dna_sequence.translate(BASE_CODES), position + 1):
+            node = goto[node * 5 + code]
+            if hits[node]:
+                found.extend((end - len(motifs[i]), motifs[i]) for i in hits[node])
+                if first_only:
+                    break
+        return node, found
+
+    def find_motifs(self, dna_sequence, first_only: bool = False) -> list[tuple[int, str]]:
+        """Find forbidden motif occurrences with a single scan of the sequence.
+
+        Args:
+            dna_sequence: DNA sequence as str or ASCII bytes.
+            first_only (bool): Stop at the first occurrence.
+
+        Returns:
+            list[tuple[int, str]]: (start position, motif) for every occurrence, in order of end position.
+        """
+        return self.scan(dna_sequence, first_only=first_only)[1]
+
+
+@lru_cache(maxsize=64)
+def compile_constraints(spec: ConstraintSpec) -> ConstraintAutomaton:
+    """Compile a constraint specification into a cached automaton."""
+    return ConstraintAutomaton(spec)
+
+
 def check_gc_content(dna_sequence: str) -> float:
     """Calculate the GC content percentage of a DNA sequence."""
     gc_count = dna_sequence.count('G') + dna_sequence.count('C')
@@ -26,70 +223,453 @@ def has_long_homopolymers(dna_sequence: str, max_run: int = 3) -> bool:
 
 
 def contains_unstable_motifs(dna_sequence: str, motifs: List[str]) -> bool:
-    """Check if the DNA sequence contains any unstable or repeating motifs."""
-    for motif in motifs:
-        if motif in dna_sequence:
+    """Check if the DNA sequence contains any unstable or repeating motifs.
+
+    All motifs are matched in one pass with a cached Aho-Corasick automaton.
+    """
+    automaton = compile_constraints(ConstraintSpec(motifs=tuple(motifs)))
+    return bool(automaton.find_motifs(dna_sequence, first_only=True))
+
+
+@dataclass
+class ConstraintReport:
+    """Result of a single-pass constraint analysis.
+
+    Attributes:
+        length (int): Number of bases analyzed.
+        gc_content (float): Global GC content percentage.
+        window (int): Sliding window size used for windowed GC content.
+        min_window_gc (float): Lowest GC percentage of any window.
+        min_window_start (int): Start position of the lowest-GC window.
+        max_window_gc (float): Highest GC percentage of any window.
+        max_window_start (int): Start position of the highest-GC window.
+        homopolymer_runs (dict[int, int]): Run length -> number of runs of that length.
+        motif_hits (list[tuple[int, str]]): (start position, motif) of the first
+            forbidden motif occurrences, at most the analyzer's ``max_hits``.
+        spec (ConstraintSpec): Constraints the sequence was checked against.
+        motif_hit_count (int, optional): Number of all occurrences (defaults to ``len(motif_hits)``).
+    """
+    length: int
+    gc_content: float
+    window: int
+    min_window_gc: float
+    min_window_start: int
+    max_window_gc: float
+    max_window_start: int
+    homopolymer_runs: dict
+    motif_hits: list
+    spec: ConstraintSpec = DEFAULT_SPEC
+    motif_hit_count: int = None
+
+    def __post_init__(self):
+        if self.motif_hit_count is None:
+            self.motif_hit_count = len(self.motif_hits)
+
+    @property
+    def longest_homopolymer(self) -> int:
+        """Length of the longest homopolymer run."""
+        return max(self.homopolymer_runs, default=0)
+
+    @property
+    def worst_window(self) -> tuple[int, float]:
+        """(start, GC percentage) of the window farthest from the middle of the GC bounds."""
+        target = (self.spec.gc_min + self.spec.gc_max) / 2
+        if abs(self.min_window_gc - target) > abs(self.max_window_gc - target):
+            return self.min_window_start, self.min_window_gc
+        return self.max_window_start, self.max_window_gc
+
+    def has_long_homopolymers(self, max_run: int = None) -> bool:
+        """Check for runs longer than max_run (defaults to the spec's limit)."""
+        max_run = self.spec.max_homopolymer if max_run is None else max_run
+        return self.longest_homopolymer > max_run
+
+    @property
+    def has_unstable_motifs(self) -> bool:
+        return self.motif_hit_count > 0
+
+    @property
+    def gc_in_bounds(self) -> bool:
+        return self.spec.gc_min <= self.gc_content <= self.spec.gc_max
+
+    def as_dict(self, max_hits: int = 1000) -> dict:
+        """Return a JSON-friendly summary, listing at most max_hits motif positions."""
+        return {
+            'length': self.length,
+            'gc_content': self.gc_content,
+            'window': self.window,
+            'min_window_gc': self.min_window_gc,
+            'min_window_start': self.min_window_start,
+            'max_window_gc': self.max_window_gc,
+            'max_window_start': self.max_window_start,
+            'homopolymer_runs': {str(k): v for k, v in sorted(self.homopolymer_runs.items())},
+            'longest_homopolymer': self.longest_homopolymer,
+            'motif_hit_count': self.motif_hit_count,
+            'motif_hits': [{'position': pos, 'motif': motif} for pos, motif in self.motif_hits[:max_hits]],
+        }
+
+
+ANALYZER_SLICE = 1 << 18
+# Motif positions an analyzer keeps; occurrences beyond these are only counted
+MAX_REPORTED_HITS = 1000
+
+
+class ConstraintAnalyzer:
+    """Streaming analyzer that checks GC content, homopolymers and motifs in one pass.
+
+    Sequences can be fed in chunks; runs, windows and motifs spanning chunk
+    boundaries are handled through carried state. The vectorized mode does
+    the per-chunk work with NumPy (motifs up to 32 nt are matched as packed
+    k-mers, longer ones fall back to the automaton); the scalar mode walks the
+    bases in Python. Both produce identical reports. Motif occurrences are
+    counted, but only the first ``max_hits`` positions are kept, so memory
+    stays bounded however long the sequence.
+
+    Args:
+        spec (ConstraintSpec): Constraints to check against.
+        window (int): Sliding window size for windowed GC content.
+        vectorized (bool): Use NumPy for the per-chunk work.
+        max_hits (int): Motif positions to keep.
+    """
+
+    def __init__(self, spec: ConstraintSpec = DEFAULT_SPEC, window: int = 50, vectorized: bool = True, max_hits: int = MAX_REPORTED_HITS):
+        if window < 1:
+            raise ValueError("Window size must be at least 1")
+        self.spec = spec
+        self.window = window
+        self.vectorized = vectorized
+        self._automaton = compile_constraints(spec)
+        self._length = 0
+        self._gc = 0
+        self._tail = b''  # last bases kept for windows and motifs spanning chunks
+        self._window_sum = 0
+        self._min_window = None  # (gc count, start)
+        self._max_window = None
+        self._runs = {}
+        self._run_base = None
+        self._run_length = 0
+        self._node = 0
+        self._hits = []
+        self._hit_count = 0
+        self.max_hits = max_hits
+        lengths = {len(m) for m in spec.motifs}
+        self._carry = max(window, max(lengths, default=1) - 1)
+        self._kmers = {}
+        for motif in spec.motifs:
+            if len(motif) <= 32:
+                code = 0
+                for base in motif:
+                    code = (code << 2) | BASES.index(base)
+                self._kmers.setdefault(len(motif), {})[code] = motif
+        self._long_motifs = ConstraintSpec(motifs=tuple(m for m in spec.motifs if len(m) > 32)).compile()
+
+    def feed(self, dna_sequence) -> 'ConstraintAnalyzer':
+        """Analyze the next chunk of the sequence (str or ASCII bytes)."""
+        if isinstance(dna_sequence, str):
+            dna_sequence = dna_sequence.encode('ascii', errors='replace')
+        feed = self._feed_vectorized if self.vectorized else self._feed_scalar
+        # Bounded slices keep the vectorized temporaries small for large inputs
+        for start in range(0, len(dna_sequence), ANALYZER_SLICE):
+            feed(bytes(dna_sequence[start:start + ANALYZER_SLICE]))
+        return self
+
+    def _update_window(self, gc_count: int, start: int) -> None:
+        if self._min_window is None or gc_count < self._min_window[0]:
+            self._min_window = (gc_count, start)
+        if self._max_window is None or gc_count > self._max_window[0]:
+            self._max_window = (gc_count, start)
+
+    def _feed_scalar(self, chunk: bytes) -> None:
+        window = self.window
+        history = self._tail + chunk
+        offset = len(self._tail)
+        position = self._length
+        window_sum = self._window_sum
+        runs = self._runs
+        run_base, run_length = self._run_base, self._run_length
+        for i, byte in enumerate(chunk):
+            is_gc = byte in (67, 71)  # 'C', 'G'
+            self._gc += is_gc
+            window_sum += is_gc
+            end = position + i + 1
+            if end > window:
+                window_sum -= history[offset + i - window] in (67, 71)
+            if end >= window:
+                self._update_window(window_sum, end - window)
+            if byte == run_base:
+                run_length += 1
+            else:
+                if run_length:
+                    runs[run_length] = runs.get(run_length, 0) + 1
+                run_base, run_length = byte, 1
+        self._window_sum = window_sum
+        self._run_base, self._run_length = run_base, run_length
+        self._node, hits = self._automaton.scan(chunk, self._node, position)
+        self._add_hits(hits)
+        self._length += len(chunk)
+        self._tail = history[-self._carry:]
+
+    def _add_hits(self, hits: list) -> None:
+        """Count motif occurrences, keeping the ``max_hits`` with the lowest positions."""
+        self._hit_count += len(hits)
+        self._hits.extend(hits)
+        if len(self._hits) > 2 * self.max_hits:
+            # Trimming only past twice the limit keeps the sorting cost linear overall
+            self._hits = sorted(self._hits)[:self.max_hits]
+
+    def _feed_vectorized(self, chunk: bytes) -> None:
+        import numpy as np
+
+        window = self.window
+        carry = len(self._tail)
+        position = self._length
+        combined = np.frombuffer(self._tail + chunk, dtype=np.uint8)
+        data = combined[carry:]
+
+        # GC content and sliding windows ending inside this chunk
+        gc_flags = (combined == 67) | (combined == 71)
+        self._gc += int(np.count_nonzero(gc_flags[carry:]))
+        if position + len(data) >= window:
+            cumulative = np.concatenate(([0], np.cumsum(gc_flags, dtype=np.int64)))
+            sums = cumulative[window:] - cumulative[:-window]
+            first_start = position - carry
+            # Only windows that end inside the new chunk are evaluated
+            ends = first_start + np.arange(window, len(combined) + 1)
+            valid = ends > position
+            sums, starts = sums[valid], (ends - window)[valid]
+            if len(sums):
+                low, high = int(np.argmin(sums)), int(np.argmax(sums))
+                self._update_window(int(sums[low]), int(starts[low]))
+                self._update_window(int(sums[high]), int(starts[high]))
+
+        # Homopolymer runs, continuing the run carried from the previous chunk
+        boundaries = np.flatnonzero(data[1:] != data[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        lengths = np.diff(np.concatenate((starts, [len(data)])))
+        if data[0] == self._run_base:
+            lengths[0] += self._run_length
+        elif self._run_length:
+            self._runs[self._run_length] = self._runs.get(self._run_length, 0) + 1
+        for length, count in zip(*np.unique(lengths[:-1], return_counts=True)):
+            self._runs[int(length)] = self._runs.get(int(length), 0) + int(count)
+        self._run_base, self._run_length = int(data[-1]), int(lengths[-1])
+
+        # Forbidden motifs as packed k-mers ending inside this chunk
+        codes = np.frombuffer((self._tail + chunk).translate(BASE_CODES), dtype=np.uint8)
+        invalid = np.concatenate(([0], np.cumsum(codes == 4)))
+        codes = codes.astype(np.uint64) & 3
+        for k, table in self._kmers.items():
+            if len(codes) < k:
+                continue
+            values = np.zeros(len(codes) - k + 1, dtype=np.uint64)
+            for j in range(k):
+                values = (values << np.uint64(2)) | codes[j:len(codes) - k + 1 + j]
+            ends = np.arange(k, len(codes) + 1)
+            mask = np.isin(values, np.fromiter(table, dtype=np.uint64, count=len(table)))
+            mask &= (invalid[ends] - invalid[ends - k]) == 0
+            mask &= ends > carry
+            self._add_hits([(position - carry + int(index), table[int(values[index])]) for index in np.flatnonzero(mask)])
+        if self._long_motifs.spec.motifs:
+            self._node, hits = self._long_motifs.scan(chunk, self._node, position)
+            self._add_hits(hits)
+
+        self._length += len(chunk)
+        self._tail = (self._tail + chunk)[-self._carry:]
+
+    def report(self) -> ConstraintReport:
+        """Summarize everything fed so far."""
+        length = self._length
+        runs = dict(self._runs)
+        if self._run_length:
+            runs[self._run_length] = runs.get(self._run_length, 0) + 1
+        gc_content = (self._gc / length) * 100 if length else 0.0
+        if self._min_window is None:
+            # Sequence shorter than one window: the whole sequence is the only window
+            min_window = max_window = (gc_content, 0)
+        else:
+            span = self.window
+            min_window = (self._min_window[0] / span * 100, self._min_window[1])
+            max_window = (self._max_window[0] / span * 100, self._max_window[1])
+        return ConstraintReport(
+            length=length,
+            gc_content=gc_content,
+            window=self.window,
+            min_window_gc=min_window[0],
+            min_window_start=min_window[1],
+            max_window_gc=max_window[0],
+            max_window_start=max_window[1],
+            homopolymer_runs=runs,
+            motif_hits=sorted(self._hits)[:self.max_hits],
+            spec=self.spec,
+            motif_hit_count=self._hit_count,
+        )
+
+
+def analyze_sequence(dna_sequence, spec: ConstraintSpec = DEFAULT_SPEC, window: int = 50, vectorized: bool = True, max_hits: int = MAX_REPORTED_HITS) -> ConstraintReport:
+    """Check GC content, homopolymer runs and forbidden motifs in a single pass.
+
+    Args:
+        dna_sequence: DNA sequence as str or ASCII bytes.
+        spec (ConstraintSpec): Constraints to check against.
+        window (int): Sliding window size for windowed GC content.
+        vectorized (bool): Use NumPy for the scan.
+        max_hits (int): Motif positions to list; all occurrences are counted.
+
+    Returns:
+        ConstraintReport: Global and windowed GC, run-length histogram and motif positions.
+    """
+    return ConstraintAnalyzer(spec, window, vectorized, max_hits).feed(dna_sequence).report()
+
+
+@dataclass
+class RepairResult:
+    """Outcome of a constraint repair.
+
+    Attributes:
+        sequence (str): Repaired DNA sequence.
+        repairs (list[tuple[int, str, str]]): (position, original base, new base) for every changed position, in order.
+        unresolved (list[int]): Positions of homopolymer/motif violations that could not be fixed.
+        gc_content (float): GC content percentage of the repaired sequence.
+        gc_in_bounds (bool): Whether the repaired GC content lies within the spec's bounds.
+    """
+    sequence: str
+    repairs: list
+    unresolved: list
+    gc_content: float
+    gc_in_bounds: bool
+
+    @property
+    def repair_count(self) -> int:
+        return len(self.repairs)
+
+
+def _local_violation(automaton: ConstraintAutomaton, codes: bytearray, position: int, base: int) -> bool:
+    """Check whether placing base at position creates a violation in its neighbourhood."""
+    next_states, violations = automaton.transitions
+    context = automaton.context
+    state = automaton.initial
+    for code in codes[max(0, position - context):position]:
+        state = automaton.initial if code == 4 else next_states[state * 4 + code]
+    for i in range(position, min(len(codes), position + context)):
+        code = base if i == position else codes[i]
+        if code == 4:
+            break
+        if violations[state * 4 + code]:
             return True
+        state = next_states[state * 4 + code]
     return False
 
 
-def enforce_constraints(dna_sequence: str) -> str:
-    """Modify the DNA sequence to enforce biological constraints (GC content, homopolymers, motifs)."""
+def repair_sequence(dna_sequence: str, spec: ConstraintSpec = DEFAULT_SPEC, seed: int = 0) -> RepairResult:
+    """Repair homopolymer, motif and GC violations with local, deterministic substitutions.
+
+    The sequence is copied into a mutable buffer of base codes. A left-to-right
+    sweep carries the automaton state (motif match and run length) and replaces
+    any base that completes a violation, preferring replacements that do not
+    cause new violations in the following bases and that move GC content
+    towards the middle of the bounds. GC content is then corrected by flipping
+    A/T <-> G/C at seeded pseudo-random positions whose neighbourhood stays
+    valid. Every step only looks at a constant-size neighbourhood, so the
+    repair runs in linear time; violations that cannot be fixed are reported
+    instead of raising.
+
+    Args:
+        dna_sequence (str): DNA sequence to repair.
+        spec (ConstraintSpec): Constraints to enforce.
+        seed (int): Seed for tie-breaking and GC position order; equal seeds give equal results.
+
+    Returns:
+        RepairResult: Repaired sequence, substitutions made and remaining problems.
+    """
     import random
-    MAX_ATTEMPTS = 1000
-    GC_MIN, GC_MAX = 40.0, 60.0
-    MAX_HOMOPOLYMER = 2
-    FORBIDDEN_MOTIFS = ["ATATAT", "CGCGCG"]
-    BASES = ['A', 'C', 'G', 'T']
-
-    # Handle empty sequences
-    if not dna_sequence:
-        return dna_sequence
-
-    def mutate(seq, idx):
-        current = seq[idx]
-        choices = [b for b in BASES if b != current]
-        return seq[:idx] + random.choice(choices) + seq[idx+1:]
-
-    attempt = 0
-    seq = dna_sequence
-    while attempt < MAX_ATTEMPTS:
-        gc = check_gc_content(seq)
-        if gc < GC_MIN or gc > GC_MAX:
-            # Mutate a random base to bring GC content closer to target
-            idx = random.randrange(len(seq))
-            if gc < GC_MIN:
-                # Prefer G/C
-                seq = seq[:idx] + random.choice(['G', 'C']) + seq[idx+1:]
-            else:
-                # Prefer A/T
-                seq = seq[:idx] + random.choice(['A', 'T']) + seq[idx+1:]
-            attempt += 1
+
+    rng = random.Random(seed)
+    automaton = compile_constraints(spec)
+    next_states, violations = automaton.transitions
+    original = dna_sequence.encode('ascii', errors='replace')
+    codes = bytearray(original.translate(BASE_CODES))
+    length = len(codes)
+    gc_count = original.count(b'G') + original.count(b'C')
+    target = (spec.gc_min + spec.gc_max) / 200 * length
+    changed = {}
+    unresolved = []
+
+    # Pass 1: homopolymers and motifs, fixed where they complete
+    lookahead = automaton.context
+    state = automaton.initial
+    for i in range(length):
+        code = codes[i]
+        if code == 4:
+            state = automaton.initial
             continue
-        if has_long_homopolymers(seq, max_run=MAX_HOMOPOLYMER):
-            # Break homopolymer by mutating a random run
-            last_base = ''
-            run_length = 0
-            for i, base in enumerate(seq):
-                if base == last_base:
-                    run_length += 1
-                    if run_length > MAX_HOMOPOLYMER:
-                        seq = mutate(seq, i)
+        if violations[state * 4 + code]:
+            best = None
+            for base in range(4):
+                if base == code or violations[state * 4 + base]:
+                    continue
+                # Count violations the replacement would cause in the next few bases
+                penalty = 0
+                probe = next_states[state * 4 + base]
+                for j in range(i + 1, min(length, i + 1 + lookahead)):
+                    if codes[j] == 4:
                         break
-                else:
-                    last_base = base
-                    run_length = 1
-            attempt += 1
-            continue
-        if contains_unstable_motifs(seq, FORBIDDEN_MOTIFS):
-            # Replace one base in the motif
-            for motif in FORBIDDEN_MOTIFS:
-                idx = seq.find(motif)
-                if idx != -1:
-                    seq = mutate(seq, idx + len(motif)//2)
+                    penalty += violations[probe * 4 + codes[j]]
+                    probe = next_states[probe * 4 + codes[j]]
+                gc_shift = (base in (1, 2)) - (code in (1, 2))
+                gc_penalty = abs(gc_count + gc_shift - target)
+                key = (penalty, gc_penalty, rng.random())
+                if best is None or key < best[0]:
+                    best = (key, base)
+            if best is None:
+                unresolved.append(i)
+            else:
+                base = best[1]
+                gc_count += (base in (1, 2)) - (code in (1, 2))
+                changed[i] = base
+                codes[i] = code = base
+        state = next_states[state * 4 + code]
+
+    # Pass 2: global GC content, flipping bases at seeded positions
+    gc_low = spec.gc_min / 100 * length
+    gc_high = spec.gc_max / 100 * length
+    if length and not (gc_low <= gc_count <= gc_high):
+        raise_gc = gc_count < gc_low
+        sources, targets = ((0, 3), [1, 2]) if raise_gc else ((1, 2), [0, 3])
+        order = list(range(length))
+        rng.shuffle(order)
+        for i in order:
+            if gc_low <= gc_count <= gc_high:
+                break
+            if codes[i] not in sources:
+                continue
+            rng.shuffle(targets)
+            for base in targets:
+                if not _local_violation(automaton, codes, i, base):
+                    codes[i] = base
+                    changed[i] = base
+                    gc_count += 1 if raise_gc else -1
                     break
-            attempt += 1
-            continue
-        # All constraints satisfied
-        return seq
-    raise ValueError("Unable to enforce constraints after many attempts.") 
\ No newline at end of file
+
+    repaired = bytearray(original)
+    repairs = []
+    for i in sorted(changed):
+        new_base = BASES[codes[i]]
+        if ord(new_base) != original[i]:
+            repaired[i] = ord(new_base)
+            repairs.append((i, chr(original[i]), new_base))
+    gc_content = (gc_count / length) * 100 if length else 0.0
+    return RepairResult(
+        sequence=repaired.decode('ascii'),
+        repairs=repairs,
+        unresolved=unresolved,
+        gc_content=gc_content,
+        gc_in_bounds=not length or gc_low <= gc_count <= gc_high,
+    )
+
+
+def enforce_constraints(dna_sequence: str, spec: ConstraintSpec = DEFAULT_SPEC, seed: int = 0) -> str:
+    """Modify the DNA sequence to enforce biological constraints (GC content, homopolymers, motifs).
+
+    Deterministic for a given seed. Use ``repair_sequence`` to see which
+    positions were changed or could not be repaired.
+    """
+    return repair_sequence(dna_sequence, spec, seed).sequence
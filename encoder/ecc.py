@@ -0,0 +1,389 @@
+"""Reed-Solomon backends over GF(256).
+
+Two interchangeable backends produce byte-identical codewords:
+
+- ``numpy``: a vectorized systematic encoder that runs the parity LFSR over
+  all codewords of a payload at once (one array operation per message byte
+  position instead of one Python loop iteration per byte and codeword).
+- ``reedsolo``: the ``reedsolo`` package; its compiled ``creedsolo``
+  extension is used automatically when installed.
+
+Decoding (error location and correction) always goes through reedsolo. Codec
+instances are cached per (nsym, nsize), since building one recomputes the
+generator polynomial. ``rs_syndromes`` evaluates the syndromes of many
+codewords in one pass, which tells clean codewords from damaged ones without
+running the full decoder: ``rs_decode_blocks`` strips the parity of clean
+codewords and only sends the damaged ones through Berlekamp-Massey/Forney.
+
+All codecs use the reedsolo defaults: primitive polynomial 0x11d, generator
+2 and first consecutive root 0.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+try:
+    import creedsolo as _reedsolo
+except ImportError:
+    import reedsolo as _reedsolo
+
+RSCodec = _reedsolo.RSCodec
+ReedSolomonError = _reedsolo.ReedSolomonError
+
+RS_BLOCK_SIZE = 255
+PRIMITIVE_POLYNOMIAL = 0x11d
+ECC_BACKENDS = ('numpy', 'reedsolo')
+DEFAULT_ECC_BACKEND = 'numpy'
+
+
+@dataclass
+class ShardReport:
+    """Outcome of decoding one shard (a range of codewords) in parallel.
+
+    Attributes:
+        index (int): Shard number.
+        first_codeword (int): Index of the shard's first codeword.
+        codewords (int): Number of codewords in the shard.
+        errors (dict[int, int]): Codeword index -> corrected symbols, for damaged codewords.
+        error (tuple[int, str], optional): (codeword index, message) of the first
+            uncorrectable codeword, if any.
+    """
+    index: int
+    first_codeword: int
+    codewords: int
+    errors: dict = field(default_factory=dict)
+    error: Optional[tuple] = None
+
+
+@dataclass
+class DecodeReport:
+    """Error statistics of a Reed-Solomon decode.
+
+    Attributes:
+        codewords (int): Number of codewords decoded.
+        errors (dict[int, int]): Codeword index -> number of corrected symbols,
+            for every codeword that needed correction.
+        shards (list[ShardReport]): Per-shard results of a parallel decode (empty otherwise).
+    """
+    codewords: int = 0
+    errors: dict = field(default_factory=dict)
+    shards: list = field(default_factory=list)
+
+    @property
+    def corrected_codewords(self) -> int:
+        """Number of codewords that contained errors."""
+        return len(self.errors)
+
+    @property
+    def corrected_symbols(self) -> int:
+        """Total number of corrected symbols."""
+        return sum(self.errors.values())
+
+    @property
+    def max_errors(self) -> int:
+        """Most symbols corrected in a single codeword."""
+        return max(self.errors.values(), default=0)
+
+
+class UncorrectableCodewordError(ValueError):
+    """Raised when a codeword has more errors than its parity can correct.
+
+    Attributes:
+        index (int): Index of the failing codeword.
+        decoded (bytes): Payload of the codewords before it, already decoded.
+    """
+
+    def __init__(self, index: int, nsize: int, decoded: bytes, error: Exception):
+        self.index = index
+        self.decoded = decoded
+        super().__init__(
+            f"Reed-Solomon codeword {index} (encoded bytes {index * nsize}-{index * nsize + nsize - 1}) "
+            f"could not be corrected: {error}"
+        )
+
+
+def _build_tables() -> tuple[np.ndarray, np.ndarray]:
+    exp = np.zeros(512, dtype=np.uint8)
+    log = np.zeros(256, dtype=np.int64)
+    value = 1
+    for power in range(255):
+        exp[power] = value
+        log[value] = power
+        value <<= 1
+        if value & 0x100:
+            value ^= PRIMITIVE_POLYNOMIAL
+    # Doubled so that log[a] + log[b] never needs a modulo
+    exp[255:510] = exp[:255]
+    return exp, log
+
+
+GF_EXP, GF_LOG = _build_tables()
+
+
+def gf_multiply_table(factors) -> np.ndarray:
+    """Return ``table[x, i] = x * factors[i]`` in GF(256) for every byte x."""
+    factors = np.asarray(factors, dtype=np.int64)
+    table = GF_EXP[GF_LOG[:, None] + GF_LOG[factors][None, :]]
+    table[0, :] = 0
+    table[:, factors == 0] = 0
+    return table
+
+
+@lru_cache(maxsize=None)
+def generator_polynomial(nsym: int) -> tuple:
+    """Coefficients of prod(x - 2**i) for i < nsym, highest degree first."""
+    generator = np.ones(1, dtype=np.uint8)
+    for power in range(nsym):
+        root = gf_multiply_table([GF_EXP[power]])[:, 0]
+        shifted = np.append(generator, 0)
+        shifted[1:] ^= root[generator]
+        generator = shifted
+    return tuple(int(coefficient) for coefficient in generator)
+
+
+@lru_cache(maxsize=None)
+def _parity_table(nsym: int) -> np.ndarray:
+    return gf_multiply_table(generator_polynomial(nsym)[1:])
+
+
+@lru_cache(maxsize=None)
+def _syndrome_table(nsym: int) -> np.ndarray:
+    return gf_multiply_table(GF_EXP[:nsym])
+
+
+@lru_cache(maxsize=None)
+def get_codec(nsym: int = 10, nsize: int = RS_BLOCK_SIZE) -> RSCodec:
+    """Return a shared codec instance for the given parameters."""
+    return RSCodec(nsym, nsize=nsize)
+
+
+def _check_parameters(nsym: int, nsize: int) -> None:
+    if not 0 < nsym < nsize <= RS_BLOCK_SIZE:
+        raise ValueError(f"Invalid Reed-Solomon parameters: nsym={nsym}, nsize={nsize}")
+
+
+def rs_parity(messages: np.ndarray, nsym: int) -> np.ndarray:
+    """Compute the parity symbols of many equally long messages at once.
+
+    Args:
+        messages (np.ndarray): uint8 array of shape (codewords, message length).
+        nsym (int): Number of parity symbols per codeword.
+
+    Returns:
+        np.ndarray: uint8 array of shape (codewords, nsym).
+    """
+    table = _parity_table(nsym)
+    parity = np.zeros((len(messages), nsym), dtype=np.uint8)
+    for column in messages.T:
+        feedback = column ^ parity[:, 0]
+        parity[:, :-1] = parity[:, 1:]
+        parity[:, -1] = 0
+        parity ^= table[feedback]
+    return parity
+
+
+def rs_encode(data: bytes, nsym: int = 10, nsize: int = RS_BLOCK_SIZE, backend: str = DEFAULT_ECC_BACKEND) -> bytes:
+    """Split data into messages of ``nsize - nsym`` bytes and append parity to each.
+
+    The last message may be shorter, giving a shortened codeword, exactly as
+    ``RSCodec.encode`` does.
+
+    Args:
+        data (bytes): Payload.
+        nsym (int): Number of parity symbols per codeword.
+        nsize (int): Codeword length in bytes.
+        backend (str): One of ``ECC_BACKENDS``.
+
+    Returns:
+        bytes: The concatenated codewords.
+
+    Raises:
+        ValueError: If the backend or parameters are invalid.
+    """
+    if backend not in ECC_BACKENDS:
+        raise ValueError(f"Unknown ECC backend: {backend}. Choose from {', '.join(ECC_BACKENDS)}")
+    _check_parameters(nsym, nsize)
+    if backend == 'reedsolo':
+        return bytes(get_codec(nsym, nsize).encode(data))
+
+    message_size = nsize - nsym
+    payload = np.frombuffer(bytes(data), dtype=np.uint8)
+    count = -(-len(payload) // message_size)
+    tail = len(payload) - (count - 1) * message_size if count else 0
+    # Left-pad the last message with zeros: leading zeros do not change the parity
+    messages = np.zeros((count, message_size), dtype=np.uint8)
+    flat = messages.reshape(-1)
+    flat[:len(payload) - tail] = payload[:len(payload) - tail]
+    if count:
+        messages[-1, message_size - tail:] = payload[len(payload) - tail:]
+    parity = rs_parity(messages, nsym)
+
+    codewords = np.concatenate([messages, parity], axis=1)
+    encoded = codewords.reshape(-1)
+    if count:
+        # Drop the padding of the shortened last codeword
+        start = (count - 1) * nsize
+        encoded = np.concatenate([encoded[:start], encoded[start + message_size - tail:]])
+    return encoded.tobytes()
+
+
+def rs_syndromes(codewords: np.ndarray, nsym: int) -> np.ndarray:
+    """Evaluate the syndromes of many equally long codewords at once.
+
+    A codeword is error-free exactly when all of its syndromes are zero.
+
+    Args:
+        codewords (np.ndarray): uint8 array of shape (codewords, codeword length).
+        nsym (int): Number of parity symbols per codeword.
+
+    Returns:
+        np.ndarray: uint8 array of shape (codewords, nsym).
+    """
+    table = _syndrome_table(nsym)
+    columns = np.arange(nsym)
+    syndromes = np.zeros((len(codewords), nsym), dtype=np.uint8)
+    for column in codewords.T:
+        # Horner step for every root 2**i at once
+        syndromes = table[syndromes, columns] ^ column[:, None]
+    return syndromes
+
+
+def _gf_multiply(a: int, b: int) -> int:
+    return int(GF_EXP[GF_LOG[a] + GF_LOG[b]]) if a and b else 0
+
+
+def _gf_invert_matrix(matrix: list) -> list:
+    """Invert a square GF(256) matrix (list of rows) by Gauss-Jordan elimination."""
+    size = len(matrix)
+    rows = [list(row) + [int(i == j) for j in range(size)] for i, row in enumerate(matrix)]
+    for column in range(size):
+        pivot = next(row for row in range(column, size) if rows[row][column])
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        inverse = int(GF_EXP[255 - GF_LOG[rows[column][column]]])
+        rows[column] = [_gf_multiply(value, inverse) for value in rows[column]]
+        for row in range(size):
+            factor = rows[row][column]
+            if row != column and factor:
+                rows[row] = [value ^ _gf_multiply(factor, pivot_value) for value, pivot_value in zip(rows[row], rows[column])]
+    return [row[size:] for row in rows]
+
+
+def rs_correct_erasures(codewords: np.ndarray, erasures, nsym: int) -> np.ndarray:
+    """Fill in known-missing symbols of many codewords that share erasure positions.
+
+    With the positions known, erasure decoding is a linear system: the
+    erased symbols are the only unknowns of the first ``len(erasures)``
+    syndrome equations. Its (Vandermonde) matrix is inverted once and
+    applied to the syndromes of all codewords together, so up to ``nsym``
+    erasures are corrected per codeword.
+
+    Args:
+        codewords (np.ndarray): uint8 array of shape (codewords, codeword length);
+            the values at the erased positions are ignored.
+        erasures: Erased positions (column indices).
+        nsym (int): Number of parity symbols per codeword.
+
+    Returns:
+        np.ndarray: A copy of ``codewords`` with the erased positions filled in.
+
+    Raises:
+        ValueError: If there are more erasures than parity symbols.
+    """
+    erasures = sorted(set(int(position) for position in erasures))
+    if len(erasures) > nsym:
+        raise ValueError(f"{len(erasures)} erasures exceed the {nsym} parity symbols")
+    filled = codewords.copy()
+    if not erasures:
+        return filled
+    filled[:, erasures] = 0
+    length = codewords.shape[1]
+    syndromes = rs_syndromes(filled, len(erasures))
+    # Row j, column t: the locator of erasure t raised to the power j
+    locators = [int(GF_LOG[GF_EXP[length - 1 - position]]) for position in erasures]
+    matrix = [[int(GF_EXP[(log * power) % 255]) for log in locators] for power in range(len(erasures))]
+    inverse = np.array(_gf_invert_matrix(matrix), dtype=np.int64)
+    values = np.zeros((len(codewords), len(erasures)), dtype=np.uint8)
+    for power in range(len(erasures)):
+        values ^= gf_multiply_table(inverse[:, power])[syndromes[:, power]]
+    filled[:, erasures] = values
+    return filled
+
+
+def rs_decode(data: bytes, nsym: int = 10, nsize: int = RS_BLOCK_SIZE) -> tuple[bytes, int]:
+    """Correct and strip the parity of concatenated codewords.
+
+    Args:
+        data (bytes): Codewords as produced by ``rs_encode``.
+        nsym (int): Number of parity symbols per codeword.
+        nsize (int): Codeword length in bytes.
+
+    Returns:
+        tuple[bytes, int]: The payload and the number of corrected bytes.
+
+    Raises:
+        ReedSolomonError: If a codeword has too many errors.
+    """
+    decoded, _, errata = get_codec(nsym, nsize).decode(data)
+    return bytes(decoded), len(errata)
+
+
+def rs_decode_blocks(data: bytes, nsym: int = 10, nsize: int = RS_BLOCK_SIZE, first_index: int = 0, report: DecodeReport = None) -> bytes:
+    """Correct and strip the parity of concatenated codewords, skipping clean ones.
+
+    The syndromes of all codewords are computed in bulk; codewords whose
+    syndromes are all zero are error-free and only have their parity
+    removed. The rest are decoded one by one.
+
+    Args:
+        data (bytes): Codewords as produced by ``rs_encode``; the last may be shortened.
+        nsym (int): Number of parity symbols per codeword.
+        nsize (int): Codeword length in bytes.
+        first_index (int): Index of the first codeword, for reports and errors.
+        report (DecodeReport, optional): Updated with the codeword count and corrected errors.
+
+    Returns:
+        bytes: The payload.
+
+    Raises:
+        UncorrectableCodewordError: If a codeword has too many errors.
+    """
+    _check_parameters(nsym, nsize)
+    message_size = nsize - nsym
+    encoded = np.frombuffer(bytes(data), dtype=np.uint8)
+    count = -(-len(encoded) // nsize)
+    tail = len(encoded) - (count - 1) * nsize if count else 0
+    if 0 < tail <= nsym:
+        raise ValueError(f"Truncated Reed-Solomon codeword: {tail} bytes, needs more than {nsym}")
+    # Left-pad the shortened last codeword: leading zeros do not change the syndromes
+    codewords = np.zeros((count, nsize), dtype=np.uint8)
+    codewords.reshape(-1)[:len(encoded) - tail] = encoded[:len(encoded) - tail]
+    if count:
+        codewords[-1, nsize - tail:] = encoded[len(encoded) - tail:]
+    dirty = np.flatnonzero(rs_syndromes(codewords, nsym).any(axis=1))
+
+    messages = codewords[:, :message_size]
+    errors = {}
+    codec = get_codec(nsym, nsize) if len(dirty) else None
+    for row in dirty:
+        row = int(row)
+        start = nsize - tail if row == count - 1 else 0
+        try:
+            decoded, _, errata = codec.decode(codewords[row, start:].tobytes())
+        except ReedSolomonError as error:
+            partial = messages[:row].reshape(-1).tobytes()
+            raise UncorrectableCodewordError(first_index + row, nsize, partial, error) from error
+        messages[row, start:] = np.frombuffer(bytes(decoded), dtype=np.uint8)
+        errors[first_index + row] = len(errata)
+
+    if report is not None:
+        report.codewords += count
+        report.errors.update(errors)
+    payload = messages.reshape(-1)
+    if count:
+        # Drop the padding of the shortened last codeword
+        cut = (count - 1) * message_size
+        payload = np.concatenate([payload[:cut], payload[cut + nsize - tail:]])
+    return payload.tobytes()
@@ -1,6 +1,11 @@
-from reedsolo import RSCodec
+from encoder.ecc import DEFAULT_ECC_BACKEND, rs_encode
 
-def add_reed_solomon(data: bytes, nsym: int = 10) -> bytes:
-    """Add Reed-Solomon error correction symbols to the input data."""
-    rsc = RSCodec(nsym)
-    return rsc.encode(data) 
\ No newline at end of file
+def add_reed_solomon(data: bytes, nsym: int = 10, backend: str = DEFAULT_ECC_BACKEND) -> bytes:
+    """Add Reed-Solomon error correction symbols to the input data.
+
+    Args:
+        data (bytes): Payload.
+        nsym (int): Number of error correction symbols per 255-byte codeword.
+        backend (str): ECC backend, 'numpy' (vectorized) or 'reedsolo'; both give identical output.
+    """
+    return rs_encode(data, nsym=nsym, backend=backend)
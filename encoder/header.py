@@ -0,0 +1,109 @@
+"""Self-describing archive header.
+
+Encoders store everything a decoder needs to know up front in a compact
+header: format version, codec, Reed-Solomon parameters, the original payload
+length and SHA-256, the original filename, the compression applied before
+error correction (with its block sizes), the size of the member directory
+of multi-file archives and the index of the FASTA metadata blocks. The
+header serializes to compact JSON (``to_bytes``) or its base64 text
+(``to_record``); ``dnaio.header`` finds it in FASTA files and containers.
+"""
+
+import base64
+import hashlib
+import json
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
+
+ARCHIVE_FORMAT_VERSION = 1
+
+
+@dataclass
+class ArchiveHeader:
+    """Parameters needed to decode an archive.
+
+    Attributes:
+        codec (str): Mapping codec of the main sequence.
+        nsym (int): Reed-Solomon error correction symbols per codeword.
+        rs_block_size (int): Reed-Solomon codeword length in bytes.
+        payload_length (int, optional): Length of the original payload in bytes.
+        sha256 (str, optional): Hex SHA-256 of the original payload.
+        filename (str, optional): Original filename.
+        compression (str, optional): Method the file was compressed with
+            before error correction (see ``encoder.compression``); the payload
+            length and hash are then those of the compressed payload.
+        compression_block (int, optional): Original bytes per independently
+            compressed block.
+        compressed_sizes (list[int], optional): Compressed size of each
+            block, so a byte range of the original file maps to the payload
+            bytes holding it.
+        directory_length (int, optional): Size of the directory at the end of
+            the payload of a multi-file archive (see ``dnaio.archive``).
+        metadata_block (int, optional): Offsets per independently packed
+            block of the FASTA metadata record.
+        metadata_index (list[int], optional): Packed length in bytes of each
+            of those blocks, so a range decoder can seek to the block it needs.
+        format_version (int): Header format version.
+    """
+
+    codec: str
+    nsym: int
+    rs_block_size: int = 255
+    payload_length: Optional[int] = None
+    sha256: Optional[str] = None
+    filename: Optional[str] = None
+    compression: Optional[str] = None
+    compression_block: Optional[int] = None
+    compressed_sizes: Optional[list] = None
+    directory_length: Optional[int] = None
+    metadata_block: Optional[int] = None
+    metadata_index: Optional[list] = None
+    format_version: int = ARCHIVE_FORMAT_VERSION
+
+    @classmethod
+    def for_payload(cls, data: bytes, codec: str, nsym: int, filename: str = None) -> 'ArchiveHeader':
+        """Build the header for an in-memory payload."""
+        return cls(codec=codec, nsym=nsym, payload_length=len(data), sha256=hashlib.sha256(data).hexdigest(), filename=filename)
+
+    def to_bytes(self) -> bytes:
+        """Serialize as compact JSON, leaving out unset fields."""
+        return json.dumps({k: v for k, v in asdict(self).items() if v is not None}, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ArchiveHeader':
+        """Parse a serialized header; unknown fields from newer writers are ignored.
+
+        Raises:
+            ValueError: If the header is malformed or from an unsupported format version.
+        """
+        try:
+            values = json.loads(data.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            raise ValueError(f"Malformed archive header: {error}") from None
+        if values.get('format_version', ARCHIVE_FORMAT_VERSION) > ARCHIVE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported archive format version: {values['format_version']}")
+        known = {field.name for field in fields(cls)}
+        return cls(**{k: v for k, v in values.items() if k in known})
+
+    def to_record(self) -> str:
+        """Encode as the sequence text of a FASTA header record."""
+        return base64.b64encode(self.to_bytes()).decode('ascii')
+
+    @classmethod
+    def from_record(cls, sequence: str) -> 'ArchiveHeader':
+        """Decode the sequence text of a FASTA header record."""
+        try:
+            return cls.from_bytes(base64.b64decode(sequence.encode('ascii'), validate=True))
+        except ValueError as error:
+            raise ValueError(f"Malformed archive header record: {error}") from None
+
+    def verify(self, data: bytes) -> None:
+        """Check a decoded payload against the recorded length and hash.
+
+        Raises:
+            ValueError: On a length or hash mismatch.
+        """
+        if self.payload_length is not None and len(data) != self.payload_length:
+            raise ValueError(f"Decoded payload has {len(data)} bytes, header records {self.payload_length}")
+        if self.sha256 is not None and hashlib.sha256(data).hexdigest() != self.sha256:
+            raise ValueError("Decoded payload does not match the SHA-256 recorded in the header")
@@ -0,0 +1,138 @@
+"""Table-driven, constraint-aware base-4 to DNA mapping engine.
+
+The mapper keeps a small rolling state (a compiled constraint automaton state
+covering motif matching and homopolymer runs, plus a running GC count) and
+resolves every digit with a single table lookup, so mapping runs in linear
+time. Transition entries are computed lazily the first time a (state, digit)
+pair is seen and shared by all mappers using the same ``ConstraintSpec``.
+"""
+
+from functools import lru_cache
+
+from encoder.constraints import BASES, DEFAULT_SPEC, ConstraintSpec, compile_constraints
+
+
+@lru_cache(maxsize=64)
+def _transition_table(spec: ConstraintSpec) -> list:
+    """Lazily filled transition table shared by the mappers of a spec, cached like its automaton."""
+    return [None] * (4 * compile_constraints(spec).state_count)
+
+
+class ConstraintMapper:
+    """Incremental mapper producing the same output as the original greedy search.
+
+    For every digit the offsets 0-3 are tried in order and the first base that
+    neither extends a homopolymer beyond ``spec.max_homopolymer`` nor touches a
+    forbidden motif is emitted, together with the offset that was used. On the
+    final digit the global GC content must additionally fall within the
+    specified bounds. If no offset is acceptable the digit is mapped directly
+    with offset 0.
+
+    A mapper can be fed several times; state is carried across calls, which
+    makes it usable for chunked input.
+
+    Args:
+        spec (ConstraintSpec): Constraints to respect while mapping.
+    """
+
+    def __init__(self, spec: ConstraintSpec = DEFAULT_SPEC):
+        self.spec = spec
+        self.automaton = compile_constraints(spec)
+        # _table[state * 4 + digit] -> (base code, offset, next state * 4)
+        self._table = _transition_table(spec)
+        self._state = self.automaton.initial * 4
+        self.length = 0
+        self.gc_count = 0
+
+    @classmethod
+    def resume(cls, tail, length: int, gc_count: int, spec: ConstraintSpec = DEFAULT_SPEC) -> 'ConstraintMapper':
+        """Create a mapper that continues an existing sequence.
+
+        The mapper state only depends on the last ``automaton.context`` bases,
+        so only the tail of the sequence is needed.
+
+        Args:
+            tail: Last bases of the sequence mapped so far (str or ASCII bytes); longer input is fine.
+            length (int): Length of the sequence mapped so far.
+            gc_count (int): Number of G/C bases in it.
+            spec (ConstraintSpec): Constraints to respect while mapping.
+        """
+        mapper = cls(spec)
+        if isinstance(tail, (bytes, bytearray)):
+            tail = tail.decode('ascii')
+        context = mapper.automaton.context
+        mapper._state = mapper.automaton.feed(tail[-context:] if context else '') * 4
+        mapper.length = length
+        mapper.gc_count = gc_count
+        return mapper
+
+    def _candidates(self, index: int, digit: int):
+        """Yield (base, offset) pairs that satisfy the homopolymer and motif checks."""
+        state = index // 4
+        for offset in range(4):
+            base = (digit + offset) % 4
+            if self.automaton.allows(state, base):
+                yield base, offset
+
+    def _fill(self, index: int, digit: int) -> tuple:
+        """Compute and cache the transition for a (state, digit) pair."""
+        base, offset = next(self._candidates(index, digit), (digit, 0))
+        entry = (ord(BASES[base]), offset, self.automaton.step(index // 4, base) * 4)
+        self._table[index + digit] = entry
+        return entry
+
+    def _map_final(self, digit: int) -> tuple[int, int]:
+        """Map the last digit of a sequence, additionally checking global GC content."""
+        total = self.length + 1
+        for base, offset in self._candidates(self._state, digit):
+            gc_content = ((self.gc_count + (base in (1, 2))) / total) * 100
+            if self.spec.gc_min <= gc_content <= self.spec.gc_max:
+                return base, offset
+        return digit, 0
+
+    def map(self, digits, final: bool = True) -> tuple[bytearray, bytearray]:
+        """Map a run of base-4 digits, continuing from the current state.
+
+        Args:
+            digits: Iterable of base-4 digits (0-3), e.g. a list, bytes or uint8 array.
+            final (bool): Whether the last digit ends the sequence (enables the GC check).
+
+        Returns:
+            tuple[bytearray, bytearray]: ASCII DNA bases and the offset used for each digit.
+
+        Raises:
+            ValueError: If a digit is outside 0-3.
+        """
+        digits = bytes(digits)
+        if digits and max(digits) > 3:
+            raise ValueError(f"Invalid base4 digit: {max(digits)}. Must be 0-3.")
+        last = None
+        if final and digits:
+            digits, last = digits[:-1], digits[-1]
+
+        seq = bytearray()
+        offsets = bytearray()
+        seq_append = seq.append
+        offsets_append = offsets.append
+        table = self._table
+        fill = self._fill
+        state = self._state
+        for digit in digits:
+            entry = table[state + digit]
+            if entry is None:
+                entry = fill(state, digit)
+            code, offset, state = entry
+            seq_append(code)
+            offsets_append(offset)
+        self._state = state
+        self.length += len(seq)
+        self.gc_count += seq.count(b'G') + seq.count(b'C')
+
+        if last is not None:
+            base, offset = self._map_final(last)
+            seq.append(ord(BASES[base]))
+            offsets.append(offset)
+            self._state = self.automaton.step(self._state // 4, base) * 4
+            self.length += 1
+            self.gc_count += base in (1, 2)
+        return seq, offsets
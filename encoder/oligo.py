@@ -0,0 +1,359 @@
+"""Segmentation of an encoded payload into addressed, fixed-length oligos.
+
+Synthesis vendors make short strands, so the Reed-Solomon coded byte stream
+is cut into slices of equal size and every slice becomes one strand:
+
+    [forward primer] [body] [reverse primer]
+
+The body is the rotating code of the digits
+
+    variant | address | data | check
+
+- ``variant``: ``VARIANT_DIGITS`` digits selecting the scrambling keystreams.
+- ``address``: position of the slice in the stream (``address_digits`` base-4
+  digits), scrambled with a keystream derived from the variant alone.
+- ``data``: the slice, scrambled with a keystream derived from (address, variant).
+- ``check``: a 16-bit CRC of address, variant and slice, also scrambled.
+
+The rotating code keeps the body homopolymer-free and starts it relative to
+the last primer base. Scrambling breaks up repeats in the payload and
+spreads GC content; if a strand still violates the ``ConstraintSpec`` (GC
+bounds, homopolymers at the primer junctions, motifs), the next variant is
+tried. Strands are self-contained, so they can be decoded in any order.
+
+The stream starts with the archive header (length-prefixed and
+Reed-Solomon coded with ``HEADER_NSYM``), followed by the coded payload,
+which makes a pool decodable without out-of-band parameters apart from the
+primers. A pre-compressed payload (see ``encoder.compression``) records its
+method and block sizes in that header and is decompressed by the decoder.
+
+Optionally an outer erasure code protects against strand dropout: the data
+slices are grouped ``group_strands`` at a time and every byte column of a
+group is Reed-Solomon coded across strands, adding ``parity_strands``
+parity strands per group. Group ``g`` occupies the addresses
+``g * (group_strands + parity_strands)`` onwards, parity strands first.
+Within a codeword the data strands are stored in reverse order, so a short
+last group is an ordinary shortened code whose missing (virtual) strands
+are leading zeros. Since strands carry addresses, a missing strand is an
+erasure at a known position, and any ``parity_strands`` missing strands of
+a group can be rebuilt.
+"""
+
+import struct
+import zlib
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from codec.rotating import CODE_TABLE, base4_rows_to_trits, rotating_length
+from encoder.compression import COMPRESSION_BLOCK, compress_blocks
+from encoder.constraints import BASE_CODES, DEFAULT_SPEC, ConstraintSpec
+from encoder.ecc import RS_BLOCK_SIZE, rs_encode, rs_parity
+from encoder.error_correction import add_reed_solomon
+from encoder.header import ArchiveHeader
+
+DEFAULT_OLIGO_LENGTH = 150
+DEFAULT_ADDRESS_DIGITS = 12
+CHECK_DIGITS = 8
+VARIANT_DIGITS = 2
+VARIANTS = 4 ** VARIANT_DIGITS
+HEADER_NSYM = 16
+# Strands checked against the constraints per array operation
+CONSTRAINT_BATCH = 8192
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+@dataclass(frozen=True)
+class OligoLayout:
+    """Shape of the strands in an oligo pool.
+
+    Attributes:
+        length (int): Maximum strand length in bases, primers included. All
+            strands of a pool have the same length, ``strand_length``, which
+            can be a few bases shorter since slices hold whole bytes.
+        address_digits (int): Base-4 digits of the strand address.
+        forward_primer (str): Sequence prepended to every strand.
+        reverse_primer (str): Sequence appended to every strand.
+        parity_strands (int): Outer-code parity strands per group (0: no outer code).
+        group_strands (int, optional): Data strands per outer-code group; by
+            default as many as fit in a 255-strand codeword.
+    """
+    length: int = DEFAULT_OLIGO_LENGTH
+    address_digits: int = DEFAULT_ADDRESS_DIGITS
+    forward_primer: str = ''
+    reverse_primer: str = ''
+    parity_strands: int = 0
+    group_strands: int = None
+
+    def __post_init__(self):
+        for primer in (self.forward_primer, self.reverse_primer):
+            if set(primer) - set('ACGT'):
+                raise ValueError(f"Invalid primer: {primer}. Primers may only contain A, C, G, T.")
+        if self.slice_size < 1:
+            raise ValueError(f"Oligo length {self.length} leaves no room for data")
+        if self.parity_strands and not (self.parity_strands > 0 and 0 < self.group_data and self.group_data + self.parity_strands <= RS_BLOCK_SIZE):
+            raise ValueError(
+                f"Invalid outer code: {self.group_data} data + {self.parity_strands} parity strands per group "
+                f"(at most {RS_BLOCK_SIZE} in total)"
+            )
+
+    @property
+    def body_length(self) -> int:
+        """Bases available between the primers."""
+        return self.length - len(self.forward_primer) - len(self.reverse_primer)
+
+    @property
+    def slice_size(self) -> int:
+        """Payload bytes carried by each strand."""
+        digits = 0
+        while rotating_length(digits + 1) <= self.body_length:
+            digits += 1
+        return (digits - VARIANT_DIGITS - self.address_digits - CHECK_DIGITS) // 4
+
+    @property
+    def body_digits(self) -> int:
+        """Base-4 digits encoded in each body."""
+        return VARIANT_DIGITS + self.address_digits + 4 * self.slice_size + CHECK_DIGITS
+
+    @property
+    def strand_length(self) -> int:
+        """Actual length of every strand."""
+        return len(self.forward_primer) + rotating_length(self.body_digits) + len(self.reverse_primer)
+
+    @property
+    def capacity(self) -> int:
+        """Number of distinct addresses."""
+        return 4 ** self.address_digits
+
+    @property
+    def group_data(self) -> int:
+        """Data strands per outer-code group."""
+        if self.group_strands is not None:
+            return self.group_strands
+        return RS_BLOCK_SIZE - self.parity_strands if self.parity_strands else RS_BLOCK_SIZE
+
+    @property
+    def group_span(self) -> int:
+        """Addresses taken by a full outer-code group."""
+        return self.group_data + self.parity_strands
+
+    def data_address(self, index: int) -> int:
+        """Address of the strand holding data slice ``index``."""
+        if not self.parity_strands:
+            return index
+        group, offset = divmod(index, self.group_data)
+        return group * self.group_span + self.parity_strands + offset
+
+    def address_count(self, data_strands: int) -> int:
+        """Number of strands (data and parity) needed for ``data_strands`` slices."""
+        return data_strands + self.parity_strands * -(-data_strands // self.group_data)
+
+    @property
+    def start_code(self) -> int:
+        """Base code the body's rotating code starts from."""
+        return 'ACGT'.index(self.forward_primer[-1]) if self.forward_primer else 0
+
+
+@dataclass
+class OligoPool:
+    """Result of segmenting a payload into strands.
+
+    Attributes:
+        strands (list[str]): One strand per address, in address order.
+        layout (OligoLayout): Layout of the strands.
+        header_strands (int): Number of leading data slices holding the archive header.
+        data_strands (int): Number of data strands; the rest are outer-code parity.
+        violations (list[int]): Addresses of strands that violate the constraints
+            with every scrambling variant.
+    """
+    strands: list
+    layout: OligoLayout
+    header_strands: int
+    data_strands: int = 0
+    violations: list = field(default_factory=list)
+
+
+def keystream(addresses: np.ndarray, variants: np.ndarray, count: int) -> np.ndarray:
+    """Pseudo-random base-4 digits for every (address, variant), splitmix64-based.
+
+    Args:
+        addresses (np.ndarray): Strand addresses.
+        variants (np.ndarray): Scrambling variants (below ``VARIANTS``).
+        count (int): Digits per strand.
+
+    Returns:
+        np.ndarray: uint8 array of shape (strands, count).
+    """
+    words = -(-count // 32)
+    seeds = addresses.astype(np.uint64) * np.uint64(VARIANTS) + variants.astype(np.uint64)
+    state = seeds[:, None] * _GOLDEN + (np.arange(1, words + 1, dtype=np.uint64) * _GOLDEN)[None, :]
+    state = (state ^ (state >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    state = (state ^ (state >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    state ^= state >> np.uint64(31)
+    shifts = np.arange(62, -1, -2, dtype=np.uint64)
+    digits = ((state[:, :, None] >> shifts) & np.uint64(3)).astype(np.uint8)
+    return digits.reshape(len(addresses), words * 32)[:, :count]
+
+
+def address_keystream(layout: OligoLayout, variants: np.ndarray) -> np.ndarray:
+    """Keystream for the address digits; seeded with an address no strand uses."""
+    return keystream(np.full(len(variants), layout.capacity, dtype=np.uint64), variants, layout.address_digits)
+
+
+def strand_checks(addresses: np.ndarray, variants: np.ndarray, slices: np.ndarray) -> np.ndarray:
+    """16-bit CRCs of (address, variant, slice) for every strand."""
+    return np.array(
+        [zlib.crc32(struct.pack('<QB', address, variant) + row.tobytes()) & 0xffff
+         for address, variant, row in zip(addresses.tolist(), variants.tolist(), slices)],
+        dtype=np.uint32,
+    )
+
+
+def _int_digits(values: np.ndarray, count: int) -> np.ndarray:
+    shifts = np.arange(2 * (count - 1), -1, -2, dtype=np.uint64)
+    return ((values.astype(np.uint64)[:, None] >> shifts) & np.uint64(3)).astype(np.uint8)
+
+
+def _bytes_digits(slices: np.ndarray) -> np.ndarray:
+    shifts = np.array([6, 4, 2, 0], dtype=np.uint8)
+    return ((slices[:, :, None] >> shifts) & 3).reshape(len(slices), -1)
+
+
+def _strand_codes(layout: OligoLayout, addresses: np.ndarray, variants: np.ndarray, slices: np.ndarray) -> np.ndarray:
+    """Build the base codes (0-3) of whole strands."""
+    checks = strand_checks(addresses, variants, slices)
+    payload = np.concatenate([_bytes_digits(slices), _int_digits(checks, CHECK_DIGITS)], axis=1)
+    payload = (payload + keystream(addresses, variants, payload.shape[1])) & 3
+    address = (_int_digits(addresses, layout.address_digits) + address_keystream(layout, variants)) & 3
+    digits = np.concatenate([_int_digits(variants, VARIANT_DIGITS), address, payload], axis=1)
+    steps = base4_rows_to_trits(digits).astype(np.int64) + 1
+    body = ((np.cumsum(steps, axis=1) + layout.start_code) % 4).astype(np.uint8)
+    primers = [np.frombuffer(primer.encode('ascii').translate(BASE_CODES), dtype=np.uint8) for primer in (layout.forward_primer, layout.reverse_primer)]
+    return np.concatenate([np.broadcast_to(primers[0], (len(body), len(primers[0]))), body, np.broadcast_to(primers[1], (len(body), len(primers[1])))], axis=1)
+
+
+def add_outer_parity(slices: np.ndarray, layout: OligoLayout) -> np.ndarray:
+    """Interleave outer-code parity strands with the data slices.
+
+    Args:
+        slices (np.ndarray): uint8 array of shape (data strands, slice size).
+        layout (OligoLayout): Layout with a non-zero ``parity_strands``.
+
+    Returns:
+        np.ndarray: The slices of all strands in address order.
+    """
+    count, size = slices.shape
+    data, parity = layout.group_data, layout.parity_strands
+    rows = np.zeros((layout.address_count(count), size), dtype=np.uint8)
+    for start in range(0, count, data):
+        group = slices[start:start + data]
+        base = start // data * layout.group_span
+        # Reversed, so that the slices of a short group are the tail of the message
+        messages = np.ascontiguousarray(group[::-1].T)
+        rows[base:base + parity] = rs_parity(messages, parity).T
+        rows[base + parity:base + parity + len(group)] = group
+    return rows
+
+
+def strand_violations(codes: np.ndarray, spec: ConstraintSpec = DEFAULT_SPEC) -> np.ndarray:
+    """Flag strands that break the GC bounds, the homopolymer limit or contain a motif.
+
+    Args:
+        codes (np.ndarray): Base codes (0-3) of shape (strands, length).
+        spec (ConstraintSpec): Constraints to check.
+
+    Returns:
+        np.ndarray: Boolean array, True for every violating strand.
+    """
+    gc = np.count_nonzero((codes == 1) | (codes == 2), axis=1) * 100.0 / codes.shape[1]
+    bad = (gc < spec.gc_min) | (gc > spec.gc_max)
+    run = spec.max_homopolymer + 1
+    if codes.shape[1] >= run:
+        same = codes[:, 1:] == codes[:, :-1]
+        windows = np.lib.stride_tricks.sliding_window_view(same, run - 1, axis=1)
+        bad |= windows.all(axis=2).any(axis=1)
+    for motif in spec.motifs:
+        if len(motif) <= codes.shape[1]:
+            pattern = np.frombuffer(motif.encode('ascii').translate(BASE_CODES), dtype=np.uint8)
+            windows = np.lib.stride_tricks.sliding_window_view(codes, len(motif), axis=1)
+            bad |= (windows == pattern).all(axis=2).any(axis=1)
+    return bad
+
+
+def segment_stream(stream: bytes, layout: OligoLayout = OligoLayout(), spec: ConstraintSpec = DEFAULT_SPEC) -> tuple[list, list]:
+    """Cut a byte stream into strands, choosing a constraint-satisfying variant per strand.
+
+    Args:
+        stream (bytes): Bytes to store; the last slice is zero-padded.
+        layout (OligoLayout): Strand layout; outer-code parity strands are
+            added when it has ``parity_strands``.
+        spec (ConstraintSpec): Constraints every strand should satisfy.
+
+    Returns:
+        tuple[list[str], list[int]]: Strands in address order and the addresses
+        that violate the constraints with every variant.
+
+    Raises:
+        ValueError: If the stream needs more strands than the address space holds.
+    """
+    size = layout.slice_size
+    count = max(1, -(-len(stream) // size))
+    if layout.address_count(count) > layout.capacity:
+        raise ValueError(f"{layout.address_count(count)} strands needed but {layout.address_digits} address digits allow only {layout.capacity}")
+    slices = np.zeros(count * size, dtype=np.uint8)
+    slices[:len(stream)] = np.frombuffer(stream, dtype=np.uint8)
+    slices = slices.reshape(count, size)
+    if layout.parity_strands:
+        slices = add_outer_parity(slices, layout)
+        count = len(slices)
+
+    strands = []
+    violations = []
+    for start in range(0, count, CONSTRAINT_BATCH):
+        batch = slices[start:start + CONSTRAINT_BATCH]
+        addresses = np.arange(start, start + len(batch), dtype=np.uint64)
+        variants = np.zeros(len(batch), dtype=np.uint8)
+        codes = _strand_codes(layout, addresses, variants, batch)
+        pending = np.flatnonzero(strand_violations(codes, spec))
+        for variant in range(1, VARIANTS):
+            if not len(pending):
+                break
+            retry = _strand_codes(layout, addresses[pending], np.full(len(pending), variant, dtype=np.uint8), batch[pending])
+            fixed = ~strand_violations(retry, spec)
+            codes[pending[fixed]] = retry[fixed]
+            pending = pending[~fixed]
+        violations.extend(int(address) for address in addresses[pending])
+        text = codes.tobytes().translate(CODE_TABLE).decode('ascii')
+        width = codes.shape[1]
+        strands.extend(text[i:i + width] for i in range(0, len(text), width))
+    return strands, violations
+
+
+def encode_oligos(binary_data: bytes, nsym: int = 10, layout: OligoLayout = OligoLayout(), spec: ConstraintSpec = DEFAULT_SPEC, filename: str = None, compression: str = None) -> OligoPool:
+    """Reed-Solomon code a payload and segment it into an addressed oligo pool.
+
+    Args:
+        binary_data (bytes): Payload.
+        nsym (int): Number of Reed-Solomon error correction symbols.
+        layout (OligoLayout): Strand layout.
+        spec (ConstraintSpec): Constraints every strand should satisfy.
+        filename (str, optional): Original filename, stored in the archive header.
+        compression (str, optional): One of ``COMPRESSIONS``, applied in
+            blocks before error correction and recorded in the archive header.
+
+    Returns:
+        OligoPool: The strands and the segmentation report.
+    """
+    sizes = None
+    if compression is not None:
+        binary_data, sizes = compress_blocks(binary_data, compression, COMPRESSION_BLOCK)
+    header = ArchiveHeader.for_payload(binary_data, 'oligo', nsym, filename)
+    if compression is not None:
+        header.compression, header.compression_block, header.compressed_sizes = compression, COMPRESSION_BLOCK, sizes
+    coded_header = rs_encode(header.to_bytes(), HEADER_NSYM)
+    prefix = struct.pack('<H', len(coded_header)) + coded_header
+    stream = prefix + add_reed_solomon(binary_data, nsym=nsym)
+    strands, violations = segment_stream(stream, layout, spec)
+    size = layout.slice_size
+    return OligoPool(strands, layout, -(-len(prefix) // size), max(1, -(-len(stream) // size)), violations)
@@ -0,0 +1,217 @@
+"""Block-parallel encoding across CPU cores.
+
+The payload is split into blocks whose size is a whole number of
+Reed-Solomon codewords (and of rotating-code groups), so encoding each block
+independently yields the same ECC bytes as encoding the whole payload.
+Worker processes Reed-Solomon code and map their block starting from a fixed
+boundary state; the parent process then joins the blocks:
+
+- 'mapped': the first digits of each block are re-mapped from the true
+  preceding state until the mapper state converges with the block's own, so
+  the result is identical to a serial encode.
+- 'rotating': each block is rotated by the last base of the preceding block,
+  which is again identical to a serial encode.
+- 'patch': blocks are repaired independently and a small window around each
+  boundary is repaired again; patch lists are merged and violations that
+  could not be repaired are reported.
+
+All outputs decode with ``decoder.decode_dna_sequence``.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from encoder.base_mapping import MappedSequence, base4_to_dna_direct, bytes_to_base4_array, check_codec
+from encoder.constraints import BASE_CODES, DEFAULT_SPEC, ConstraintSpec, compile_constraints, repair_sequence
+from encoder.ecc import RS_BLOCK_SIZE
+from encoder.error_correction import add_reed_solomon
+from encoder.mapper import ConstraintMapper
+from encoder.rotating import base4_to_rotating_dna
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+# Codewords per block must be a multiple of 8 so blocks also align to rotating-code groups (32 digits)
+CODEWORD_ALIGNMENT = 8
+
+
+def block_size_for(nsym: int, target: int = DEFAULT_BLOCK_SIZE) -> int:
+    """Return the payload block size closest to target that keeps blocks independent.
+
+    Args:
+        nsym (int): Number of Reed-Solomon error correction symbols.
+        target (int): Desired block size in bytes.
+
+    Returns:
+        int: Block size in bytes, a multiple of ``CODEWORD_ALIGNMENT`` RS messages.
+    """
+    unit = (RS_BLOCK_SIZE - nsym) * CODEWORD_ALIGNMENT
+    return max(1, round(target / unit)) * unit
+
+
+def _encode_block(job: tuple) -> tuple:
+    """Reed-Solomon code and map one block (runs in a worker process)."""
+    block, nsym, spec, codec, seed = job
+    digits = bytes_to_base4_array(add_reed_solomon(block, nsym=nsym))
+    if codec == 'mapped':
+        seq, offsets = ConstraintMapper(spec).map(digits, final=False)
+        return bytes(seq), bytes(offsets)
+    if codec == 'rotating':
+        return base4_to_rotating_dna(digits).encode('ascii'), None
+    repair = repair_sequence(base4_to_dna_direct(digits), spec, seed)
+    return repair.sequence.encode('ascii'), ([(position, original) for position, original, _ in repair.repairs], repair.unresolved)
+
+
+def _stitch_mapped(seq: bytearray, offsets: bytearray, starts: list[int], spec: ConstraintSpec) -> None:
+    """Re-map block heads from the true preceding state until they match the block output.
+
+    Also re-maps the very last digit with the global GC check, making the
+    result identical to mapping the whole digit stream serially. Digits are
+    recovered one at a time from the base and offset at the position being
+    re-mapped (every mapper output satisfies digit = base code - offset), so
+    only the seams are touched and the stream is never expanded.
+    """
+    length = len(seq)
+    boundaries = set(starts)
+    # The mapper state depends on exactly this many trailing bases
+    context = compile_constraints(spec).context
+    position = 0
+    for start in starts[1:]:
+        if start < position:
+            continue
+        mapper = ConstraintMapper.resume(seq[max(0, start - context):start], start, 0, spec)
+        agree = 0
+        position = start
+        while position < length - 1 and agree < max(context, 1):
+            if position in boundaries and position != start:
+                agree = 0
+            base, offset = mapper.map([(BASE_CODES[seq[position]] - offsets[position]) & 3], final=False)
+            if base[0] == seq[position] and offset[0] == offsets[position]:
+                agree += 1
+            else:
+                seq[position], offsets[position] = base[0], offset[0]
+                agree = 0
+            position += 1
+
+    if length:
+        last = length - 1
+        gc_count = seq.count(b'G', 0, last) + seq.count(b'C', 0, last)
+        mapper = ConstraintMapper.resume(seq[max(0, last - context):last], last, gc_count, spec)
+        base, offset = mapper.map([(BASE_CODES[seq[last]] - offsets[last]) & 3], final=True)
+        seq[last], offsets[last] = base[0], offset[0]
+
+
+def _stitch_rotating(parts: list[bytes]) -> bytearray:
+    """Rotate each block by the last base code of everything before it."""
+    seq = bytearray()
+    code = 0
+    for part in parts:
+        if code:
+            table = bytes(b'ACGT'[(b'ACGT'.index(i) + code) % 4] if i in b'ACGT' else i for i in range(256))
+            part = part.translate(table)
+        seq += part
+        if part:
+            code = b'ACGT'.index(part[-1])
+    return seq
+
+
+def _violation_ends(automaton, sequence: bytes) -> list[int]:
+    """Positions of the bases that extend a run too far or complete a motif."""
+    next_states, violations = automaton.transitions
+    state = automaton.initial
+    ends = []
+    for position, code in enumerate(sequence.translate(BASE_CODES)):
+        if code == 4:
+            state = automaton.initial
+            continue
+        if violations[state * 4 + code]:
+            ends.append(position)
+        state = next_states[state * 4 + code]
+    return ends
+
+
+def _stitch_patch(seq: bytearray, patches: dict, starts: list[int], spec: ConstraintSpec, seed: int, unresolved: list[int]) -> list[int]:
+    """Repair windows around block boundaries and merge the substitutions into patches.
+
+    Each window spans ``2 * context`` bases on either side of the boundary plus
+    ``context`` bases of the repaired blocks beyond that, which give the repair
+    the true state at its edges. The window is then re-checked together with
+    the bases around it.
+
+    Args:
+        unresolved (list[int]): Violations the blocks could not repair, as global positions.
+
+    Returns:
+        list[int]: Positions of the violations left after stitching, sorted.
+    """
+    window_spec = ConstraintSpec(max_homopolymer=spec.max_homopolymer, gc_min=0.0, gc_max=100.0, motifs=spec.motifs)
+    automaton = compile_constraints(window_spec)
+    context = automaton.context
+    remaining = set(unresolved)
+    for start in starts[1:]:
+        low, high = max(0, start - 3 * context), min(len(seq), start + 3 * context)
+        repair = repair_sequence(seq[low:high].decode('ascii'), window_spec, seed)
+        for position, original, new in repair.repairs:
+            position += low
+            patches.setdefault(position, original)
+            seq[position] = ord(new)
+            if patches[position] == new:
+                del patches[position]
+        # A change near either edge can complete a violation with the bases outside the window
+        check_low, check_high = max(0, low - context), min(len(seq), high + context)
+        remaining.difference_update(range(low, check_high))
+        remaining.update(check_low + end for end in _violation_ends(automaton, bytes(seq[check_low:check_high])) if check_low + end >= low)
+    return sorted(remaining)
+
+
+def encode_parallel(binary_data: bytes, nsym: int = 10, spec: ConstraintSpec = DEFAULT_SPEC, codec: str = 'mapped', workers: int = None, block_size: int = None, seed: int = 0) -> MappedSequence:
+    """Reed-Solomon code and map a payload in parallel blocks.
+
+    Args:
+        binary_data (bytes): Payload to encode.
+        nsym (int): Number of Reed-Solomon error correction symbols.
+        spec (ConstraintSpec): Constraints to respect.
+        codec (str): One of ``CODECS``.
+        workers (int, optional): Number of worker processes (default: CPU count).
+        block_size (int, optional): Target block size in bytes; rounded with ``block_size_for``.
+        seed (int): Repair seed for the 'patch' codec.
+
+    Returns:
+        MappedSequence: The encoded sequence; metadata is returned as a bytearray of offsets.
+
+    Raises:
+        ValueError: If the codec is unknown or cannot respect ``spec``.
+    """
+    check_codec(codec, spec)
+    size = block_size_for(nsym, block_size or DEFAULT_BLOCK_SIZE)
+    # bytes() so that views (e.g. of a memory-mapped input) can be sent to worker processes
+    blocks = [bytes(binary_data[i:i + size]) for i in range(0, len(binary_data), size)] or [b'']
+    jobs = [(block, nsym, spec, codec, seed) for block in blocks]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_encode_block, jobs))
+    else:
+        results = [_encode_block(job) for job in jobs]
+
+    starts = []
+    position = 0
+    for part, _ in results:
+        starts.append(position)
+        position += len(part)
+
+    if codec == 'rotating':
+        seq = _stitch_rotating([part for part, _ in results])
+        return MappedSequence(seq.decode('ascii'), codec)
+
+    seq = bytearray().join(part for part, _ in results)
+    if codec == 'mapped':
+        offsets = bytearray().join(extra for _, extra in results)
+        _stitch_mapped(seq, offsets, starts, spec)
+        return MappedSequence(seq.decode('ascii'), codec, metadata=offsets)
+
+    patches = {}
+    unresolved = []
+    for start, (_, (block_patches, block_unresolved)) in zip(starts, results):
+        patches.update((start + position, original) for position, original in block_patches)
+        unresolved.extend(start + position for position in block_unresolved)
+    unresolved = _stitch_patch(seq, patches, starts, spec, seed, unresolved)
+    return MappedSequence(seq.decode('ascii'), codec, patches=sorted(patches.items()), unresolved=unresolved)
@@ -0,0 +1,38 @@
+"""Sparse substitution patches for reversible constraint repair.
+
+In patch mode a block is mapped directly at 2 bits/nt and then repaired; the
+repaired positions and their original bases are kept as a compact patch list
+so the decoder can restore the direct mapping before demapping.
+"""
+
+from encoder.base_mapping import base4_to_dna_direct, bytes_to_base4_array
+from encoder.constraints import BASES
+
+
+def encode_patches(patches: list[tuple[int, str]]) -> bytes:
+    """Serialize (position, original base) patches as varints.
+
+    Positions are delta-coded in ascending order; each entry stores
+    ``delta << 2 | base index`` as a LEB128 varint.
+
+    Args:
+        patches (list[tuple[int, str]]): Positions and the original base at each.
+
+    Returns:
+        bytes: Serialized patch list.
+    """
+    out = bytearray()
+    previous = 0
+    for position, base in sorted(patches):
+        value = ((position - previous) << 2) | BASES.index(base)
+        previous = position
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def patches_to_dna(patches: list[tuple[int, str]]) -> str:
+    """Serialize patches and map the bytes directly to DNA (2 bits/nt)."""
+    return base4_to_dna_direct(bytes_to_base4_array(encode_patches(patches)))
@@ -9,17 +9,39 @@ import argparse
 import os
 from pathlib import Path
 
-from dnaio.file_reader import convert_file_to_binary, read_fasta_with_metadata
-from encoder.base_mapping import binary_to_base4, base4_to_dna
+from dnaio.file_reader import convert_file_to_binary, input_name, read_fasta_records, read_input
+from encoder.base_mapping import bytes_to_base4_array, map_to_dna, CODECS
+from encoder.compression import COMPRESSION_BLOCK, COMPRESSION_CHOICES, compress_blocks, decompress, resolve_compression
+from encoder.ecc import DecodeReport
 from encoder.error_correction import add_reed_solomon
+from encoder.header import ArchiveHeader
+from encoder.parallel import encode_parallel
+from encoder.oligo import DEFAULT_ADDRESS_DIGITS, DEFAULT_OLIGO_LENGTH, OligoLayout, encode_oligos
 from encoder.constraints import (
-    enforce_constraints, 
-    check_gc_content, 
-    has_long_homopolymers, 
-    contains_unstable_motifs
+    analyze_sequence,
+    ConstraintSpec,
+    DEFAULT_SPEC
 )
 from dnaio.file_writer import write_fasta, write_txt
+from dnaio.streaming import decode_file_streaming, encode_file_streaming
+from dnaio.header import read_archive_header
+from dnaio.chunk_store import is_manifest, restore_file, store_file
+from dnaio.archive import archive_header, collect_inputs, extract_archive, pack_archive, read_directory
+from dnaio.oligo_pool import is_oligo_pool, iter_oligo_pool, write_oligo_pool
+from dnaio.container import (
+    CONTAINER_EXTENSION,
+    container_to_fasta,
+    fasta_to_container,
+    is_container,
+    read_container_records,
+    write_container,
+)
 from decoder import decode_dna_sequence
+from decoder.oligo import PoolReport, decode_oligos, infer_layout
+from decoder.random_access import decode_range
+
+# Leading bytes of streamed output used to detect the file type
+FILE_TYPE_SNIFF_SIZE = 1 << 20
 
 
 def ensure_output_dir(filepath: str) -> str:
@@ -79,49 +101,249 @@ def detect_file_type_from_binary(binary_data: bytes) -> str:
         return '.bin'  # Generic binary file
 
 
-def encode_file(input_file: str, output_file: str, nsym: int = 10, motifs: list = None):
-    """Encode a file to DNA sequence with metadata."""
-    if motifs is None:
-        motifs = ["ATATAT", "CGCGCG"]
+def print_constraint_report(report) -> None:
+    """Print a summary of a ConstraintReport."""
+    print(f'GC content: {report.gc_content:.2f}%')
+    print(f'Windowed GC ({report.window} nt): {report.min_window_gc:.2f}% - {report.max_window_gc:.2f}%')
+    print(f'Long homopolymers: {report.has_long_homopolymers()} (longest run: {report.longest_homopolymer})')
+    print(f'Unstable motifs present: {report.has_unstable_motifs}')
+    if report.has_unstable_motifs:
+        positions = ', '.join(f'{motif}@{pos}' for pos, motif in report.motif_hits[:10])
+        print(f'Motif hits ({report.motif_hit_count}): {positions}')
+
+
+def print_decode_report(report) -> None:
+    """Print a summary of a DecodeReport."""
+    print(f'Reed-Solomon codewords: {report.codewords} ({report.corrected_codewords} corrected, {report.corrected_symbols} symbols)')
+    if report.errors:
+        worst = ', '.join(f'#{index}: {count}' for index, count in sorted(report.errors.items(), key=lambda item: -item[1])[:10])
+        print(f'Most corrected codewords: {worst}')
+
+
+def encode_file(input_file: str, output_file: str, nsym: int = 10, motifs: list = None, spec: ConstraintSpec = None, codec: str = 'mapped', workers: int = 1, stream: bool = False, oligo_layout: OligoLayout = None, compression: str = 'none'):
+    """Encode a file to DNA sequence with metadata.
+
+    ``input_file`` may be any file type (memory-mapped, not copied), '-' for
+    standard input or an open binary file object. The mapper avoids the given
+    motifs while encoding; ``spec`` overrides all constraints at once.
+    ``codec`` selects constraint-aware mapping with a metadata record
+    ('mapped'), direct mapping with a repair patch list ('patch') or the
+    metadata-free rotating code ('rotating'). With ``workers`` > 1 the
+    payload is encoded in parallel blocks; ``stream`` encodes chunk by chunk
+    with bounded memory. With an ``oligo_layout`` the output is a pool of
+    addressed, fixed-length strands (.fasta or .csv). ``compression``
+    ('auto', 'none', 'zlib', 'bz2' or 'lzma') compresses the file in
+    independent blocks before error correction, in every output format;
+    'auto' picks a method from a sample.
+    """
+    if spec is None:
+        spec = DEFAULT_SPEC if motifs is None else ConstraintSpec(motifs=tuple(motifs))
+
+    if oligo_layout is not None:
+        if stream:
+            raise ValueError("Oligo pools cannot be encoded in streaming mode")
+        encode_oligo_pool(input_file, output_file, nsym, spec, oligo_layout, compression)
+        return
+
+    if stream:
+        report = encode_file_streaming(input_file, ensure_output_dir(output_file), nsym, spec, codec, compression=compression)
+        print_constraint_report(report)
+        return
     
     # 1. Read file and convert to binary
-    binary_data = convert_file_to_binary(input_file)
+    binary_data = read_input(input_file)
+    original_filename = input_name(input_file)
+    method = resolve_compression(compression, binary_data)
+    archive_header = None
+    if method is not None:
+        payload, sizes = compress_blocks(binary_data, method, COMPRESSION_BLOCK)
+        print(f"Pre-compression: {method}, {len(binary_data)} -> {len(payload)} bytes ({len(payload) / max(1, len(binary_data)):.1%})")
+        archive_header = ArchiveHeader.for_payload(payload, codec, nsym, original_filename)
+        archive_header.compression, archive_header.compression_block, archive_header.compressed_sizes = method, COMPRESSION_BLOCK, sizes
+        binary_data = payload
+    encode_payload(binary_data, output_file, nsym, spec, codec, workers, original_filename, archive_header)
+
 
-    # 2. Add Reed-Solomon error correction
-    corrected_data = add_reed_solomon(binary_data, nsym=nsym)
+def encode_payload(binary_data: bytes, output_file: str, nsym: int, spec: ConstraintSpec, codec: str, workers: int = 1, original_filename: str = None, archive_header: ArchiveHeader = None):
+    """Encode an in-memory payload and write it as .fasta, .dnab or .txt."""
+    if workers > 1:
+        # 2-4. Error correction, base-4 conversion and mapping in parallel blocks
+        mapped = encode_parallel(binary_data, nsym, spec, codec, workers=workers)
+    else:
+        # 2. Add Reed-Solomon error correction
+        corrected_data = add_reed_solomon(binary_data, nsym=nsym)
 
-    # 3. Convert to base-4
-    base4_digits = binary_to_base4(corrected_data)
+        # 3. Convert to base-4
+        base4_digits = bytes_to_base4_array(corrected_data)
 
-    # 4. Map to DNA (constraint-aware, returns both sequence and metadata)
-    dna_sequence, metadata = base4_to_dna(base4_digits)
+        # 4. Map to DNA (constraint-aware, returns the sequence and what is needed to decode it)
+        mapped = map_to_dna(base4_digits, spec, codec)
+    dna_sequence = mapped.dna_sequence
 
-    # 5. Check constraints
-    gc_content = check_gc_content(dna_sequence)
-    has_homopolymers = has_long_homopolymers(dna_sequence)
-    has_motifs = contains_unstable_motifs(dna_sequence, motifs)
-    print(f'GC content: {gc_content:.2f}%')
-    print(f'Long homopolymers: {has_homopolymers}')
-    print(f'Unstable motifs present: {has_motifs}')
+    # 5. Check constraints (single pass over the sequence)
+    print_constraint_report(analyze_sequence(dna_sequence, spec))
+    if mapped.unresolved:
+        print(f"Violations the patch codec could not repair: {len(mapped.unresolved)} (first at position {mapped.unresolved[0]})")
 
     # 6. Write output with original filename
     output_file = ensure_output_dir(output_file)
-    original_filename = os.path.basename(input_file)
+    if archive_header is None:
+        archive_header = ArchiveHeader.for_payload(binary_data, mapped.codec, nsym, original_filename)
+    archive_header.codec = mapped.codec
     if output_file.endswith('.fasta'):
-        write_fasta(output_file, dna_sequence, metadata=metadata, original_filename=original_filename)
+        write_fasta(output_file, dna_sequence, metadata=mapped.metadata, original_filename=original_filename, patches=mapped.patches, codec=mapped.codec, archive_header=archive_header)
+    elif output_file.endswith(CONTAINER_EXTENSION):
+        write_container(output_file, dna_sequence, metadata=mapped.metadata, original_filename=original_filename, patches=mapped.patches, codec=mapped.codec, nsym=nsym, payload_length=len(binary_data), archive_header=archive_header)
     elif output_file.endswith('.txt'):
         write_txt(output_file, dna_sequence)
     else:
-        raise ValueError('Output file must be .txt or .fasta')
+        raise ValueError(f'Output file must be .txt, .fasta or {CONTAINER_EXTENSION}')
 
 
-def decode_file(input_file: str, output_file: str, nsym: int = 10):
-    """Decode a DNA file back to the original data with automatic file type detection."""
-    # Read DNA sequence, metadata, and original filename
-    dna_sequence, metadata, original_filename = read_fasta_with_metadata(input_file)
-    
-    # Decode the data
-    decoded_data = decode_dna_sequence(dna_sequence, metadata, nsym=nsym)
+def encode_archive(inputs: list, output_file: str, nsym: int = 10, spec: ConstraintSpec = None, codec: str = 'mapped', workers: int = 1):
+    """Pack files and directories into one multi-file archive (.fasta or .dnab).
+
+    Members are stored back to back with a directory at the end of the
+    payload, so each one can later be extracted on its own. Members are read
+    and hashed concurrently; with ``workers`` > 1 the payload is encoded in
+    parallel blocks.
+    """
+    if not output_file.endswith(('.fasta', CONTAINER_EXTENSION)):
+        raise ValueError(f'Archives must be written as .fasta or {CONTAINER_EXTENSION}')
+    spec = spec or DEFAULT_SPEC
+    payload, members = pack_archive(collect_inputs(inputs), workers=workers if workers > 1 else None)
+    encode_payload(payload, output_file, nsym, spec, codec, workers, archive_header=archive_header(payload, members, codec, nsym))
+    print(f"Archived {len(members)} files ({sum(member.length for member in members)} bytes) into {ensure_output_dir(output_file)}")
+
+
+def encode_into_store(input_file: str, manifest_file: str, store_dir: str, nsym: int = 10, spec: ConstraintSpec = None, codec: str = 'mapped', workers: int = 1):
+    """Add a file to a deduplicating chunk store, writing its manifest.
+
+    Only content-defined chunks the store does not hold yet are encoded, so
+    re-encoding an edited file costs about as much as the edit.
+    """
+    manifest_file = ensure_output_dir(manifest_file)
+    report = store_file(input_file, manifest_file, store_dir, nsym, spec, codec, workers)
+    print(f"Chunks: {report.chunks}, {report.new_chunks} newly encoded ({report.new_bytes} bytes), {report.reused_bytes} bytes already in {store_dir}")
+    print(f"Manifest written to {manifest_file}")
+
+
+def encode_oligo_pool(input_file: str, output_file: str, nsym: int, spec: ConstraintSpec, layout: OligoLayout, compression: str = 'none'):
+    """Encode a file as an oligo pool written to .fasta or .csv, optionally pre-compressed."""
+    binary_data = convert_file_to_binary(input_file)
+    method = resolve_compression(compression, binary_data)
+    pool = encode_oligos(binary_data, nsym, layout, spec, input_name(input_file), method)
+    if method is not None:
+        print(f"Pre-compression: {method}")
+    output_file = ensure_output_dir(output_file)
+    write_oligo_pool(output_file, pool.strands)
+    print(f"Oligo pool written to {output_file}: {len(pool.strands)} strands of {layout.strand_length} nt ({layout.slice_size} bytes each)")
+    if layout.parity_strands:
+        print(f"Outer code: {len(pool.strands) - pool.data_strands} parity strands, {layout.parity_strands} per group of {layout.group_data} data strands")
+    if pool.violations:
+        print(f"Strands violating the constraints with every scrambling variant: {len(pool.violations)} (first at address {pool.violations[0]})")
+
+
+def print_pool_report(report) -> None:
+    """Print a summary of a PoolReport."""
+    print(f'Strands: {report.strands} read, {report.valid} valid, {report.duplicates} duplicates, {report.rejected} rejected')
+    if report.missing:
+        print(f'Missing addresses ({len(report.missing)}): {", ".join(map(str, report.missing[:10]))}')
+        print(f'Rebuilt by the outer code: {len(report.recovered)} of {len(report.missing)}')
+    print_decode_report(report.ecc)
+
+
+def decode_file_stream(input_file: str, output_file: str, nsym: int = None):
+    """Decode a DNA file chunk by chunk with bounded memory.
+
+    The data is written to ``<output_file>.partial`` while decoding and renamed
+    once the file type is known; after a failure the partial file holds
+    everything decoded before the failing codeword.
+    """
+    output_file = ensure_output_dir(output_file)
+    partial_file = output_file + '.partial'
+    info = decode_file_streaming(input_file, partial_file, nsym=nsym)
+    original_filename = info['filename']
+    detected_extension = os.path.splitext(original_filename)[1] if original_filename else ''
+    if not detected_extension:
+        with open(partial_file, 'rb') as f:
+            detected_extension = detect_file_type_from_binary(f.read(FILE_TYPE_SNIFF_SIZE))
+    output_file = os.path.splitext(output_file)[0] + detected_extension
+    os.replace(partial_file, output_file)
+
+    print_decode_report(info['report'])
+    print(f"Decoded data written to {output_file} (detected type: {detected_extension})")
+    if original_filename:
+        print(f"Original filename: {original_filename}")
+
+
+def decode_file(input_file: str, output_file: str, nsym: int = None, stream: bool = False, workers: int = 1, primers: tuple = ('', ''), address_digits: int = DEFAULT_ADDRESS_DIGITS, outer_code: tuple = (0, None), byte_range: tuple = None, members: list = None, store_dir: str = None):
+    """Decode a DNA file (FASTA, container or oligo pool) back to the original data with automatic file type detection.
+
+    ``nsym`` defaults to the value stored in the archive header, else 10. When
+    the header records a SHA-256 the decoded data is verified against it. With
+    ``workers`` > 1 large archives are Reed-Solomon decoded in parallel shards.
+    Oligo pools are decoded strand by strand in any order; ``primers`` (forward,
+    reverse), ``address_digits`` and ``outer_code`` (parity strands, data
+    strands per group) must match the values used when encoding.
+    With ``byte_range`` (start, length) only the codewords covering that part
+    of the payload are read and decoded. Multi-file archives are extracted
+    into the directory ``output_file``; ``members`` limits extraction to the
+    named members, which are decoded without decoding the others. Chunk
+    manifests are rebuilt from ``store_dir`` (default: the store recorded in
+    the manifest).
+    """
+    if is_manifest(input_file):
+        report = DecodeReport()
+        output_file = ensure_output_dir(output_file)
+        manifest = restore_file(input_file, output_file, store_dir, workers, report)
+        print_decode_report(report)
+        print(f"Rebuilt {manifest.filename} from {len(manifest.chunks)} chunks into {output_file}")
+        return
+
+    pool = not is_container(input_file) and is_oligo_pool(input_file)
+    header = None if pool else read_archive_header(input_file)
+    if header is not None and header.directory_length and byte_range is None:
+        output_dir = ensure_output_dir(output_file)
+        report = DecodeReport()
+        written = extract_archive(input_file, output_dir, members, report=report)
+        print_decode_report(report)
+        print(f"Extracted {len(written)} files to {output_dir}")
+        return
+
+    if stream and byte_range is None:
+        decode_file_stream(input_file, output_file, nsym)
+        return
+
+    if byte_range is not None:
+        report = DecodeReport()
+        decoded_data = decode_range(input_file, *byte_range, nsym=nsym, report=report)
+        print_decode_report(report)
+        archive_header = read_archive_header(input_file)
+        original_filename = archive_header.filename if archive_header else None
+    elif pool:
+        pool_report = PoolReport()
+        strands = list(iter_oligo_pool(input_file))
+        layout = infer_layout(strands, address_digits, *primers, *outer_code)
+        decoded_data, archive_header = decode_oligos(strands, layout, report=pool_report)
+        print_pool_report(pool_report)
+        original_filename = archive_header.filename
+    else:
+        # Read DNA sequence, metadata, patches and original filename
+        records = read_container_records(input_file) if is_container(input_file) else read_fasta_records(input_file)
+        original_filename = records['filename']
+        archive_header = records['header']
+        if nsym is None:
+            nsym = archive_header.nsym if archive_header else records.get('nsym', 10)
+
+        # Decode the data
+        report = DecodeReport()
+        decoded_data = decode_dna_sequence(records['sequence'], records['metadata'], nsym=nsym, patches=records['patches'], codec=records['codec'], report=report, workers=workers)
+        print_decode_report(report)
+        if archive_header is not None:
+            archive_header.verify(decoded_data)
+            if archive_header.compression:
+                decoded_data = decompress(decoded_data, archive_header.compression)
     
     # Use original filename if available, otherwise detect file type
     if original_filename:
@@ -151,6 +373,17 @@ def decode_file(input_file: str, output_file: str, nsym: int = 10):
         print(f"Original filename: {original_filename}")
 
 
+def convert_file(input_file: str, output_file: str, nsym: int = 10):
+    """Convert an encoded archive between FASTA and the binary container format."""
+    if input_file.endswith('.fasta') and output_file.endswith(CONTAINER_EXTENSION):
+        fasta_to_container(input_file, ensure_output_dir(output_file), nsym=nsym)
+    elif is_container(input_file) and output_file.endswith('.fasta'):
+        container_to_fasta(input_file, ensure_output_dir(output_file))
+    else:
+        raise ValueError(f'Convert .fasta to {CONTAINER_EXTENSION} or {CONTAINER_EXTENSION} to .fasta')
+    print(f"Converted {input_file} to {output_file}")
+
+
 def main():
     """Entry point for the DNA encoding/decoding CLI."""
     parser = argparse.ArgumentParser(description="DNA Data Storage Encoder/Decoder")
@@ -158,23 +391,77 @@ def main():
     
     # Encode command
     encode_parser = subparsers.add_parser('encode', help='Encode a file to DNA')
-    encode_parser.add_argument('input_file', type=str, help='Path to input file (.txt, .docx, .mp3)')
-    encode_parser.add_argument('output_file', type=str, help='Path to output file (.txt or .fasta)')
+    encode_parser.add_argument('input_file', type=str, nargs='+', help="Path to input file (any type, '-' for standard input); several files or a directory are packed into a multi-file archive")
+    encode_parser.add_argument('output_file', type=str, help=f'Path to output file (.txt, .fasta or {CONTAINER_EXTENSION})')
     encode_parser.add_argument('--nsym', type=int, default=10, help='Number of Reed-Solomon error correction symbols (default: 10)')
-    encode_parser.add_argument('--motifs', nargs='*', default=["ATATAT", "CGCGCG"], help='List of unstable motifs to check for')
+    encode_parser.add_argument('--motifs', nargs='*', default=list(DEFAULT_SPEC.motifs), help='List of unstable motifs to avoid and check for')
+    encode_parser.add_argument('--codec', choices=CODECS, default='mapped', help="Mapping codec: 'mapped' (metadata record), 'patch' (direct mapping plus repair patches) or 'rotating' (homopolymer-free, no metadata) (default: mapped)")
+    encode_parser.add_argument('--workers', type=int, default=1, help='Number of worker processes for block-parallel encoding (default: 1)')
+    encode_parser.add_argument('--compress', choices=COMPRESSION_CHOICES, default='none', help="Compress the file before error correction; 'auto' picks a method (or none) from a sample of the file (default: none)")
+    encode_parser.add_argument('--store', type=str, default=None, help='Add the file to this deduplicating chunk store; output_file is then the manifest (.json)')
+    encode_parser.add_argument('--stream', action='store_true', help="Encode chunk by chunk with bounded memory ('mapped' and 'rotating' codecs)")
+    encode_parser.add_argument('--max-homopolymer', type=int, default=DEFAULT_SPEC.max_homopolymer, help=f'Longest allowed homopolymer run (default: {DEFAULT_SPEC.max_homopolymer})')
+    encode_parser.add_argument('--gc-min', type=float, default=DEFAULT_SPEC.gc_min, help=f'Minimum GC content percentage (default: {DEFAULT_SPEC.gc_min})')
+    encode_parser.add_argument('--gc-max', type=float, default=DEFAULT_SPEC.gc_max, help=f'Maximum GC content percentage (default: {DEFAULT_SPEC.gc_max})')
+    encode_parser.add_argument('--oligo-length', type=int, default=None, help=f'Write an oligo pool (.fasta or .csv) of strands of at most this many nt, e.g. {DEFAULT_OLIGO_LENGTH}')
+    encode_parser.add_argument('--address-digits', type=int, default=DEFAULT_ADDRESS_DIGITS, help=f'Base-4 digits of the oligo address (default: {DEFAULT_ADDRESS_DIGITS})')
+    encode_parser.add_argument('--primers', nargs=2, metavar=('FORWARD', 'REVERSE'), default=('', ''), help='Primer flanks added to every oligo')
+    encode_parser.add_argument('--outer-parity', type=int, default=0, help='Outer erasure-code parity strands per group, rebuilding that many lost strands (default: 0)')
+    encode_parser.add_argument('--outer-group', type=int, default=None, help='Data strands per outer-code group (default: 255 minus the parity strands)')
     
     # Decode command
     decode_parser = subparsers.add_parser('decode', help='Decode a DNA file back to original data')
-    decode_parser.add_argument('input_file', type=str, help='Path to input FASTA file')
-    decode_parser.add_argument('output_file', type=str, help='Path to output file')
-    decode_parser.add_argument('--nsym', type=int, default=10, help='Number of Reed-Solomon error correction symbols (default: 10)')
+    decode_parser.add_argument('input_file', type=str, help=f'Path to input FASTA file, {CONTAINER_EXTENSION} container or oligo pool (.fasta/.csv)')
+    decode_parser.add_argument('output_file', type=str, nargs='?', default=None, help='Path to output file (output directory for a multi-file archive)')
+    decode_parser.add_argument('--nsym', type=int, default=None, help='Number of Reed-Solomon error correction symbols (default: from the archive header, else 10)')
+    decode_parser.add_argument('--stream', action='store_true', help='Decode chunk by chunk with bounded memory, writing output as it goes')
+    decode_parser.add_argument('--workers', type=int, default=1, help='Number of worker processes for parallel Reed-Solomon decoding (default: 1)')
+    decode_parser.add_argument('--primers', nargs=2, metavar=('FORWARD', 'REVERSE'), default=('', ''), help='Primer flanks of an oligo pool')
+    decode_parser.add_argument('--address-digits', type=int, default=DEFAULT_ADDRESS_DIGITS, help=f'Base-4 digits of the oligo address (default: {DEFAULT_ADDRESS_DIGITS})')
+    decode_parser.add_argument('--outer-parity', type=int, default=0, help='Outer-code parity strands per group used when encoding (default: 0)')
+    decode_parser.add_argument('--outer-group', type=int, default=None, help='Data strands per outer-code group used when encoding')
+    decode_parser.add_argument('--range', type=int, nargs=2, metavar=('START', 'LENGTH'), default=None, help='Decode only LENGTH bytes of the payload from byte START')
+    decode_parser.add_argument('--member', action='append', default=None, help='Extract only this member of a multi-file archive (repeatable)')
+    decode_parser.add_argument('--store', type=str, default=None, help='Chunk store of a manifest (default: the one recorded in the manifest)')
+    decode_parser.add_argument('--list', action='store_true', help='List the members of a multi-file archive without extracting them')
+    
+    # Convert command
+    convert_parser = subparsers.add_parser('convert', help=f'Convert an encoded archive between .fasta and {CONTAINER_EXTENSION}')
+    convert_parser.add_argument('input_file', type=str, help=f'Path to input .fasta or {CONTAINER_EXTENSION} file')
+    convert_parser.add_argument('output_file', type=str, help=f'Path to output {CONTAINER_EXTENSION} or .fasta file')
+    convert_parser.add_argument('--nsym', type=int, default=10, help='Reed-Solomon symbols to record when converting FASTA (default: 10)')
     
     args = parser.parse_args()
     
     if args.command == 'encode':
-        encode_file(args.input_file, args.output_file, args.nsym, args.motifs)
+        spec = ConstraintSpec(
+            max_homopolymer=args.max_homopolymer,
+            gc_min=args.gc_min,
+            gc_max=args.gc_max,
+            motifs=tuple(args.motifs)
+        )
+        oligo_layout = None
+        if args.oligo_length is not None:
+            oligo_layout = OligoLayout(args.oligo_length, args.address_digits, *args.primers, args.outer_parity, args.outer_group)
+        if len(args.input_file) > 1 or os.path.isdir(args.input_file[0]):
+            if args.stream or oligo_layout is not None:
+                parser.error('multi-file archives cannot be streamed or written as oligo pools')
+            encode_archive(args.input_file, args.output_file, args.nsym, spec=spec, codec=args.codec, workers=args.workers)
+        elif args.store is not None:
+            if args.stream or oligo_layout is not None:
+                parser.error('files added to a chunk store cannot be streamed or written as oligo pools')
+            encode_into_store(args.input_file[0], args.output_file, args.store, args.nsym, spec=spec, codec=args.codec, workers=args.workers)
+        else:
+            encode_file(args.input_file[0], args.output_file, args.nsym, spec=spec, codec=args.codec, workers=args.workers, stream=args.stream, oligo_layout=oligo_layout, compression=args.compress)
+    elif args.command == 'decode' and args.list:
+        for member in read_directory(args.input_file):
+            print(f"{member.length:>12}  {member.sha256[:16]}  {member.name}")
     elif args.command == 'decode':
-        decode_file(args.input_file, args.output_file, args.nsym)
+        if args.output_file is None:
+            parser.error('the following arguments are required: output_file')
+        decode_file(args.input_file, args.output_file, args.nsym, stream=args.stream, workers=args.workers, primers=tuple(args.primers), address_digits=args.address_digits, outer_code=(args.outer_parity, args.outer_group), byte_range=args.range, members=args.member, store_dir=args.store)
+    elif args.command == 'convert':
+        convert_file(args.input_file, args.output_file, args.nsym)
     else:
         parser.print_help()
 
@@ -27,4 +27,81 @@ def test_base4_to_dna_with_constraints():
     assert all(base in valid_bases for base in dna_sequence)
     
     # Check that metadata contains valid offsets
-    assert all(0 <= offset <= 3 for offset in metadata) 
\ No newline at end of file
+    assert all(0 <= offset <= 3 for offset in metadata) 
+
+def _reference_base4_to_dna(base4_digits):
+    """Original quadratic implementation, kept to pin the mapper's output."""
+    BASES = ['A', 'C', 'G', 'T']
+    forbidden_motifs = ["ATATAT", "CGCGCG"]
+    seq = []
+    metadata = []
+    for i, digit in enumerate(base4_digits):
+        for offset in range(4):
+            base = BASES[(digit + offset) % 4]
+            if len(seq) >= 2 and all(seq[-j-1] == base for j in range(2)):
+                continue
+            test_seq = ''.join(seq) + base
+            if any(motif in test_seq[-len(motif)-1:] for motif in forbidden_motifs):
+                continue
+            if i == len(base4_digits) - 1:
+                gc_count = test_seq.count('G') + test_seq.count('C')
+                if not (40.0 <= (gc_count / len(test_seq)) * 100 <= 60.0):
+                    continue
+            seq.append(base)
+            metadata.append(offset)
+            break
+        else:
+            seq.append(BASES[digit])
+            metadata.append(0)
+    return ''.join(seq), metadata
+
+
+def test_base4_to_dna_matches_reference():
+    """The table-driven mapper must reproduce the original output exactly."""
+    import random
+    rng = random.Random(0)
+    for length in [0, 1, 2, 3, 7, 13, 64, 300]:
+        for alphabet in ([0, 1, 2, 3], [0, 3], [1, 2]):
+            digits = [rng.choice(alphabet) for _ in range(length)]
+            assert base4_to_dna(digits) == _reference_base4_to_dna(digits)
+
+
+def test_mapper_carries_state_across_chunks():
+    from encoder.mapper import ConstraintMapper
+    digits = [0, 0, 0, 3, 0, 3, 0, 3, 1, 2, 1, 2, 1, 2, 2, 2] * 8
+    mapper = ConstraintMapper()
+    seq1, offsets1 = mapper.map(digits[:37], final=False)
+    seq2, offsets2 = mapper.map(digits[37:])
+    dna_sequence, metadata = base4_to_dna(digits)
+    assert (seq1 + seq2).decode('ascii') == dna_sequence
+    assert list(offsets1 + offsets2) == metadata
+
+
+def test_mapper_rejects_invalid_digits():
+    from encoder.mapper import ConstraintMapper
+    with pytest.raises(ValueError):
+        ConstraintMapper().map([0, 1, 4])
+
+
+def test_bytes_to_base4_array_zero_copy_inputs():
+    import numpy as np
+    from encoder.base_mapping import bytes_to_base4_array
+    data = bytes(range(256))
+    expected = binary_to_base4(data)
+    for buffer in (data, bytearray(data), memoryview(data), np.frombuffer(data, dtype=np.uint8)):
+        digits = bytes_to_base4_array(buffer)
+        assert digits.dtype == np.uint8
+        assert digits.tolist() == expected
+
+
+def test_rotating_codec_refuses_constraints_it_cannot_enforce():
+    from encoder.base_mapping import map_to_dna
+    from encoder.constraints import ConstraintSpec
+    from encoder.parallel import encode_parallel
+    digits = binary_to_base4(b'rotating')
+    assert map_to_dna(digits, ConstraintSpec(max_homopolymer=3), 'rotating').dna_sequence
+    for spec in (ConstraintSpec(motifs=('GAATTC',)), ConstraintSpec(gc_min=45.0)):
+        with pytest.raises(ValueError, match='rotating'):
+            map_to_dna(digits, spec, 'rotating')
+        with pytest.raises(ValueError, match='rotating'):
+            encode_parallel(b'rotating', spec=spec, codec='rotating', workers=1)
@@ -39,4 +39,127 @@ def test_base4_to_dna_constraints():
     
     # Check that DNA sequence only contains valid bases
     valid_bases = {'A', 'C', 'G', 'T'}
-    assert all(base in valid_bases for base in dna) 
\ No newline at end of file
+    assert all(base in valid_bases for base in dna) 
+
+def test_constraint_spec_normalizes_motifs():
+    from encoder.constraints import ConstraintSpec
+    spec = ConstraintSpec(motifs=("atatat", " CGCGCG", "", "ATATAT"))
+    assert spec.motifs == ("ATATAT", "CGCGCG")
+    with pytest.raises(ValueError):
+        ConstraintSpec(motifs=("ACGN",))
+
+
+def test_compiled_automaton_is_cached():
+    from encoder.constraints import ConstraintSpec, compile_constraints
+    assert compile_constraints(ConstraintSpec()) is compile_constraints(ConstraintSpec())
+
+
+def test_automaton_finds_overlapping_motifs():
+    from encoder.constraints import ConstraintSpec
+    automaton = ConstraintSpec(motifs=("GAT", "ATA", "TAC", "A")).compile()
+    hits = automaton.find_motifs("CGATAC")
+    assert sorted(hits) == sorted([(2, 'A'), (1, 'GAT'), (2, 'ATA'), (4, 'A'), (3, 'TAC')])
+
+
+def test_contains_unstable_motifs_many_motifs():
+    import itertools
+    motifs = [''.join(p) for p in itertools.product('ACT', repeat=5)]
+    assert contains_unstable_motifs('CCCCC', motifs) is True
+    assert contains_unstable_motifs('GGGGGGGGGG', motifs) is False
+
+
+def test_base4_to_dna_avoids_user_motifs():
+    from encoder.constraints import ConstraintSpec
+    spec = ConstraintSpec(motifs=("ACG", "CGT", "GTA", "TAC"))
+    base4 = [0, 1, 2, 3] * 50
+    dna, metadata = base4_to_dna(base4, spec)
+    assert not contains_unstable_motifs(dna, list(spec.motifs))
+    from decoder import dna_and_metadata_to_base4
+    assert dna_and_metadata_to_base4(dna, metadata) == base4
+
+
+def test_analyze_sequence_report():
+    from encoder.constraints import ConstraintSpec, analyze_sequence
+    spec = ConstraintSpec(motifs=("ATATAT", "GGG"))
+    report = analyze_sequence('ATATATGGGCCAAAAT', spec, window=4)
+    assert report.length == 16
+    assert report.gc_content == check_gc_content('ATATATGGGCCAAAAT')
+    assert report.homopolymer_runs == {1: 7, 2: 1, 3: 1, 4: 1}
+    assert report.longest_homopolymer == 4
+    assert report.has_long_homopolymers() is True
+    assert report.motif_hits == [(0, 'ATATAT'), (6, 'GGG')]
+    assert (report.min_window_gc, report.min_window_start) == (0.0, 0)
+    assert (report.max_window_gc, report.max_window_start) == (100.0, 6)
+
+
+def test_analyzer_modes_and_chunking_agree():
+    import random
+    from encoder.constraints import ConstraintAnalyzer, analyze_sequence
+    rng = random.Random(7)
+    sequence = ''.join(rng.choice('ACGTN') for _ in range(3000))
+    expected = analyze_sequence(sequence, vectorized=False)
+    for vectorized in (True, False):
+        analyzer = ConstraintAnalyzer(vectorized=vectorized)
+        for start in range(0, len(sequence), 137):
+            analyzer.feed(sequence[start:start + 137])
+        assert analyzer.report() == expected
+    assert analyze_sequence(sequence) == expected
+
+
+def test_analyzer_keeps_a_bounded_number_of_motif_positions():
+    """Every motif occurrence is counted, but only the first max_hits positions are kept."""
+    import random
+    from encoder.constraints import ConstraintAnalyzer, analyze_sequence
+    rng = random.Random(11)
+    sequence = ''.join(rng.choice(['AT', 'CG', 'A', 'C']) for _ in range(20000))
+    everything = analyze_sequence(sequence, max_hits=10 ** 9)
+    assert everything.motif_hit_count > 200
+    for vectorized in (True, False):
+        analyzer = ConstraintAnalyzer(vectorized=vectorized, max_hits=25)
+        for start in range(0, len(sequence), 1000):
+            analyzer.feed(sequence[start:start + 1000])
+        assert len(analyzer._hits) <= 50
+        report = analyzer.report()
+        assert report.motif_hits == everything.motif_hits[:25]
+        assert report.motif_hit_count == everything.motif_hit_count and report.has_unstable_motifs
+        assert report.as_dict()['motif_hit_count'] == everything.motif_hit_count
+
+
+def test_analyze_sequence_short_and_empty():
+    from encoder.constraints import analyze_sequence
+    report = analyze_sequence('GCAT', window=50)
+    assert report.min_window_gc == report.max_window_gc == 50.0
+    empty = analyze_sequence('')
+    assert empty.length == 0 and empty.homopolymer_runs == {} and empty.motif_hits == []
+
+
+def test_repair_sequence_fixes_violations_locally():
+    from encoder.constraints import analyze_sequence, repair_sequence
+    sequence = 'ACGTAAAAACGTATATATGCAGCGCGCGTTAC'
+    result = repair_sequence(sequence)
+    report = analyze_sequence(result.sequence)
+    assert not report.has_long_homopolymers()
+    assert not report.has_unstable_motifs
+    assert result.gc_in_bounds
+    assert result.unresolved == []
+    for position, original, new in result.repairs:
+        assert sequence[position] == original and result.sequence[position] == new
+    assert len(result.repairs) == sum(a != b for a, b in zip(sequence, result.sequence))
+
+
+def test_repair_sequence_is_deterministic():
+    import random
+    from encoder.constraints import repair_sequence
+    rng = random.Random(1)
+    sequence = ''.join(rng.choice('AAT') for _ in range(2000))
+    first = repair_sequence(sequence, seed=42)
+    assert first == repair_sequence(sequence, seed=42)
+    assert first.gc_in_bounds
+    assert enforce_constraints(sequence, seed=42) == first.sequence
+
+
+def test_repair_sequence_reports_unresolvable_positions():
+    from encoder.constraints import ConstraintSpec, repair_sequence
+    result = repair_sequence('ACGT', ConstraintSpec(max_homopolymer=0))
+    assert result.unresolved == [0, 1, 2, 3]
+    assert result.sequence == 'ACGT'
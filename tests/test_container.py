@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+import pytest
+
+from dnaio.container import DNAContainer, container_to_fasta, fasta_to_container, read_container_records, write_container
+from dnaio.file_writer import write_fasta
+from encoder.base_mapping import bytes_to_base4_array, map_to_dna
+from encoder.error_correction import add_reed_solomon
+from decoder import decode_dna_sequence
+
+
+def _mapped(data, codec='mapped'):
+    return map_to_dna(bytes_to_base4_array(add_reed_solomon(data, nsym=4)), codec=codec)
+
+
+def test_container_round_trip_and_slices():
+    data = bytes(range(256)) * 20
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'data.dnab')
+        for codec in ('mapped', 'patch', 'rotating'):
+            mapped = _mapped(data, codec)
+            write_container(path, mapped.dna_sequence, mapped.metadata, 'data.bin', mapped.patches, codec, nsym=4, payload_length=len(data), block_size=1000)
+            records = read_container_records(path)
+            assert records['sequence'] == mapped.dna_sequence
+            assert records['metadata'] == (mapped.metadata or [])
+            assert records['patches'] == mapped.patches
+            assert (records['codec'], records['nsym'], records['filename']) == (codec, 4, 'data.bin')
+            assert decode_dna_sequence(records['sequence'], records['metadata'], nsym=4, patches=records['patches'], codec=codec) == data
+
+            with DNAContainer(path) as container:
+                assert len(container) == len(mapped.dna_sequence)
+                assert container.payload_length == len(data)
+                assert container.read_sequence(999, 2501) == mapped.dna_sequence[999:2501].encode('ascii')
+                if mapped.metadata is not None:
+                    assert container.read_metadata(1500, 1503).tolist() == mapped.metadata[1500:1503]
+        # Four bases per byte plus compact metadata blocks
+        assert os.path.getsize(path) * 3.5 < len(mapped.dna_sequence)
+
+
+def test_fasta_container_conversion_is_lossless():
+    mapped = _mapped(b"Conversion test " * 50)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fasta = os.path.join(tmpdir, 'a.fasta')
+        container = os.path.join(tmpdir, 'a.dnab')
+        back = os.path.join(tmpdir, 'b.fasta')
+        write_fasta(fasta, mapped.dna_sequence, metadata=mapped.metadata, original_filename='a.txt', codec='mapped')
+        fasta_to_container(fasta, container, nsym=4)
+        container_to_fasta(container, back)
+        with open(fasta, 'rb') as a, open(back, 'rb') as b:
+            assert a.read() == b.read()
+
+
+def test_container_detects_corruption():
+    mapped = _mapped(b"corrupt me" * 100)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'a.dnab')
+        write_container(path, mapped.dna_sequence, mapped.metadata, 'a.txt', nsym=4)
+        with open(path, 'r+b') as f:
+            f.seek(100)
+            byte = f.read(1)
+            f.seek(100)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        with DNAContainer(path) as container:
+            with pytest.raises(ValueError, match='corrupt'):
+                container.read_sequence(0, 10)
+        with open(path, 'r+b') as f:
+            f.write(b'XXXX')
+        with pytest.raises(ValueError, match='Not a DNA container'):
+            DNAContainer(path)
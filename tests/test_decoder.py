@@ -34,6 +34,51 @@ def test_remove_reed_solomon():
     assert decoded_data == original_data
 
 
+def test_remove_reed_solomon_reports_corrected_codewords():
+    """Clean codewords are passed through; damaged ones are corrected and reported."""
+    from encoder.ecc import DecodeReport, UncorrectableCodewordError
+
+    original_data = bytes(range(256)) * 10 + b"tail"
+    encoded_data = bytearray(add_reed_solomon(original_data, nsym=6))
+    encoded_data[255 * 2 + 9] ^= 0xff
+    encoded_data[255 * 10 + 1] ^= 0x01
+    encoded_data[-1] ^= 0x10
+    report = DecodeReport()
+    assert remove_reed_solomon(bytes(encoded_data), nsym=6, report=report) == original_data
+    assert report.codewords == 11 and report.errors == {2: 1, 10: 2}
+
+    for position in range(255 * 4, 255 * 4 + 4):
+        encoded_data[position] ^= 0xff
+    with pytest.raises(UncorrectableCodewordError, match='codeword 4') as error:
+        remove_reed_solomon(bytes(encoded_data), nsym=6)
+    assert error.value.decoded == original_data[:249 * 4]
+
+
+def test_parallel_reed_solomon_decode_matches_serial(monkeypatch):
+    """Sharded decoding reassembles the payload in order and reports every failing shard."""
+    import decoder.parallel
+    from encoder.ecc import DecodeReport, UncorrectableCodewordError
+
+    monkeypatch.setattr(decoder.parallel, 'PARALLEL_DECODE_THRESHOLD', 0)
+    original_data = bytes(range(256)) * 100 + b"tail"
+    encoded_data = bytearray(add_reed_solomon(original_data, nsym=10))
+    encoded_data[255 * 7] ^= 0x01
+    report = DecodeReport()
+    decoded = decoder.parallel.remove_reed_solomon_parallel(bytes(encoded_data), nsym=10, workers=2, report=report, shard_codewords=16)
+    assert decoded == original_data
+    assert report.codewords == 105 and report.errors == {7: 1}
+    assert [shard.first_codeword for shard in report.shards] == list(range(0, 105, 16))
+
+    for start in (255 * 20, 255 * 90):
+        for position in range(start, start + 8):
+            encoded_data[position] ^= 0xff
+    report = DecodeReport()
+    with pytest.raises(UncorrectableCodewordError, match='codeword 20') as error:
+        decoder.parallel.remove_reed_solomon_parallel(bytes(encoded_data), nsym=10, workers=2, report=report, shard_codewords=16)
+    assert error.value.decoded == original_data[:245 * 20]
+    assert [shard.error[0] for shard in report.shards if shard.error] == [20, 90]
+
+
 def test_dna_and_metadata_to_base4():
     """Test reconstruction of base4 digits from DNA and metadata."""
     # Create test data
@@ -138,4 +183,68 @@ def test_different_nsym_values():
         dna_sequence, metadata = base4_to_dna(base4_digits)
         
         decoded_data = decode_dna_sequence(dna_sequence, metadata, nsym=nsym)
-        assert decoded_data == test_data 
\ No newline at end of file
+        assert decoded_data == test_data 
+
+def test_base4_array_to_bytes_round_trip():
+    """Array-backed packing inverts bytes_to_base4_array and drops partial bytes."""
+    import numpy as np
+    from decoder import base4_array_to_bytes
+    from encoder.base_mapping import bytes_to_base4_array
+    data = bytes(range(256)) * 4
+    digits = bytes_to_base4_array(data)
+    packed = base4_array_to_bytes(digits)
+    assert packed.dtype == np.uint8
+    assert packed.tobytes() == data
+    assert base4_array_to_bytes(np.append(digits, [1, 2])).tobytes() == data
+
+
+def test_base4_array_to_bytes_rejects_negative_digits():
+    from decoder import base4_array_to_bytes
+    with pytest.raises(ValueError):
+        base4_array_to_bytes([0, 1, -1, 3])
+
+
+def test_dna_to_base4_array_applies_metadata():
+    """Offsets are removed modulo 4 in one step, truncating like zip()."""
+    from decoder import dna_to_base4_array
+    original_base4 = [3, 3, 3, 0, 0, 0, 1, 2, 1, 2, 1, 2, 1, 2]
+    dna_sequence, metadata = base4_to_dna(original_base4)
+    assert dna_to_base4_array(dna_sequence, metadata).tolist() == original_base4
+    assert dna_to_base4_array(dna_sequence.encode('ascii'), metadata[:5]).tolist() == original_base4[:5]
+
+
+def test_invalid_bases_reported_in_bulk():
+    from decoder import InvalidBaseError, dna_to_base4_array
+    with pytest.raises(InvalidBaseError) as excinfo:
+        dna_to_base4_array("ACNGTXAc")
+    assert excinfo.value.positions.tolist() == [2, 5, 7]
+
+
+def test_patches_round_trip():
+    from decoder import apply_patches, dna_to_patches
+    from encoder.patches import patches_to_dna
+    patches = [(1000000, 'T'), (0, 'A'), (3, 'G'), (130, 'C')]
+    assert dna_to_patches(patches_to_dna(patches)) == sorted(patches)
+    assert dna_to_patches(patches_to_dna([])) == []
+    assert apply_patches('CCCCC', [(0, 'A'), (3, 'G')]) == 'ACCGC'
+    with pytest.raises(ValueError):
+        apply_patches('ACGT', [(4, 'A')])
+
+
+def test_rotating_code_round_trip():
+    """The rotating code never repeats a base and decodes without metadata."""
+    import numpy as np
+    from encoder.rotating import base4_to_rotating_dna
+    from decoder import rotating_dna_to_base4_array
+    for data in [b"", b"A", bytes(range(256)), b"\x00" * 100, b"\xff" * 63]:
+        digits = binary_to_base4(data)
+        for length in (len(digits), max(0, len(digits) - 3)):
+            dna_sequence = base4_to_rotating_dna(digits[:length])
+            assert all(a != b for a, b in zip(dna_sequence, dna_sequence[1:]))
+            assert rotating_dna_to_base4_array(dna_sequence).tolist() == digits[:length]
+
+
+def test_rotating_code_rejects_repeats():
+    from decoder import rotating_dna_to_base4_array
+    with pytest.raises(ValueError):
+        rotating_dna_to_base4_array("CAAG")
@@ -6,4 +6,41 @@ def test_add_reed_solomon():
     # The output should be longer than the input by nsym bytes
     assert len(encoded) == len(data) + 4
     # The original data should be at the start of the encoded output
-    assert encoded.startswith(data) 
\ No newline at end of file
+    assert encoded.startswith(data) 
+def test_numpy_backend_matches_reedsolo():
+    """The vectorized encoder produces exactly the reedsolo codewords, including a shortened last one."""
+    import os
+    from encoder.ecc import rs_encode
+
+    for size in (0, 1, 245, 246, 3000):
+        data = os.urandom(size)
+        for nsym in (4, 10, 32):
+            assert rs_encode(data, nsym, backend='numpy') == rs_encode(data, nsym, backend='reedsolo')
+        assert rs_encode(data, 8, nsize=64, backend='numpy') == rs_encode(data, 8, nsize=64, backend='reedsolo')
+
+def test_syndromes_flag_damaged_codewords():
+    import numpy as np
+    from encoder.ecc import get_codec, rs_decode, rs_syndromes
+
+    assert get_codec(10) is get_codec(10)
+    data = bytes(range(256)) * 20
+    codewords = np.frombuffer(add_reed_solomon(data, nsym=10), dtype=np.uint8)[:255 * 20].reshape(20, 255).copy()
+    assert not rs_syndromes(codewords, 10).any()
+    codewords[[3, 17], [5, 200]] ^= 0x5a
+    assert list(np.flatnonzero(rs_syndromes(codewords, 10).any(axis=1))) == [3, 17]
+    decoded, corrected = rs_decode(codewords.tobytes(), 10)
+    assert decoded == data[:245 * 20] and corrected == 2
+
+def test_erasures_filled_at_known_positions():
+    import numpy as np
+    import pytest
+    from encoder.ecc import rs_correct_erasures
+
+    data = bytes(range(256)) * 20
+    codewords = np.frombuffer(add_reed_solomon(data, nsym=10), dtype=np.uint8)[:255 * 20].reshape(20, 255)
+    erased = codewords.copy()
+    erased[:, [0, 7, 100, 244, 250]] = 0xff
+    assert (rs_correct_erasures(erased, [0, 7, 100, 244, 250], 10) == codewords).all()
+    assert (rs_correct_erasures(erased[:, :2], [], 10) == erased[:, :2]).all()
+    with pytest.raises(ValueError):
+        rs_correct_erasures(erased, range(11), 10)
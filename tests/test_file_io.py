@@ -70,4 +70,210 @@ def test_fasta_without_metadata():
         assert metadata == []  # Should be empty list when no metadata
         
     if os.path.exists(tmp.name) and os.path.dirname(tmp.name) == tempfile.gettempdir():
-        os.remove(tmp.name) 
\ No newline at end of file
+        os.remove(tmp.name) 
+
+def test_pack_metadata_round_trip():
+    """The sparse metadata codec is lossless for empty, sparse and dense streams."""
+    import random
+    from dnaio.file_writer import pack_metadata, unpack_metadata
+    rng = random.Random(0)
+    cases = [
+        [],
+        [0] * 1000,
+        [3],
+        [1, 0, 0, 2, 0, 3, 0, 0, 0],
+        [rng.choice([0] * 30 + [1, 2, 3]) for _ in range(5000)],
+        [rng.randrange(4) for _ in range(5000)],
+    ]
+    for metadata in cases:
+        assert unpack_metadata(pack_metadata(metadata)).tolist() == metadata
+    assert len(pack_metadata([0] * 100000)) < 16
+
+
+def test_sparse_metadata_dna_is_compact_and_reversible():
+    from dnaio.file_writer import encode_metadata_sparse, decode_metadata_sparse
+    metadata = ([0] * 97 + [1, 0, 2]) * 50
+    metadata_dna = encode_metadata_sparse(metadata)
+    assert len(metadata_dna) * 10 < len(metadata)
+    assert all(a != b for a, b in zip(metadata_dna, metadata_dna[1:]))
+    assert decode_metadata_sparse(metadata_dna) == metadata
+
+
+def test_fasta_metadata_uses_sparse_encoding():
+    from dnaio.file_reader import read_fasta_records
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.fasta') as tmp:
+        metadata = [0, 1, 2, 3, 0, 0, 0, 3]
+        write_fasta(tmp.name, 'ACGTACGT', header='test', metadata=metadata)
+        tmp.close()
+        records = list(SeqIO.parse(tmp.name, 'fasta'))
+        assert records[1].description == 'test_metadata encoding=sparse'
+        assert read_fasta_records(tmp.name)['metadata'] == metadata
+    if os.path.exists(tmp.name) and os.path.dirname(tmp.name) == tempfile.gettempdir():
+        os.remove(tmp.name)
+
+
+def test_metadata_block_packer_matches_pack_metadata_blocks():
+    from dnaio.file_writer import MetadataBlockPacker, pack_metadata_blocks
+    metadata = ([0] * 300 + [3, 1]) * 20 + [0] * 50
+    packer = MetadataBlockPacker(block_size=1000)
+    packed = b''.join(packer.feed(metadata[i:i + 97]) for i in range(0, len(metadata), 97)) + packer.finish()
+    assert (packed, packer.lengths) == pack_metadata_blocks(metadata, block_size=1000)
+
+
+def test_block_packed_metadata_is_read_by_range():
+    """Offset ranges of a block-packed metadata record decode only the blocks covering them."""
+    import random
+    from contextlib import ExitStack
+    import numpy as np
+    from dnaio.file_writer import FastaStreamWriter, encode_metadata_blocks, decode_metadata_blocks
+    from encoder.header import ArchiveHeader
+    from dnaio.streaming import open_encoded_source
+
+    rng = random.Random(21)
+    metadata = [rng.choice([0] * 5 + [1, 2, 3]) for _ in range(5000)]
+    metadata_dna, lengths = encode_metadata_blocks(metadata, block_size=300)
+    assert len(lengths) == 17 and decode_metadata_blocks(metadata_dna, lengths) == metadata
+    header = ArchiveHeader(codec='mapped', nsym=10, metadata_block=300, metadata_index=lengths)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fasta_file = os.path.join(tmpdir, 'blocks.fasta')
+        with open(fasta_file, 'wb') as handle:
+            writer = FastaStreamWriter(handle)
+            writer.begin('test', 'codec=mapped')
+            writer.write('AC' * 2500)
+            writer.begin('test_metadata', 'encoding=sparse-blocks')
+            writer.write(metadata_dna)
+            writer.begin('test_header', 'encoding=base64')
+            writer.write(header.to_record())
+            writer.end()
+        with ExitStack() as stack:
+            source = open_encoded_source(fasta_file, stack)
+            for start, stop in [(0, 1), (299, 301), (1234, 1900), (4990, 5000), (4999, 6000), (0, 5000)]:
+                assert source['read_metadata'](start, stop).tolist() == metadata[start:stop]
+            assert np.concatenate(list(source['metadata'](256))).tolist() == metadata
+
+
+def test_fasta_stream_writer_wraps_like_biopython():
+    from dnaio.file_writer import FastaStreamWriter
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.fasta') as tmp:
+        writer = FastaStreamWriter(tmp)
+        writer.begin('test', 'codec=mapped')
+        for chunk in ('ACGT' * 7, 'GATTACA' * 20, 'C'):
+            writer.write(chunk)
+        writer.begin('test_filename')
+        writer.write('ZGF0YS5iaW4=')
+        writer.end()
+        tmp.close()
+        records = list(SeqIO.parse(tmp.name, 'fasta'))
+        assert str(records[0].seq) == 'ACGT' * 7 + 'GATTACA' * 20 + 'C'
+        assert records[0].description == 'test codec=mapped'
+        assert str(records[1].seq) == 'ZGF0YS5iaW4='
+        with open(tmp.name) as f:
+            assert max(len(line.rstrip('\n')) for line in f) == 60
+    if os.path.exists(tmp.name) and os.path.dirname(tmp.name) == tempfile.gettempdir():
+        os.remove(tmp.name)
+
+
+def test_native_fasta_engine_matches_biopython():
+    from dnaio.file_reader import parse_fasta, read_fasta_records
+    with tempfile.TemporaryDirectory() as tmpdir:
+        native = os.path.join(tmpdir, 'native.fasta')
+        biopython = os.path.join(tmpdir, 'biopython.fasta')
+        unwrapped = os.path.join(tmpdir, 'unwrapped.fasta')
+        kwargs = dict(header='test', metadata=[0, 3, 1, 0] * 40, original_filename='data.bin', patches=[(5, 'G')], codec='patch')
+        write_fasta(native, 'ACGT' * 61, **kwargs)
+        write_fasta(biopython, 'ACGT' * 61, engine='biopython', **kwargs)
+        write_fasta(unwrapped, 'ACGT' * 61, line_width=0, **kwargs)
+        with open(native, 'rb') as a, open(biopython, 'rb') as b:
+            assert a.read() == b.read()
+        with open(unwrapped) as f:
+            assert len(f.readline()) + len(f.readline()) == len('>test codec=patch\n') + 4 * 61 + 1
+        assert parse_fasta(native) == parse_fasta(native, engine='biopython')
+        assert read_fasta_records(unwrapped) == read_fasta_records(native, engine='biopython')
+
+def test_archive_header_round_trip_and_tail_lookup():
+    """The archive header survives FASTA and container storage and verifies the payload."""
+    from dataclasses import replace
+    from encoder.header import ArchiveHeader
+    from dnaio.header import read_archive_header
+    from dnaio.container import write_container
+    from dnaio.file_writer import pack_metadata_blocks
+
+    payload = b'header test payload'
+    header = ArchiveHeader.for_payload(payload, 'mapped', 16, 'payload.bin')
+    assert ArchiveHeader.from_bytes(header.to_bytes()) == header
+    assert ArchiveHeader.from_record(header.to_record()) == header
+    header.verify(payload)
+    for tampered in (payload[:-1], payload[:-1] + b'!'):
+        try:
+            header.verify(tampered)
+            assert False, "Expected a verification error"
+        except ValueError:
+            pass
+    try:
+        ArchiveHeader.from_bytes(b'{"codec":"mapped","nsym":10,"format_version":99}')
+        assert False, "Expected an unsupported version error"
+    except ValueError as e:
+        assert 'version' in str(e)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fasta_file = os.path.join(tmpdir, 'data.fasta')
+        container_file = os.path.join(tmpdir, 'data.dnab')
+        write_fasta(fasta_file, 'ACGT' * 100, metadata=[0, 1] * 200, original_filename='payload.bin', archive_header=header)
+        write_container(container_file, 'ACGT' * 100, metadata=[0, 1] * 200, archive_header=header)
+        # The FASTA header also indexes the metadata blocks
+        fasta_header = read_archive_header(fasta_file)
+        assert fasta_header.metadata_index == pack_metadata_blocks([0, 1] * 200)[1]
+        assert replace(fasta_header, metadata_block=None, metadata_index=None) == header
+        assert read_archive_header(container_file) == header
+        write_fasta(fasta_file, 'ACGT' * 100)
+        assert read_archive_header(fasta_file) is None
+
+
+def test_input_readers_accept_any_source_without_copies():
+    """Paths of any type are mapped, buffers exposed in place and streams read once."""
+    import io
+    import mmap
+    from dnaio.file_reader import input_name, iter_file_chunks, read_input
+
+    data = bytes(range(256)) * 100
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'payload.bin')
+        with open(path, 'wb') as f:
+            f.write(data)
+        view = read_input(path)
+        assert isinstance(view.obj, mmap.mmap) and view == data
+        assert b''.join(iter_file_chunks(path, 1000)) == data
+        with open(path, 'rb') as f:
+            f.seek(6)
+            assert read_input(f) == data[6:] and input_name(f) == 'payload.bin'
+
+        buffer = io.BytesIO(data)
+        view = read_input(buffer)
+        buffer.getbuffer()[0] = 7  # Shares the buffer's memory
+        assert view[0] == 7 and view[1:] == data[1:]
+        stream = io.BufferedReader(io.BytesIO(data))  # Not seekable to a file: read once
+        assert read_input(stream) == data and input_name(stream) is None
+
+        empty = os.path.join(tmpdir, 'empty.bin')
+        open(empty, 'wb').close()
+        assert read_input(empty) == b''
+
+
+def test_spooled_uploads_are_read_in_place():
+    """Spooled temporary files (FastAPI uploads) are mapped after rolling over, and can be closed while mapped."""
+    import mmap
+    from dnaio.file_reader import read_input
+
+    data = bytes(range(256)) * 64
+    with tempfile.SpooledTemporaryFile(max_size=1 << 20) as small:
+        small.write(data)
+        small.seek(10)
+        view = read_input(small)
+        assert isinstance(view.obj, mmap.mmap) and view == data[10:]
+    assert view == data[10:]  # Still readable after the upload is closed
+
+    with tempfile.SpooledTemporaryFile(max_size=100) as large:
+        large.write(data)
+        large.seek(0)
+        view = read_input(large)
+        assert isinstance(view.obj, mmap.mmap) and view == data
@@ -0,0 +1,91 @@
+import os
+import random
+
+import pytest
+
+from decoder.oligo import PoolReport, decode_oligos
+from dnaio.oligo_pool import is_oligo_pool, iter_oligo_pool, write_oligo_pool
+from encoder.constraints import DEFAULT_SPEC, analyze_sequence
+from encoder.oligo import OligoLayout, encode_oligos
+
+FORWARD = 'ACACGACGCTCTTCCGATCT'
+REVERSE = 'AGATCGGAAGAGCACACGTCT'
+
+
+def test_oligo_pool_round_trip_in_any_order():
+    """Shuffled, duplicated and damaged strands still decode to the payload."""
+    data = os.urandom(5000)
+    layout = OligoLayout(150, 10, FORWARD, REVERSE)
+    pool = encode_oligos(data, nsym=10, layout=layout, filename='payload.bin')
+    assert not pool.violations
+    assert {len(strand) for strand in pool.strands} == {layout.strand_length}
+    assert all(strand.startswith(FORWARD) and strand.endswith(REVERSE) for strand in pool.strands)
+
+    damaged = pool.strands[-1]
+    damaged = damaged[:60] + ('A' if damaged[60] != 'A' else 'C') + damaged[61:]
+    strands = pool.strands + pool.strands[:20] + [damaged]
+    random.Random(0).shuffle(strands)
+    report = PoolReport()
+    decoded, header = decode_oligos(strands, layout=layout, report=report)
+    assert decoded == data and header.filename == 'payload.bin'
+    assert report.strands == len(strands) and report.rejected == 1
+    assert report.valid == len(pool.strands) + 20 and report.duplicates == 20
+
+
+def test_outer_code_rebuilds_dropped_strands():
+    """Up to ``parity_strands`` lost strands per group, header strands included, are rebuilt."""
+    data = os.urandom(12000)
+    layout = OligoLayout(150, 10, parity_strands=6, group_strands=100)
+    pool = encode_oligos(data, nsym=10, layout=layout)
+    assert len(pool.strands) == layout.address_count(pool.data_strands) > pool.data_strands
+    assert layout.data_address(0) == 6 and layout.data_address(100) == 112
+
+    lost = {0, 6, 7, 8, 50, 105, 112, 113, 200, len(pool.strands) - 1}
+    report = PoolReport()
+    decoded, _ = decode_oligos([strand for address, strand in enumerate(pool.strands) if address not in lost], layout, report)
+    assert decoded == data
+    assert report.missing == sorted(lost) and report.recovered == sorted(lost)
+
+    # A single short group whose tail and header strands are both lost
+    small = encode_oligos(b'short pool' * 40, layout=OligoLayout(120, 8, parity_strands=4))
+    kept = small.strands[:4] + small.strands[6:-2]
+    assert decode_oligos(kept, small.layout)[0] == b'short pool' * 40
+
+    with pytest.raises(ValueError, match='not recoverable'):
+        decode_oligos([strand for address, strand in enumerate(pool.strands) if not 120 <= address < 128], layout)
+
+
+def test_oligo_strands_satisfy_constraints():
+    """Every strand meets the spec on its own, even for highly repetitive payloads."""
+    pool = encode_oligos(b'\x00' * 3000 + b'AT' * 2000, nsym=10, layout=OligoLayout(120))
+    assert not pool.violations
+    for strand in pool.strands:
+        report = analyze_sequence(strand, DEFAULT_SPEC)
+        assert DEFAULT_SPEC.gc_min <= report.gc_content <= DEFAULT_SPEC.gc_max
+        assert not report.has_long_homopolymers() and not report.has_unstable_motifs
+
+    with pytest.raises(ValueError, match='header'):
+        decode_oligos(pool.strands[pool.header_strands:])
+
+
+def test_oligo_pool_files(tmp_path):
+    data = b'oligo pool file test\n' * 50
+    pool = encode_oligos(data, layout=OligoLayout(100))
+    for name in ('pool.fasta', 'pool.csv'):
+        path = str(tmp_path / name)
+        write_oligo_pool(path, pool.strands[::-1])
+        assert is_oligo_pool(path)
+        assert list(iter_oligo_pool(path)) == pool.strands[::-1]
+        assert decode_oligos(iter_oligo_pool(path))[0] == data
+    with pytest.raises(ValueError):
+        write_oligo_pool(str(tmp_path / 'pool.txt'), pool.strands)
+
+
+def test_pre_compressed_oligo_pool():
+    """A compressed payload needs fewer strands and decodes to the original data."""
+    data = b'oligo pool compression test\n' * 400
+    plain = encode_oligos(data, layout=OligoLayout(120))
+    pool = encode_oligos(data, layout=OligoLayout(120), compression='zlib')
+    assert len(pool.strands) < len(plain.strands) // 4
+    decoded, header = decode_oligos(pool.strands[::-1])
+    assert decoded == data and header.compression == 'zlib' and header.compressed_sizes
@@ -1,5 +1,8 @@
 import tempfile
 import os
+
+import pytest
+
 from dnaio.file_writer import write_txt, write_fasta
 from dnaio.file_reader import read_txt_file, read_fasta_with_metadata
 from encoder.base_mapping import binary_to_base4, base4_to_dna
@@ -105,4 +108,333 @@ def test_pipeline_constraint_enforcement():
     
     # Verify round-trip still works
     decoded_data = decode_dna_sequence(dna_sequence, metadata, nsym=4)
-    assert decoded_data == test_data 
\ No newline at end of file
+    assert decoded_data == test_data 
+
+
+def test_patch_codec_round_trip():
+    """Patch mode stores repairs as a patch list instead of a metadata stream."""
+    from encoder.base_mapping import map_to_dna
+    from encoder.constraints import analyze_sequence
+    from dnaio.file_reader import read_fasta_records
+
+    test_data = b"AAAAAAAA" * 40 + bytes(range(256))
+    corrected_data = add_reed_solomon(test_data, nsym=4)
+    mapped = map_to_dna(binary_to_base4(corrected_data), codec='patch')
+    assert mapped.metadata is None
+    assert len(mapped.patches) > 0
+    report = analyze_sequence(mapped.dna_sequence)
+    assert not report.has_long_homopolymers() and not report.has_unstable_motifs
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.fasta') as tmp:
+        tmp.close()
+        write_fasta(tmp.name, mapped.dna_sequence, patches=mapped.patches, original_filename='data.bin')
+        records = read_fasta_records(tmp.name)
+        assert records['patches'] == sorted(mapped.patches)
+        assert records['metadata'] == []
+        decoded_data = decode_dna_sequence(records['sequence'], records['metadata'], nsym=4, patches=records['patches'])
+        assert decoded_data == test_data
+        if os.path.exists(tmp.name) and os.path.dirname(tmp.name) == tempfile.gettempdir():
+            os.remove(tmp.name)
+
+def test_rotating_codec_round_trip():
+    """The rotating codec writes no metadata record and is recorded in the FASTA header."""
+    from encoder.base_mapping import map_to_dna
+    from dnaio.file_reader import read_fasta_records
+
+    test_data = b"Rotating code test " * 20
+    corrected_data = add_reed_solomon(test_data, nsym=4)
+    base4_digits = binary_to_base4(corrected_data)
+    mapped = map_to_dna(base4_digits, codec='rotating')
+    assert mapped.metadata is None and mapped.patches is None
+    # 41 nt per 8 bytes instead of 32 nt plus 32 nt of metadata
+    assert len(mapped.dna_sequence) < 0.7 * 2 * len(base4_digits)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.fasta') as tmp:
+        tmp.close()
+        write_fasta(tmp.name, mapped.dna_sequence, codec=mapped.codec)
+        records = read_fasta_records(tmp.name)
+        assert records['codec'] == 'rotating'
+        decoded_data = decode_dna_sequence(records['sequence'], records['metadata'], nsym=4, codec=records['codec'])
+        assert decoded_data == test_data
+        if os.path.exists(tmp.name) and os.path.dirname(tmp.name) == tempfile.gettempdir():
+            os.remove(tmp.name)
+
+def test_parallel_encoding_matches_serial():
+    """Block-parallel encoding gives the serial output for 'mapped' and 'rotating' and always decodes."""
+    from encoder.base_mapping import map_to_dna, bytes_to_base4_array
+    from encoder.parallel import encode_parallel
+
+    test_data = (b"AAAAAAAA" * 300 + bytes(range(256)) * 10) * 2
+    serial_digits = bytes_to_base4_array(add_reed_solomon(test_data, nsym=4))
+    for codec in ('mapped', 'rotating', 'patch'):
+        parallel = encode_parallel(test_data, nsym=4, codec=codec, workers=2, block_size=2000)
+        serial = map_to_dna(serial_digits, codec=codec)
+        if codec != 'patch':
+            assert parallel.dna_sequence == serial.dna_sequence
+        if codec == 'mapped':
+            assert list(parallel.metadata) == serial.metadata
+        decoded_data = decode_dna_sequence(parallel.dna_sequence, parallel.metadata, nsym=4, patches=parallel.patches, codec=codec)
+        assert decoded_data == test_data
+
+def test_parallel_mapping_resumes_with_full_motif_context():
+    """A forbidden motif longer than 64 nt across a block seam is avoided exactly as in a serial encode."""
+    import random
+    from encoder.base_mapping import map_to_dna, bytes_to_base4_array
+    from encoder.constraints import DEFAULT_SPEC, ConstraintSpec, analyze_sequence
+    from encoder.parallel import encode_parallel
+
+    test_data = random.Random(10).randbytes(4000)
+    serial_digits = bytes_to_base4_array(add_reed_solomon(test_data, nsym=10))
+    plain = map_to_dna(serial_digits).dna_sequence
+    seam = 1960 // 245 * 255 * 4
+    # Starts 80 nt before the seam, so it is only seen with the whole automaton context
+    spec = ConstraintSpec(motifs=DEFAULT_SPEC.motifs + (plain[seam - 80:seam + 10],))
+    parallel = encode_parallel(test_data, nsym=10, spec=spec, workers=2, block_size=2450)
+    serial = map_to_dna(serial_digits, spec)
+    assert parallel.dna_sequence == serial.dna_sequence and list(parallel.metadata) == serial.metadata
+    assert not analyze_sequence(parallel.dna_sequence, spec).motif_hits
+
+def test_parallel_patch_codec_reports_unrepaired_violations():
+    """Violations left after the block and seam repairs are reported, and nothing else is left."""
+    import itertools
+    import random
+    from encoder.constraints import ConstraintSpec, compile_constraints
+    from encoder.parallel import _violation_ends, encode_parallel
+
+    # Dense enough that a few positions cannot be repaired at all
+    motifs = tuple(a + b + c for a, b, c in itertools.product('ACGT', repeat=3) if a != c)[:40]
+    spec = ConstraintSpec(motifs=motifs)
+    test_data = random.Random(3).randbytes(5000)
+    parallel = encode_parallel(test_data, nsym=10, spec=spec, codec='patch', workers=2, block_size=1000)
+    window_spec = ConstraintSpec(gc_min=0.0, gc_max=100.0, motifs=motifs)
+    assert parallel.unresolved and parallel.unresolved == _violation_ends(compile_constraints(window_spec), parallel.dna_sequence.encode('ascii'))
+    assert decode_dna_sequence(parallel.dna_sequence, None, nsym=10, patches=parallel.patches, codec='patch') == test_data
+
+def test_streaming_encode_matches_in_memory_encode():
+    """The streaming encoder writes the same sequence and metadata as the in-memory path."""
+    from encoder.base_mapping import map_to_dna, bytes_to_base4_array
+    from dnaio.file_reader import read_fasta_records
+    from dnaio.streaming import encode_file_streaming
+
+    test_data = b"CCCCCCCC" * 500 + bytes(range(256)) * 8
+    serial_digits = bytes_to_base4_array(add_reed_solomon(test_data, nsym=4))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_file = os.path.join(tmpdir, 'data.txt')
+        output_file = os.path.join(tmpdir, 'data.fasta')
+        with open(input_file, 'wb') as f:
+            f.write(test_data)
+        for codec in ('mapped', 'rotating'):
+            report = encode_file_streaming(input_file, output_file, nsym=4, codec=codec, chunk_size=1000)
+            serial = map_to_dna(serial_digits, codec=codec)
+            records = read_fasta_records(output_file)
+            assert records['sequence'] == serial.dna_sequence
+            assert records['metadata'] == (serial.metadata or [])
+            assert records['filename'] == 'data.txt' and records['codec'] == codec
+            assert report.length == len(serial.dna_sequence)
+            decoded_data = decode_dna_sequence(records['sequence'], records['metadata'], nsym=4, codec=codec)
+            assert decoded_data == test_data
+
+def test_streaming_decode_round_trip_and_early_failure():
+    """The streaming decoder restores every codec and names the first uncorrectable codeword."""
+    from encoder.base_mapping import map_to_dna
+    from dnaio.streaming import decode_file_streaming
+
+    test_data = bytes(range(256)) * 12 + b"TTTTTTTT" * 100
+    corrected_data = add_reed_solomon(test_data, nsym=4)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fasta_file = os.path.join(tmpdir, 'data.fasta')
+        output_file = os.path.join(tmpdir, 'data.out')
+        for codec in ('mapped', 'patch', 'rotating'):
+            mapped = map_to_dna(binary_to_base4(corrected_data), codec=codec)
+            write_fasta(fasta_file, mapped.dna_sequence, metadata=mapped.metadata, original_filename='data.bin', patches=mapped.patches, codec=codec)
+            info = decode_file_streaming(fasta_file, output_file, nsym=4, chunk_size=1)
+            with open(output_file, 'rb') as f:
+                assert f.read() == test_data
+            assert info['filename'] == 'data.bin' and info['codec'] == codec
+            assert info['codewords'] == -(-len(corrected_data) // 255)
+
+        # Corrupt the third codeword beyond repair (4 bases per byte, 255 bytes per codeword)
+        mapped = map_to_dna(binary_to_base4(corrected_data))
+        sequence = list(mapped.dna_sequence)
+        for position in range(2 * 1020, 2 * 1020 + 40, 4):
+            sequence[position] = 'A' if sequence[position] != 'A' else 'C'
+        write_fasta(fasta_file, ''.join(sequence), metadata=mapped.metadata)
+        with pytest.raises(ValueError, match='codeword 2'):
+            decode_file_streaming(fasta_file, output_file, nsym=4)
+        with open(output_file, 'rb') as f:
+            assert f.read() == test_data[:2 * 251]
+
+
+def test_archive_header_drives_decoding():
+    """Files carrying an archive header decode without nsym and reject a tampered payload."""
+    from main import encode_file, decode_file
+    from dnaio.streaming import decode_file_streaming
+    from dnaio.header import read_archive_header
+
+    test_data = b'Self-describing archive header test line.\n' * 60
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_file = os.path.join(tmpdir, 'data.txt')
+        with open(input_file, 'wb') as f:
+            f.write(test_data)
+        for extension, stream in (('.fasta', False), ('.fasta', True), ('.dnab', False)):
+            encoded_file = os.path.join(tmpdir, 'data' + extension)
+            encode_file(input_file, encoded_file, nsym=20, stream=stream)
+            header = read_archive_header(encoded_file)
+            assert header.nsym == 20 and header.payload_length == len(test_data) and header.filename == 'data.txt'
+
+            info = decode_file_streaming(encoded_file, os.path.join(tmpdir, 'out.txt'))
+            assert info['verified'] and info['header'] == header
+            decode_file(encoded_file, os.path.join(tmpdir, 'restored'))
+            with open(os.path.join(tmpdir, 'restored.txt'), 'rb') as f:
+                assert f.read() == test_data
+
+        # A header whose hash does not match the payload is reported
+        from dnaio.file_reader import read_fasta_records
+        records = read_fasta_records(encoded_file := os.path.join(tmpdir, 'data.fasta'))
+        records['header'].sha256 = '0' * 64
+        write_fasta(encoded_file, records['sequence'], metadata=records['metadata'], original_filename='data.txt', archive_header=records['header'])
+        for decode in (decode_file_streaming, decode_file):
+            with pytest.raises(ValueError, match='SHA-256'):
+                decode(encoded_file, os.path.join(tmpdir, 'out.txt'))
+
+
+def test_decode_range_reads_only_covering_codewords():
+    """Byte ranges decode from every codec and file type, touching only their codewords."""
+    import random
+    from main import encode_file
+    from decoder.random_access import decode_range, plan_range
+    from encoder.ecc import DecodeReport
+
+    plan = plan_range(500, 10, 1000, 10, 'rotating')
+    assert (plan.first_codeword, plan.last_codeword, plan.skip) == (2, 3, 10)
+    assert (plan.base_start, plan.digit_skip) == (2040 // 32 * 41, 2040 % 32)
+    assert plan_range(990, 50, 1000, 10).length == 10 and plan_range(1000, 5, 1000, 10).length == 0
+
+    rng = random.Random(7)
+    test_data = ''.join(rng.choice('ACGT acgt\n') for _ in range(20000)).encode('ascii')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_file = os.path.join(tmpdir, 'data.txt')
+        with open(input_file, 'wb') as f:
+            f.write(test_data)
+        for codec in ('mapped', 'rotating', 'patch'):
+            for extension in ('.fasta', '.dnab'):
+                encoded_file = os.path.join(tmpdir, codec + extension)
+                encode_file(input_file, encoded_file, nsym=10, codec=codec)
+                for start, length in ((0, 1), (244, 2), (9000, 3000), (19990, 100), (0, len(test_data))):
+                    report = DecodeReport()
+                    assert decode_range(encoded_file, start, length, report=report) == test_data[start:start + length]
+                    assert report.codewords == plan_range(start, length, len(test_data), 10).last_codeword - start // 245
+
+
+def test_multi_file_archive_extracts_members_independently():
+    """Archived files come back whole, or one at a time without decoding the rest."""
+    from main import decode_file, encode_archive
+    from dnaio.archive import extract_member, member_path, read_directory
+    from encoder.ecc import DecodeReport
+
+    files = {'notes.txt': b'first member\n' * 50, 'docs/a.bin': bytes(range(256)) * 20, 'docs/sub/empty': b''}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = os.path.join(tmpdir, 'src')
+        for name, data in files.items():
+            path = os.path.join(source, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        single = os.path.join(tmpdir, 'single.txt')
+        with open(single, 'wb') as f:
+            f.write(b'loose file')
+        expected = dict(files, **{'single.txt': b'loose file'})
+
+        for extension in ('.fasta', '.dnab'):
+            encoded_file = os.path.join(tmpdir, 'archive' + extension)
+            encode_archive([os.path.join(source, 'docs'), os.path.join(source, 'notes.txt'), single], encoded_file, codec='rotating')
+            members = read_directory(encoded_file)
+            assert [member.name for member in members] == ['docs/a.bin', 'docs/sub/empty', 'notes.txt', 'single.txt']
+
+            report = DecodeReport()
+            assert extract_member(encoded_file, 'single.txt', members, report=report) == b'loose file'
+            assert report.codewords == 1
+
+            output_dir = os.path.join(tmpdir, 'out' + extension)
+            decode_file(encoded_file, output_dir)
+            for member in members:
+                with open(member_path(output_dir, member.name), 'rb') as f:
+                    assert f.read() == expected[member.name]
+
+    with pytest.raises(ValueError):
+        member_path('out', '../escape')
+
+
+def test_pre_compression_is_chosen_recorded_and_reversed(monkeypatch):
+    """Compressible input shrinks the sequence; decoders undo the compression from the header."""
+    import random
+    from main import decode_file, encode_file
+    from decoder.random_access import decode_range
+    from dnaio.header import read_archive_header
+    from encoder.compression import COMPRESSIONS, choose_compression
+
+    rng = random.Random(3)
+    text = ' '.join(rng.choice(['alpha', 'beta', 'gamma', 'delta', 'genome', 'strand']) for _ in range(20000)).encode('ascii')
+    assert choose_compression(text) in COMPRESSIONS
+    assert choose_compression(rng.randbytes(50000)) is None
+    assert choose_compression(b'PK\x03\x04' + text) is None
+
+    # Several compressed blocks, so ranges cross block boundaries
+    monkeypatch.setattr('main.COMPRESSION_BLOCK', 16384)
+    monkeypatch.setattr('dnaio.streaming.COMPRESSION_BLOCK', 16384)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_file = os.path.join(tmpdir, 'words.txt')
+        with open(input_file, 'wb') as f:
+            f.write(text)
+        plain_file = os.path.join(tmpdir, 'plain.fasta')
+        encode_file(input_file, plain_file, nsym=10, codec='rotating')
+        for extension, stream in (('.fasta', False), ('.dnab', True)):
+            encoded_file = os.path.join(tmpdir, 'packed' + extension)
+            encode_file(input_file, encoded_file, nsym=10, codec='rotating', stream=stream, compression='auto')
+            header = read_archive_header(encoded_file)
+            assert header.compression in COMPRESSIONS and header.payload_length < len(text) // 3
+            for decode_stream in (False, True):
+                output_file = os.path.join(tmpdir, f'out{extension}{decode_stream}.txt')
+                decode_file(encoded_file, output_file, stream=decode_stream)
+                with open(output_file, 'rb') as f:
+                    assert f.read() == text
+            assert header.compression_block == 16384 and len(header.compressed_sizes) == -(-len(text) // 16384)
+            for start, length in ((0, 10), (16380, 10), (30000, 40000), (len(text) - 5, 100), (len(text) + 1, 10)):
+                assert decode_range(encoded_file, start, length) == text[start:start + length]
+        assert os.path.getsize(os.path.join(tmpdir, 'packed.fasta')) < os.path.getsize(plain_file) // 3
+
+
+def test_chunk_store_reencodes_only_edited_chunks():
+    """An edited file re-encodes just the chunks around the edit; both versions rebuild exactly."""
+    import random
+    from main import decode_file
+    from dnaio.chunk_store import is_manifest, store_file
+    from encoder.chunking import chunk_boundaries
+
+    rng = random.Random(5)
+    original = rng.randbytes(300000)
+    edited = original[:150000] + b'inserted bytes' + original[150010:]
+    sizes = (4096, 16384, 65536)
+    boundaries = chunk_boundaries(original, *sizes)
+    assert boundaries[-1] == len(original) and all(4096 <= b - a <= 65536 for a, b in zip([0] + boundaries, boundaries[:-1]))
+    # Boundaries follow the content, not the offsets
+    shifted = chunk_boundaries(b'x' * 100 + original, *sizes)
+    assert {b - 100 for b in shifted[1:]} >= set(boundaries[1:-1])
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store_dir = os.path.join(tmpdir, 'store')
+        for version, data in (('v1', original), ('v2', edited)):
+            with open(os.path.join(tmpdir, version + '.txt'), 'wb') as f:
+                f.write(data)
+        first = store_file(os.path.join(tmpdir, 'v1.txt'), os.path.join(tmpdir, 'v1.json'), store_dir, codec='rotating', chunk_sizes=sizes)
+        second = store_file(os.path.join(tmpdir, 'v2.txt'), os.path.join(tmpdir, 'v2.json'), store_dir, codec='rotating', chunk_sizes=sizes)
+        assert first.new_chunks == first.chunks and first.reused_bytes == 0
+        assert second.new_chunks <= 2 and second.reused_bytes > len(edited) * 3 // 4
+
+        for version, data in (('v1', original), ('v2', edited)):
+            manifest_file = os.path.join(tmpdir, version + '.json')
+            assert is_manifest(manifest_file)
+            output_file = os.path.join(tmpdir, version + '.out')
+            decode_file(manifest_file, output_file, workers=2 if version == 'v2' else 1)
+            with open(output_file, 'rb') as f:
+                assert f.read() == data